@@ -0,0 +1,99 @@
+"""
+语法分析基准测试: 每次展开产生式时的调度开销，按名字查找语义规则 vs 预先编译好的执行计划
+用法: python -m benchmark.action_plan_benchmark [字符数]
+"""
+from lexical.lexical import Lexical
+from syntax.syntax import Syntax, Node, get_shared_table
+from syntax import registry
+from semantic.rule import SemanticRuleFactory
+from benchmark.corpus import generate_source
+import sys
+import time
+
+
+def dispatch_by_name(record, node, children):
+    """
+    原来的做法: 每次展开都检查语义规则的数量，再按关键字逐个查找语义规则
+    :param record: 产生式的记录
+    :param node: 被展开的节点
+    :param children: 孩子节点
+    :return: 入栈的对象
+    """
+    production = record.production
+    if len(production.right) != len(production.semantic_children):
+        return None
+    pushed = [SemanticRuleFactory.get_instance(production.semantic_start, node),
+              SemanticRuleFactory.get_instance(production.semantic_end, node)]
+    for i in range(len(production.right) - 1, -1, -1):
+        pushed.append(children[i])
+        pushed.append(SemanticRuleFactory.get_instance(production.semantic_children[i], children[i]))
+    return pushed
+
+
+def dispatch_by_plan(record, node, children):
+    """
+    执行计划: 类已经解析好，入栈顺序已经排好
+    :param record: 产生式的记录
+    :param node: 被展开的节点
+    :param children: 孩子节点
+    :return: 入栈的对象
+    """
+    pushed = [record.start(node) if record.start is not None else None,
+              record.end(node) if record.end is not None else None]
+    for i, semantic_child in record.pushes:
+        pushed.append(children[i])
+        if semantic_child is not None:
+            pushed.append(semantic_child(children[i]))
+    return pushed
+
+
+def measure_dispatch(repeat=2000):
+    """
+    对预测分析表中的每一条记录测量一次展开的调度开销
+    :param repeat: 重复次数
+    :return: (按名字查找的耗时, 执行计划的耗时)，单位为秒/次
+    """
+    table = get_shared_table()
+    records = list()
+    for non_terminal_id in range(registry.non_terminal_start, len(registry.symbol_types)):
+        for terminal_id in range(registry.terminal_count):
+            record = table.get_record(non_terminal_id, terminal_id)
+            if record is not None and record not in records:
+                records.append(record)
+    cases = [(record, Node(registry.signs[record.left]), [Node(sign) for sign in record.right]) for record in records]
+
+    results = list()
+    for dispatch in (dispatch_by_name, dispatch_by_plan):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for record, node, children in cases:
+                dispatch(record, node, children)
+        results.append((time.perf_counter() - start) / (repeat * len(cases)))
+    return results
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 64 * 1024
+    by_name, by_plan = measure_dispatch()
+    print('每次展开的调度开销:')
+    print('  按名字查找:\t', '%.2f µs' % (by_name * 1e6))
+    print('  执行计划:\t', '%.2f µs' % (by_plan * 1e6), '\t加速比 %.1f' % (by_name / by_plan))
+
+    lexical = Lexical()
+    lexical.load_source(generate_source(size))
+    lexical.execute()
+    syntax = Syntax()
+    syntax.put_source(lexical.get_result(), lexical.get_source())
+    start = time.perf_counter()
+    success = syntax.execute()
+    elapsed = time.perf_counter() - start
+    statistics = syntax.get_statistics()
+    steps = sum(statistics.values())
+    print('语法分析:\t', '%.3f s' % elapsed, '\t成功' if success else '\t失败')
+    print('  展开 %(expansions)d 次，匹配 %(matches)d 个终结符，执行 %(semantic_rules)d 条语义规则' % statistics)
+    print('  每一步平均 %.2f µs，其中展开的调度开销节省了约 %.2f µs/步'
+          % (elapsed / steps * 1e6, (by_name - by_plan) * statistics['expansions'] / steps * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+词法分析基准测试: 使用 token 缓存 vs 每次重新扫描
+用法: python -m benchmark.cache_benchmark [字符数] [次数]
+"""
+from lexical.lexical import Lexical
+from lexical.cache import TokenCache
+from benchmark.corpus import generate_source
+import sys
+import tempfile
+import time
+
+
+def run(source, times, cache):
+    """
+    多次执行词法分析
+    :param source: 源代码
+    :param times: 次数
+    :param cache: token 缓存
+    :return: (平均耗时, 最后一次的结果)
+    """
+    start = time.perf_counter()
+    for _ in range(times):
+        lexical = Lexical(cache=cache)
+        lexical.load_source(source)
+        lexical.execute()
+    return (time.perf_counter() - start) / times, lexical.get_result()
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1024 * 1024
+    times = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    source = generate_source(size)
+    print('源代码大小:\t', len(source), '字符')
+
+    elapsed, expected = run(source, times, None)
+    print('不使用缓存:\t', '%.3f s/次' % elapsed)
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TokenCache(directory)
+        elapsed, result = run(source, times, cache)
+        same = [(t.type, t.str, t.line, t.offset) for t in result] == [(t.type, t.str, t.line, t.offset) for t in expected]
+        print('使用缓存:\t', '%.3f s/次' % elapsed, '\t命中', cache.hits, '未命中', cache.misses, '\t结果一致', same)
+
+
+if __name__ == '__main__':
+    main()
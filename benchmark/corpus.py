@@ -0,0 +1,61 @@
+"""
+基准测试用的源代码生成
+"""
+
+
+def get_name(index):
+    """
+    将序号转换成只含字母的标识符(词法规则中 id 不能含有数字)
+    :param index: 序号
+    :return: 标识符
+    """
+    name = ''
+    while True:
+        name = chr(ord('a') + index % 26) + name
+        index = index // 26
+        if index == 0:
+            break
+    return 'fun' + name
+
+
+def get_function(index):
+    """
+    生成一个函数定义
+    :param index: 序号
+    :return: 函数定义源代码
+    """
+    name = get_name(index)
+    return ('/* A program to perform Euclid s Algorithm to compute gcd. */\n'
+            'int ' + name + '(int u, int v) {\n'
+            '    if (v == 0) {\n'
+            '        return u;\n'
+            '    } else {\n'
+            '        return ' + name + '(v, u-u/v*v);\n'
+            '    }\n'
+            '    /* u-u/v*v* == u mod v */\n'
+            '}\n\n')
+
+
+def generate_source(size):
+    """
+    生成一份大约 size 个字符的合法源代码
+    :param size: 字符数
+    :return: 源代码
+    """
+    functions = list()
+    length = 0
+    index = 0
+    while length < size:
+        function = get_function(index)
+        functions.append(function)
+        length += len(function)
+        index += 1
+    functions.append('void main() {\n'
+                     '    int x;\n'
+                     '    int y;\n'
+                     '    x = input();\n'
+                     '    y = input();\n'
+                     '    output(' + get_name(0) + '(x, y));\n'
+                     '    return;\n'
+                     '}\n')
+    return ''.join(functions)
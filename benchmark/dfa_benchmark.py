@@ -0,0 +1,65 @@
+"""
+词法分析基准测试: 总正则扫描器 vs 表驱动 DFA 扫描器
+两个扫描器都按 rule.py 中的顺序取第一条能匹配的规则，比较时加入容易与最长匹配混淆的写法
+用法: python -m benchmark.dfa_benchmark [字符数]
+"""
+from lexical.scanner import Scanner
+from lexical.dfa import LexicalDFA, DFAScanner
+from benchmark.corpus import generate_source
+from source import SourceFile
+import re
+import sys
+import tempfile
+import time
+
+
+# 规则的顺序决定结果的写法: >= 是 > 和 =，以关键字开头的标识符先切出关键字，== 与 = 不同
+edge_cases = 'a >= b <= c == d = e != f\nintx ifelse returnx voidy whilex elsewhere in i\n007 10 a1 x/y/**/z*w\n'
+
+
+def run(scanner_class, source):
+    """
+    扫描并计时
+    :param scanner_class: 扫描器类
+    :param source: 源代码
+    :return: (token 列表, 耗时)
+    """
+    scanner = scanner_class()
+    start = time.perf_counter()
+    scanner.scan(SourceFile(source))
+    return scanner.get_result(), time.perf_counter() - start
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1024 * 1024
+    source = re.sub(r'/\*.*?\*/', '', generate_source(size)) + edge_cases
+
+    # DFA 生成耗时与缓存载入耗时
+    with tempfile.TemporaryDirectory() as cache_dir:
+        start = time.perf_counter()
+        LexicalDFA().load(cache_dir)
+        generate_time = time.perf_counter() - start
+        start = time.perf_counter()
+        LexicalDFA().load(cache_dir)
+        load_time = time.perf_counter() - start
+
+    regex_tokens, regex_time = run(Scanner, source)
+    dfa_tokens, dfa_time = run(DFAScanner, source)
+
+    same = len(regex_tokens) == len(dfa_tokens)
+    for a, b in zip(regex_tokens, dfa_tokens):
+        if a.type != b.type or a.str != b.str or a.line != b.line:
+            same = False
+            break
+
+    print('源代码大小:\t', len(source), '字符')
+    print('token 数量:\t', len(dfa_tokens))
+    print('结果是否一致:\t', same)
+    print('DFA 生成:\t', '%.2f ms' % (generate_time * 1000))
+    print('DFA 缓存载入:\t', '%.2f ms' % (load_time * 1000))
+    print('总正则:\t', '%.3f s' % regex_time, '\t%.0f tokens/s' % (len(regex_tokens) / regex_time))
+    print('DFA:\t', '%.3f s' % dfa_time, '\t%.0f tokens/s' % (len(dfa_tokens) / dfa_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+语法分析基准测试: 在随机生成的大文法上求 first 集和 follow 集，位集加工作表 vs 反复遍历所有产生式
+用法: python -m benchmark.first_follow_benchmark [产生式数量...]
+"""
+from syntax.first_follow import get_bit_indexes, calculate_nullable, calculate_firsts, calculate_follows
+import random
+import sys
+import time
+
+
+# 终结符数量，编号 0 是结束符 #
+terminal_count = 64
+
+
+def generate_grammar(production_count, seed=0):
+    """
+    随机生成一个文法: 每个非终结符平均 4 条产生式，右边多数引用编号更大的非终结符(形成很长的依赖链)，少数引用更小的(形成递归)
+    :param production_count: 产生式数量
+    :param seed: 随机数种子
+    :return: (符号数量, 产生式列表)
+    """
+    rand = random.Random(seed)
+    non_terminal_count = max(production_count // 4, 1)
+    symbol_count = terminal_count + non_terminal_count
+    grammar = list()
+    for i in range(production_count):
+        left = terminal_count + (i if i < non_terminal_count else rand.randrange(non_terminal_count))
+        right = list()
+        # 约十分之一的产生式为空产生式
+        length = 0 if rand.random() < 0.1 else rand.randint(1, 4)
+        for _ in range(length):
+            r = rand.random()
+            if r < 0.3:
+                right.append(rand.randrange(1, terminal_count))
+            elif r < 0.9:
+                right.append(rand.randrange(left, min(left + 8, symbol_count)))
+            else:
+                right.append(rand.randrange(terminal_count, symbol_count))
+        grammar.append((left, right))
+    return symbol_count, grammar
+
+
+def calculate_naive(symbol_count, grammar):
+    """
+    原来的做法: 集合用列表表示，每一轮遍历所有产生式，直到没有集合变大，每个后缀的 first 集都重新计算
+    :param symbol_count: 符号数量
+    :param grammar: 产生式列表
+    :return: (first 集, follow 集)，空字用 -1 表示
+    """
+    firsts = [[s] if s < terminal_count else list() for s in range(symbol_count)]
+    follows = [list() for _ in range(symbol_count)]
+
+    def add(container, items):
+        bigger = False
+        for item in items:
+            if item not in container:
+                container.append(item)
+                bigger = True
+        return bigger
+
+    def string_first(right):
+        result = list()
+        for sign in right:
+            add(result, [i for i in firsts[sign] if i != -1])
+            if -1 not in firsts[sign]:
+                return result
+        add(result, [-1])
+        return result
+
+    flag = True
+    while flag:
+        flag = False
+        for left, right in grammar:
+            if add(firsts[left], string_first(right)):
+                flag = True
+
+    follows[terminal_count].append(0)
+    flag = True
+    while flag:
+        flag = False
+        for left, right in grammar:
+            for i, sign in enumerate(right):
+                if sign < terminal_count:
+                    continue
+                first = string_first(right[i + 1:])
+                if add(follows[sign], [f for f in first if f != -1]):
+                    flag = True
+                if -1 in first and add(follows[sign], follows[left]):
+                    flag = True
+    return firsts, follows
+
+
+def calculate_bitset(symbol_count, grammar):
+    """
+    位集加工作表
+    :param symbol_count: 符号数量
+    :param grammar: 产生式列表
+    :return: (nullable, first 集, follow 集)
+    """
+    nullable = calculate_nullable(symbol_count, terminal_count, grammar)
+    firsts = calculate_firsts(symbol_count, terminal_count, grammar, nullable)
+    follows = calculate_follows(symbol_count, terminal_count, grammar, nullable, firsts, terminal_count, 0)
+    return nullable, firsts, follows
+
+
+def main():
+    sizes = [int(i) for i in sys.argv[1:]] or [1000, 2000, 5000, 10000]
+    print('产生式\t\t位集+工作表\t逐轮遍历\t加速比')
+    for size in sizes:
+        symbol_count, grammar = generate_grammar(size)
+
+        start = time.perf_counter()
+        nullable, firsts, follows = calculate_bitset(symbol_count, grammar)
+        bitset_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        naive_firsts, naive_follows = calculate_naive(symbol_count, grammar)
+        naive_time = time.perf_counter() - start
+
+        # 两种做法的结果必须相同
+        for s in range(terminal_count, symbol_count):
+            expected = set(get_bit_indexes(firsts[s])) | ({-1} if nullable[s] else set())
+            assert set(naive_firsts[s]) == expected, '第 %d 个符号的 first 集不同' % s
+            assert set(naive_follows[s]) == set(get_bit_indexes(follows[s])), '第 %d 个符号的 follow 集不同' % s
+
+        print(size, '\t\t%.1f ms' % (bitset_time * 1000), '\t\t%.1f ms' % (naive_time * 1000),
+              '\t%.1f' % (naive_time / bitset_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+语法分析基准测试: 表驱动的分析 vs 生成的递归下降分析器(包括语义分析)
+两种分析方式交替执行多次，每次执行前回收上一次语法树的垃圾，取最快的一次
+最后检查嵌套很深的表达式: 递归下降超出递归深度时改用表驱动分析，结果与表驱动分析相同
+用法: python -m benchmark.generated_parser_benchmark [字符数] [重复次数]
+"""
+from lexical.lexical import Lexical
+from syntax.syntax import Syntax, prewarm_shared_table
+from semantic import code as semantic_code
+from benchmark.corpus import generate_source
+import gc
+import sys
+import time
+
+
+# 比较的分析方式
+engines = ('table', 'generated')
+
+
+def measure(engine, lexical):
+    """
+    对同一份词法分析结果执行一次语法分析
+    :param engine: 分析方式
+    :param lexical: 词法分析器
+    :return: (耗时, 是否成功, 三地址代码)
+    """
+    semantic_code.current_var_num = 0
+    semantic_code.current_block_num = 0
+    syntax = Syntax(engine)
+    syntax.put_source(lexical.get_result(), lexical.get_source())
+    gc.collect()
+    start = time.perf_counter()
+    success = syntax.execute()
+    elapsed = time.perf_counter() - start
+    return elapsed, success, list(syntax.get_result().root.code) if success else None
+
+
+def analyze(source):
+    """
+    词法分析
+    :param source: 源代码
+    :return: 词法分析器
+    """
+    lexical = Lexical()
+    lexical.load_source(source)
+    lexical.execute()
+    return lexical
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 64 * 1024
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    prewarm_shared_table()
+    lexical = analyze(generate_source(size))
+    print('tokens:\t\t', len(lexical.get_result()))
+
+    # 先生成并载入分析器，不计入耗时
+    measure('generated', lexical)
+    best = dict()
+    results = dict()
+    for _ in range(repeat):
+        for engine in engines:
+            elapsed, success, codes = measure(engine, lexical)
+            best[engine] = min(best.get(engine, elapsed), elapsed)
+            results[engine] = (success, codes)
+    for name, engine in (('表驱动:\t\t', 'table'), ('递归下降:\t', 'generated')):
+        success, codes = results[engine]
+        print(name, '%.3f s' % best[engine], '\t成功' if success else '\t失败', '\t%d 条代码' % len(codes or []))
+    print('加速比:\t\t %.2f' % (best['table'] / best['generated']),
+          '\t代码一致' if results['table'] == results['generated'] else '\t代码不一致')
+
+    # 嵌套层数超过递归深度的表达式
+    depth = sys.getrecursionlimit()
+    lexical = analyze('void main() { int a; a = ' + '(' * depth + '1' + ')' * depth + '; return; }\n')
+    deep = [measure(engine, lexical)[1:] for engine in engines]
+    print('嵌套 %d 层:\t' % depth, '成功' if deep[1][0] else '失败', '\t与表驱动一致' if deep[0] == deep[1] else '\t与表驱动不一致')
+
+
+if __name__ == '__main__':
+    main()
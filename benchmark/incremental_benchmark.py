@@ -0,0 +1,45 @@
+"""
+词法分析基准测试: 编辑之后增量更新 vs 重新扫描整个源文件
+用法: python -m benchmark.incremental_benchmark [字符数] [编辑次数]
+"""
+from lexical.lexical import Lexical
+from benchmark.corpus import generate_source
+import random
+import sys
+import time
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1024 * 1024
+    edits = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    source = generate_source(size)
+    random.seed(0)
+    # 在随机的空格处插入一个字符再删掉，模拟逐键输入(插在其他位置可能拆开注释符号)
+    spaces = [i for i, c in enumerate(source) if c == ' ']
+    positions = [random.choice(spaces) for _ in range(edits)]
+
+    lexical = Lexical()
+    lexical.load_source(source)
+    lexical.execute()
+    print('源代码大小:\t', len(source), '字符', '\t', len(lexical.get_result()), 'tokens')
+
+    start = time.perf_counter()
+    changed = 0
+    for position in positions:
+        for edit in ((position, position, 'x'), (position, position + 1, '')):
+            first, old_stop, new_stop = lexical.apply_edit(*edit)
+            changed += new_stop - first
+    incremental = (time.perf_counter() - start) / (edits * 2)
+    print('增量更新:\t', '%.3f ms/次' % (incremental * 1000), '\t平均重新扫描 %.1f tokens' % (changed / (edits * 2)))
+
+    start = time.perf_counter()
+    for _ in range(10):
+        lexical = Lexical()
+        lexical.load_source(source)
+        lexical.execute()
+    full = (time.perf_counter() - start) / 10
+    print('重新扫描:\t', '%.3f ms/次' % (full * 1000), '\t加速比 %.1f' % (full / incremental))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+词法分析基准测试: 旧的逐类型匹配 vs 单遍总正则扫描
+用法: python -m benchmark.lexical_benchmark [字符数]
+"""
+from lexical.rule import *
+from lexical.scanner import Scanner
+from lexical.stream import Token
+from benchmark.corpus import generate_source
+from source import SourceFile
+import re
+import sys
+import time
+
+
+def legacy_split_tokens(source):
+    """
+    旧版本的 token 分割(逐行、逐类型 re.compile 并切片缓冲区)，仅用作对照
+    :param source: 已经去除注释的源代码
+    :return: token 列表
+    """
+    lines = list()
+    for t in source.split('\n'):
+        lines.append(' ' + t)
+    buffer = ''
+    current_line_num = 0
+    tokens = list()
+    types = list()
+    for i in split_char_type:
+        types.append(i)
+    for i in token_type:
+        types.append(i)
+
+    while len(lines) > 0:
+        match_this_time = False
+        if buffer == '':
+            buffer = lines[0]
+            lines = lines[1:]
+            current_line_num += 1
+        for t in types:
+            match = re.compile(regex_dict[t]).match(buffer)
+            if match:
+                tokens.append(Token(t, buffer[match.start():match.end()], current_line_num))
+                buffer = buffer[match.end():]
+                match_this_time = True
+                break
+        if not match_this_time:
+            return None
+
+    result = list()
+    for token in tokens:
+        if token.type != split_char_type[0]:
+            result.append(token)
+    return result
+
+
+def measure(function, source):
+    """
+    计时
+    :param function: 被测函数
+    :param source: 源代码
+    :return: (结果, 耗时)
+    """
+    start = time.perf_counter()
+    result = function(source)
+    return result, time.perf_counter() - start
+
+
+def scan(source):
+    """
+    使用 Scanner 分割 token
+    :param source: 已经去除注释的源代码
+    :return: token 列表
+    """
+    scanner = Scanner()
+    scanner.scan(SourceFile(source))
+    return scanner.get_result()
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1024 * 1024
+    # 去除注释之后的源代码(与 Lexical.__del_notes 的结果一致)
+    source = re.sub(r'/\*.*?\*/', '', generate_source(size))
+
+    before, before_time = measure(legacy_split_tokens, source)
+    after, after_time = measure(scan, source)
+
+    same = len(before) == len(after)
+    for a, b in zip(before, after):
+        if a.type != b.type or a.str != b.str or a.line != b.line:
+            same = False
+            break
+
+    print('源代码大小:\t', len(source), '字符')
+    print('token 数量:\t', len(after))
+    print('结果是否一致:\t', same)
+    print('旧实现:\t', '%.3f s' % before_time, '\t%.0f tokens/s' % (len(before) / before_time))
+    print('新实现:\t', '%.3f s' % after_time, '\t%.0f tokens/s' % (len(after) / after_time))
+    print('加速比:\t', '%.1fx' % (before_time / after_time))
+
+
+if __name__ == '__main__':
+    main()
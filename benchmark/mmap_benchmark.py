@@ -0,0 +1,70 @@
+"""
+词法分析基准测试: 读入 str vs 内存映射 bytes
+用法: python -m benchmark.mmap_benchmark [字符数]
+"""
+from lexical.lexical import Lexical
+from benchmark.corpus import generate_source
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+def load_text(path):
+    """
+    以文本方式读入整个文件并执行词法分析，再取出所有 token 的内容
+    :param path: 文件路径
+    :return: token 内容列表
+    """
+    lexical = Lexical()
+    with open(path) as f:
+        lexical.load_source(f.read())
+    lexical.execute()
+    return [token.str for token in lexical.get_result()]
+
+
+def load_mmap(path):
+    """
+    把文件映射到内存，以字节模式执行词法分析，再取出所有 token 的内容
+    :param path: 文件路径
+    :return: token 内容列表
+    """
+    lexical = Lexical()
+    lexical.load_file(path)
+    lexical.execute()
+    return [token.str for token in lexical.get_result()]
+
+
+def measure(function, path):
+    """
+    统计耗时和峰值内存(取出的 token 内容列表对两种方式是一样的，一并计入)
+    :return: (结果, 耗时, 峰值字节数)
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(path)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 4 * 1024 * 1024
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'source.c')
+        with open(path, 'w') as f:
+            f.write(generate_source(size))
+
+        print('源代码大小:\t', os.path.getsize(path), '字节')
+        results = list()
+        for name, function in (('读入 str', load_text), ('映射 bytes', load_mmap)):
+            result, elapsed, peak = measure(function, path)
+            results.append(result)
+            print(name + ':\t', len(result), 'tokens', '\t%.3f s' % elapsed, '\t峰值内存 %.1f KB' % (peak / 1024))
+        print('结果一致:\t', results[0] == results[1])
+
+
+if __name__ == '__main__':
+    main()
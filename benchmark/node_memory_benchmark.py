@@ -0,0 +1,163 @@
+"""
+语法树基准测试: 每个节点占用的内存，原来带 __dict__ 的节点 vs 现在带 __slots__ 的节点
+语法分析(含语义规则)之后，用 tracemalloc 统计仍然保留的内存，除以语法树的节点数
+语义规则把孩子的代码逐层拷贝到父节点，保留的内存随程序长度超线性增长，行数太多时耗时很长
+用法: python -m benchmark.node_memory_benchmark [行数]
+"""
+from lexical.lexical import Lexical
+from syntax import syntax as syntax_module
+from syntax.syntax import Syntax, prewarm_shared_table
+from benchmark.corpus import generate_source
+import gc
+import sys
+import time
+import tracemalloc
+
+
+# 空列表对象的大小
+list_size = sys.getsizeof(list())
+
+
+class LegacyNode:
+    """
+    原来的树节点: 每个节点都有 __dict__、孩子列表和 code、names 两个空列表，仅用作对照
+    """
+    def __init__(self, data, parent=None, index=0):
+        """
+        树节点
+        :param data: 节点数据
+        :param parent: 父节点
+        :param index: 在父节点的孩子中的下标(原来的节点不保存)
+        """
+        self.data = data
+        self.str = data.type
+        self.children = list()
+        self.parent = parent
+
+        # 属性
+        self.lexical = None
+        self.code = list()
+        self.type = None
+        self.id = None
+        self.length = None
+        self.fun = None
+        self.num = None
+        self.names = list()
+        self.bool = None
+        self.op = None
+        self.add = None
+        self.mul = None
+
+    def get_pre_brother(self, index):
+        """
+        获取它前 index 位的兄弟
+        :param index: ..
+        :return: 兄弟
+        """
+        self_index = 0
+        for i in range(0, len(self.parent.children)):
+            if self.parent.children[i] is self:
+                self_index = i
+        return self.parent.children[self_index - index]
+
+
+def generate_lines(line_count):
+    """
+    生成大约 line_count 行的源代码
+    :param line_count: 行数
+    :return: 源代码
+    """
+    sample = generate_source(64 * 1024)
+    return generate_source(line_count * len(sample) // sample.count('\n'))
+
+
+def get_node_size(node):
+    """
+    节点本身占用的内存: 对象、__dict__(如果有)、孩子列表和其他列表对象的头部
+    code 中的代码是语义规则逐层拷贝上来的，与节点的表示无关，不统计列表中存放元素的部分
+    带 __slots__ 的节点直接读取私有的槽，避免 code、names 因为被读取而建立列表
+    :param node: 节点
+    :return: 字节数
+    """
+    size = sys.getsizeof(node)
+    attributes = getattr(node, '__dict__', None)
+    if attributes is not None:
+        size += sys.getsizeof(attributes)
+        values = [attributes.get('code'), attributes.get('names')]
+    else:
+        values = [getattr(node, '_Node__code'), getattr(node, '_Node__names')]
+    if isinstance(node.children, list):
+        size += sys.getsizeof(node.children)
+    for value in values:
+        if isinstance(value, list):
+            size += list_size
+    return size
+
+
+def measure_nodes(tree):
+    """
+    统计语法树的节点数和节点本身占用的内存
+    :param tree: 语法树
+    :return: (节点数, 字节数)
+    """
+    count = 0
+    size = 0
+    stack = [tree.root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        size += get_node_size(node)
+        stack.extend(node.children)
+    return count, size
+
+
+def measure_parse(lexical, node_class):
+    """
+    用指定的节点类执行语法分析，统计保留的内存和节点本身占用的内存
+    :param lexical: 执行过词法分析的词法分析器
+    :param node_class: 节点类
+    :return: (是否成功, 耗时, 保留的字节数, 节点数, 节点本身的字节数)
+    """
+    # 表驱动的分析通过 syntax.syntax.Node 建立节点，临时换成指定的节点类
+    original = syntax_module.Node
+    syntax_module.Node = node_class
+    try:
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        syntax = Syntax()
+        syntax.put_source(lexical.get_result(), lexical.get_source())
+        success = syntax.execute()
+        elapsed = time.perf_counter() - start
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+    finally:
+        syntax_module.Node = original
+    nodes, node_size = measure_nodes(syntax.get_result())
+    return success, elapsed, retained, nodes, node_size
+
+
+def main():
+    line_count = int(sys.argv[1]) if len(sys.argv) > 1 else 30000
+    prewarm_shared_table()
+    source = generate_lines(line_count)
+    lexical = Lexical()
+    lexical.load_source(source)
+    lexical.execute()
+    print('源代码:\t', source.count('\n'), '行', '\t%d tokens' % len(lexical.get_result()))
+
+    results = dict()
+    for name, node_class in (('原来的节点', LegacyNode), ('__slots__ 节点', syntax_module.Node)):
+        success, elapsed, retained, nodes, node_size = measure_parse(lexical, node_class)
+        results[name] = (retained / nodes, node_size / nodes)
+        print(name + ':\t', '成功' if success else '失败', '\t%.3f s(开启 tracemalloc)' % elapsed, '\t%d 个节点' % nodes,
+              '\t保留内存 %.1f MB' % (retained / 1024 / 1024))
+        print('  每个节点:\t %.1f 字节(含语义属性)' % (retained / nodes), '\t节点本身 %.1f 字节' % (node_size / nodes))
+        gc.collect()
+    (old_retained, old_size), (new_retained, new_size) = results.values()
+    print('每个节点节省:\t %.1f 字节(含语义属性)' % (old_retained - new_retained), '\t节点本身 %.1f 字节' % (old_size - new_size))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+词法分析基准测试: 含大量注释的源代码
+旧实现每删除一个注释都要重新搜索并 replace 整个源代码，新实现在扫描时跳过注释
+用法: python -m benchmark.note_benchmark [注释数量]
+"""
+from lexical.rule import *
+from lexical.lexical import Lexical
+import re
+import sys
+import time
+import tracemalloc
+
+
+def generate_source(count):
+    """
+    生成含有 count 个注释的源代码，单行注释和多行注释交替出现
+    :param count: 注释数量
+    :return: 源代码
+    """
+    lines = list()
+    for i in range(0, count):
+        if i % 2 == 0:
+            lines.append('int x; /* note ' + str(i) + ' */\n')
+        else:
+            lines.append('/* note ' + str(i) + '\n   continued */ int y;\n')
+    return ''.join(lines)
+
+
+def legacy_del_notes(source):
+    """
+    旧版本的注释删除，仅用作对照
+    :param source: 源代码
+    :return: 删除注释之后的源代码
+    """
+    result = source
+    while True:
+        match = re.compile(regex_dict[note_char_type[0]]).search(result)
+        if not match:
+            return result
+        match2 = re.compile(regex_dict[note_char_type[1]]).search(result)
+        line_count = result[match.start():match2.end()].count('\n')
+        result = result.replace(result[match.start():match2.end()], '\n' * line_count)
+
+
+def lex(source):
+    """
+    使用 Lexical 完成包括注释处理在内的全部词法分析
+    :param source: 源代码
+    :return: token 数量
+    """
+    lexical = Lexical()
+    lexical.load_source(source)
+    lexical.execute()
+    return len(lexical.get_result())
+
+
+def measure(function, source):
+    """
+    统计耗时和峰值内存(分开运行，避免 tracemalloc 影响计时)
+    :return: (耗时, 峰值字节数)
+    """
+    start = time.perf_counter()
+    function(source)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    function(source)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    source = generate_source(count)
+    print('注释数量:\t', count, '\t源代码大小:', len(source), '字符')
+    legacy_time, legacy_peak = measure(legacy_del_notes, source)
+    print('旧实现(仅删除注释):\t', '%.3f s' % legacy_time, '\t峰值内存 %.1f KB' % (legacy_peak / 1024))
+    new_time, new_peak = measure(lex, source)
+    print('新实现(完整词法分析，含 token 列表):\t', '%.3f s' % new_time, '\t峰值内存 %.1f KB' % (new_peak / 1024))
+
+
+if __name__ == '__main__':
+    main()
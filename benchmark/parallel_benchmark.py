@@ -0,0 +1,39 @@
+"""
+词法分析基准测试: 多进程扫描的加速比
+用法: python -m benchmark.parallel_benchmark [字符数]
+"""
+from lexical.lexical import Lexical
+from benchmark.corpus import generate_source
+import os
+import sys
+import time
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 16 * 1024 * 1024
+    source = generate_source(size)
+    print('源代码大小:\t', len(source), '字符')
+    print('CPU 核数:\t', os.cpu_count())
+
+    lexical = Lexical()
+    lexical.load_source(source)
+    start = time.perf_counter()
+    lexical.execute()
+    baseline = time.perf_counter() - start
+    expected = lexical.get_result()
+    print('顺序扫描:\t', len(expected), 'tokens', '\t%.3f s' % baseline)
+
+    for workers in (1, 2, 4, 8):
+        lexical = Lexical()
+        lexical.load_source(source)
+        start = time.perf_counter()
+        lexical.execute_parallel(workers)
+        elapsed = time.perf_counter() - start
+        result = lexical.get_result()
+        same = (result.kinds == expected.kinds and result.starts == expected.starts
+                and result.ends == expected.ends and result.lines == expected.lines)
+        print(str(workers) + ' 个进程:\t', '%.3f s' % elapsed, '\t加速比 %.2f' % (baseline / elapsed), '\t结果一致', same)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+词法 + 语法分析基准测试: 先得到完整的 token 序列再分析 vs 词法分析和语法分析融合成一条流水线
+流水线中 Syntax 每次只从 Lexical.iter_tokens 读取一个向前看的 token，不保存任何 token 列表
+用法: python -m benchmark.pipeline_benchmark [字符数]
+"""
+from lexical.lexical import Lexical
+from syntax.syntax import Syntax, prewarm_shared_table
+from benchmark.corpus import generate_source
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+def separate(path):
+    """
+    一次性载入文件，得到完整的 token 序列之后再语法分析
+    :param path: 文件路径
+    :return: 是否成功
+    """
+    lexical = Lexical()
+    with open(path) as f:
+        lexical.load_source(f.read())
+    if not lexical.execute():
+        return False
+    syntax = Syntax()
+    syntax.put_source(lexical.get_result(), lexical.get_source())
+    return syntax.execute()
+
+
+def fused(path):
+    """
+    流式读取文件，语法分析直接消费词法分析产生的 token
+    :param path: 文件路径
+    :return: 是否成功
+    """
+    lexical = Lexical()
+    syntax = Syntax()
+    with open(path) as f:
+        syntax.put_source(lexical.iter_tokens(f))
+        success = syntax.execute()
+    # 词法错误时 token 提前结束，语法分析也会报错，以词法错误为准
+    return success and lexical.get_error() is None
+
+
+def measure(function, path):
+    """
+    统计耗时和峰值内存
+    :return: (结果, 耗时, 峰值字节数)
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(path)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 256 * 1024
+    prewarm_shared_table()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'source.c')
+        with open(path, 'w') as f:
+            f.write(generate_source(size))
+
+        print('源代码大小:\t', os.path.getsize(path), '字节')
+        for name, function in (('先词法后语法', separate), ('融合流水线', fused)):
+            success, elapsed, peak = measure(function, path)
+            print(name + ':\t', '成功' if success else '失败', '\t%.3f s' % elapsed,
+                  '\t峰值内存 %.1f KB' % (peak / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+词法分析基准测试: 预扫描 vs 原来的逐字符和整串处理
+用法: python -m benchmark.prescan_benchmark [字符数]
+"""
+from lexical.lexical import Lexical
+from lexical.prescan import PreScan
+from benchmark.corpus import generate_source
+from benchmark.note_benchmark import legacy_del_notes
+from source import numpy, find_line_starts
+from array import array
+import re
+import sys
+import time
+
+
+def legacy_passes(source):
+    """
+    原来的预处理: 替换 \\r 和 \\t、逐字符记录换行符的位置、逐个删除注释，仅用作对照
+    :param source: 源代码
+    :return: 删除注释之后的源代码
+    """
+    source = source.replace('\r', '\n')
+    source = source.replace('\t', '    ')
+    enter_location = list()
+    for i in range(0, len(source)):
+        if source[i] == '\n':
+            enter_location.append(i)
+    return legacy_del_notes(source)
+
+
+def finditer_line_starts(source):
+    """
+    原来 SourceFile 建立行首偏移量的方式，仅用作对照
+    :param source: 源代码
+    :return: 偏移量数组
+    """
+    line_starts = array('q', [0])
+    for match in re.finditer('\r|\n', source):
+        line_starts.append(match.end())
+    return line_starts
+
+
+def measure(function, *args):
+    """
+    计时
+    :return: (结果, 耗时)
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1024 * 1024
+    source = generate_source(size)
+    print('源代码大小:\t', len(source), '字符')
+    print('使用 NumPy:\t', numpy is not None)
+
+    _, elapsed = measure(legacy_passes, source)
+    print('原来的预处理:\t', '%.3f s' % elapsed)
+    prescan, elapsed = measure(PreScan, source)
+    print('预扫描:\t\t', '%.3f s' % elapsed, '\t', len(prescan.line_starts), '行', len(prescan.invalid), '个非法字符')
+    # 含非 ASCII 字符的 str 和 bytes 也直接在原来的对象上查找，不逐字符转换
+    for name, text in (('预扫描(非 ASCII):', source + '\u4e2d'), ('预扫描(bytes):', source.encode('ascii'))):
+        prescan, elapsed = measure(PreScan, text)
+        print(name + '\t', '%.3f s' % elapsed, '\t注释之外的第一个非法字符', prescan.get_first_invalid())
+
+    expected, elapsed = measure(finditer_line_starts, source)
+    print('行首(finditer):\t', '%.3f s' % elapsed)
+    line_starts, elapsed = measure(find_line_starts, source)
+    print('行首(向量化):\t', '%.3f s' % elapsed, '\t结果一致', line_starts == expected)
+
+    # 第 10 行有非法字符，预扫描之后只需要扫描它之前的部分
+    lines = source.split('\n')
+    lines[9] += ' $'
+    broken = '\n'.join(lines)
+    for name, text in (('正确的源代码', source), ('含非法字符', broken)):
+        lexical = Lexical()
+        lexical.load_source(text)
+        success, elapsed = measure(lexical.execute_parallel, 1)
+        print(name + ':\t', '成功' if success else '失败', '\t%.3f s' % elapsed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""
+语法分析基准测试: 完整的语法分析和语义分析 vs 只检查语法的识别器
+用法: python -m benchmark.recognizer_benchmark [字符数]
+"""
+from lexical.lexical import Lexical
+from syntax.syntax import Syntax, prewarm_shared_table
+from syntax.recognizer import recognize
+from benchmark.corpus import generate_source
+import sys
+import time
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 256 * 1024
+    prewarm_shared_table()
+    lexical = Lexical()
+    lexical.load_source(generate_source(size))
+    lexical.execute()
+    tokens = lexical.get_result()
+    print('tokens:\t\t', len(tokens))
+
+    start = time.perf_counter()
+    syntax = Syntax()
+    syntax.put_source(tokens, lexical.get_source())
+    success = syntax.execute()
+    full_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    error = recognize(tokens, lexical.get_source())
+    recognize_time = time.perf_counter() - start
+
+    print('完整分析:\t', '%.3f s' % full_time, '\t成功' if success else '\t失败')
+    print('只检查语法:\t', '%.3f s' % recognize_time, '\t成功' if error is None else '\t失败',
+          '\t加速比 %.1f' % (full_time / recognize_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+语法分析基准测试: 出错后恢复(panic mode)的开销
+比较正确的源代码在不恢复和恢复两种模式下的耗时，以及删掉若干个分号之后一次找出所有错误的耗时
+用法: python -m benchmark.recovery_benchmark [字符数] [错误数]
+"""
+from lexical.lexical import Lexical
+from syntax.syntax import Syntax, prewarm_shared_table
+from benchmark.corpus import generate_source
+import gc
+import random
+import sys
+import time
+
+
+def measure(source, max_errors, repeat=3):
+    """
+    语法分析，取多次中最快的一次
+    :param source: 源代码
+    :param max_errors: 最多报告的语法错误数量
+    :param repeat: 重复次数
+    :return: (耗时, 报告的语法错误数量)
+    """
+    lexical = Lexical()
+    lexical.load_source(source)
+    lexical.execute()
+    best = None
+    errors = 0
+    for _ in range(repeat):
+        syntax = Syntax()
+        syntax.put_source(lexical.get_result(), lexical.get_source())
+        # 上一次分析留下的语法树有循环引用，先回收，避免影响计时
+        gc.collect()
+        start = time.perf_counter()
+        syntax.execute(max_errors)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        errors = len(syntax.get_errors())
+    return best, errors
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 64 * 1024
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    prewarm_shared_table()
+    source = generate_source(size)
+
+    # 均匀地删掉 count 个分号，每一处都是一个独立的语法错误
+    rand = random.Random(0)
+    positions = [i for i, c in enumerate(source) if c == ';']
+    removed = sorted(rand.sample(positions[::max(len(positions) // count, 1)], count))
+    broken = ''.join(source[start + 1:end] for start, end in zip([-1] + removed, removed + [len(source)]))
+
+    # 交替测量，减小先后顺序的影响
+    clean_time = recover_time = None
+    for _ in range(3):
+        elapsed, _ = measure(source, 1)
+        clean_time = elapsed if clean_time is None else min(clean_time, elapsed)
+        elapsed, _ = measure(source, 100)
+        recover_time = elapsed if recover_time is None else min(recover_time, elapsed)
+    broken_time, errors = measure(broken, 100)
+    print('正确的源代码:')
+    print('  不恢复:\t', '%.3f s' % clean_time)
+    print('  恢复:\t\t', '%.3f s' % recover_time, '\t额外开销 %+.1f%%' % ((recover_time / clean_time - 1) * 100))
+    print('删掉 %d 个分号:' % count)
+    print('  恢复:\t\t', '%.3f s' % broken_time, '\t报告 %d 个语法错误' % errors)
+
+
+if __name__ == '__main__':
+    main()
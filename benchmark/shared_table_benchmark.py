@@ -0,0 +1,47 @@
+"""
+语法分析基准测试: 每次构造 Syntax 时载入预测分析表 vs 进程内共享一份
+用法: python -m benchmark.shared_table_benchmark [次数]
+"""
+from syntax.syntax import PredictingAnalysisTable, Syntax, prewarm_shared_table, get_shared_table, swap_shared_table
+from syntax.rule import Production
+import sys
+import time
+
+
+def main():
+    times = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    start = time.perf_counter()
+    for _ in range(times):
+        PredictingAnalysisTable().load()
+    load_time = (time.perf_counter() - start) / times
+
+    start = time.perf_counter()
+    prewarm_shared_table()
+    prewarm_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(times):
+        Syntax()
+    shared_time = (time.perf_counter() - start) / times
+
+    print('预热:\t\t', '%.3f ms' % (prewarm_time * 1000))
+    print('每次载入:\t', '%.3f ms' % (load_time * 1000))
+    print('共享:\t\t', '%.3f ms' % (shared_time * 1000), '\t加速比 %.1f' % (load_time / shared_time))
+
+    # 换用压缩的表，再换回来；含有未编号符号的文法应该被拒绝，共享的表保持不变
+    old_table = get_shared_table()
+    start = time.perf_counter()
+    error = swap_shared_table(compressed=True)
+    swap_time = time.perf_counter() - start
+    swapped = error is None and get_shared_table() is not old_table
+    swap_shared_table()
+    current = get_shared_table()
+    error = swap_shared_table([Production('program', ['unknown-sign'], None, [None], None)])
+    rejected = error is not None and get_shared_table() is current
+    print('换表:\t\t', '%.3f ms' % (swap_time * 1000), '\t成功' if swapped else '\t失败',
+          '\t拒绝未知符号' if rejected else '\t未拒绝未知符号')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+词法分析基准测试: 一次性载入 vs 流式读取的峰值内存
+文件大小取块大小的若干倍，一次性载入的峰值内存随文件大小增长，流式读取的峰值内存只与块大小有关
+用法: python -m benchmark.stream_benchmark [块大小]
+"""
+from lexical.lexical import Lexical
+from benchmark.corpus import generate_source
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+# 文件大小是块大小的多少倍
+multiples = (1, 8, 32)
+
+
+def load_all(path, chunk_size):
+    """
+    一次性载入整个文件并执行词法分析
+    :param path: 文件路径
+    :param chunk_size: 不使用
+    :return: token 数量
+    """
+    lexical = Lexical()
+    with open(path) as f:
+        lexical.load_source(f.read())
+    lexical.execute()
+    return len(lexical.get_result())
+
+
+def stream(path, chunk_size, mode='r'):
+    """
+    流式读取文件，逐个消费 token 而不保存
+    :param path: 文件路径
+    :param chunk_size: 块大小
+    :param mode: 打开文件的模式
+    :return: token 数量
+    """
+    lexical = Lexical()
+    count = 0
+    with open(path, mode) as f:
+        for _ in lexical.iter_tokens(f, chunk_size):
+            count += 1
+    return count
+
+
+def stream_binary(path, chunk_size):
+    """
+    以二进制模式流式读取文件
+    :param path: 文件路径
+    :param chunk_size: 块大小
+    :return: token 数量
+    """
+    return stream(path, chunk_size, 'rb')
+
+
+def measure(function, path, chunk_size):
+    """
+    统计耗时和峰值内存
+    :return: (结果, 耗时, 峰值字节数)
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(path, chunk_size)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    chunk_size = int(sys.argv[1]) if len(sys.argv) > 1 else 16 * 1024
+    print('块大小:\t\t', chunk_size, '字符')
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'source.c')
+        for multiple in multiples:
+            with open(path, 'w') as f:
+                f.write(generate_source(chunk_size * multiple))
+
+            print('源代码大小:\t', os.path.getsize(path), '字节(块大小的 %d 倍)' % multiple)
+            for name, function in (('一次性载入', load_all), ('流式读取', stream), ('流式读取(二进制)', stream_binary)):
+                count, elapsed, peak = measure(function, path, chunk_size)
+                print('  ' + name + ':\t', count, 'tokens', '\t%.3f s' % elapsed, '\t峰值内存 %.1f KB' % (peak / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+语法分析基准测试: 预测分析表查表、终结符判断和完整的语法分析
+用法: python -m benchmark.syntax_benchmark [字符数]
+"""
+from lexical.lexical import Lexical
+from syntax.syntax import Syntax, PredictingAnalysisTable
+from syntax.rule import Sign, terminal_sign_type, non_terminal_sign_type
+from benchmark.corpus import generate_source
+import sys
+import time
+
+
+def measure_lookups(repeat=20):
+    """
+    对每一对 (非终结符, 终结符) 查表，并判断每个符号是不是终结符
+    :param repeat: 重复次数
+    :return: (每次查表的耗时, 每次按编号查记录的耗时, 每次判断的耗时)
+    """
+    table = PredictingAnalysisTable()
+    table.compile()
+    non_terminals = [Sign(t) for t in non_terminal_sign_type]
+    terminals = [Sign(t) for t in terminal_sign_type]
+    signs = non_terminals + terminals
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for x in non_terminals:
+            for y in terminals:
+                table.get_production(x, y)
+    lookup = (time.perf_counter() - start) / (repeat * len(non_terminals) * len(terminals))
+
+    # 分析时使用的接口: 直接用编号取出产生式的记录
+    non_terminal_ids = [sign.id for sign in non_terminals]
+    terminal_ids = [sign.id for sign in terminals]
+    get_record = table.get_record
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for x in non_terminal_ids:
+            for y in terminal_ids:
+                get_record(x, y)
+    record = (time.perf_counter() - start) / (repeat * len(non_terminal_ids) * len(terminal_ids))
+
+    start = time.perf_counter()
+    for _ in range(repeat * 100):
+        for sign in signs:
+            sign.is_terminal_sign()
+            sign.is_non_terminal_sign()
+    test = (time.perf_counter() - start) / (repeat * 100 * len(signs) * 2)
+    return lookup, record, test
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 256 * 1024
+    lookup, record, test = measure_lookups()
+    print('查表:\t\t', '%.0f ns/次' % (lookup * 1e9))
+    print('按编号查记录:\t', '%.0f ns/次' % (record * 1e9))
+    print('终结符判断:\t', '%.0f ns/次' % (test * 1e9))
+
+    source = generate_source(size)
+    lexical = Lexical()
+    lexical.load_source(source)
+    lexical.execute()
+    syntax = Syntax()
+    start = time.perf_counter()
+    syntax.put_source(lexical.get_result(), lexical.get_source())
+    success = syntax.execute()
+    elapsed = time.perf_counter() - start
+    print('语法分析:\t', len(lexical.get_result()), 'tokens', '\t%.3f s' % elapsed, '\t成功' if success else '\t失败')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+语法分析基准测试: 编译预测分析表 vs 导入缓存的预测分析表模块
+分别统计构造 PredictingAnalysisTable(建立产生式记录，两种方式都需要)、编译和从缓存载入的耗时，取多次中最快的一次
+缓存模块只含常量，写入缓存时同时写好 .pyc，导入时不需要编译模块
+用法: python -m benchmark.table_cache_benchmark [次数]
+"""
+from syntax.syntax import PredictingAnalysisTable
+from syntax import registry
+import gc
+import sys
+import tempfile
+import time
+
+
+def best_of(function, times, repeat=5):
+    """
+    每次对新构造的预测分析表执行 times 次，重复 repeat 次，取最快的一次
+    :param function: 参数为预测分析表的函数，为 None 时统计构造本身的耗时
+    :param times: 次数
+    :param repeat: 重复次数
+    :return: 平均每次的耗时
+    """
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        if function is None:
+            start = time.perf_counter()
+            for _ in range(times):
+                PredictingAnalysisTable()
+        else:
+            tables = [PredictingAnalysisTable() for _ in range(times)]
+            gc.collect()
+            start = time.perf_counter()
+            for table in tables:
+                function(table)
+        elapsed = (time.perf_counter() - start) / times
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def dump_table(table):
+    """
+    列出预测分析表的所有表项和同步符号集合，用来比较两张表
+    :param table: 预测分析表
+    :return: 列表
+    """
+    non_terminals = range(registry.non_terminal_start, registry.non_terminal_start + registry.non_terminal_count)
+    entries = list()
+    for x in non_terminals:
+        for y in range(0, registry.terminal_count):
+            record = table.get_record(x, y)
+            entries.append(record.index if record is not None else -1)
+    return entries, [table.get_sync_set(x) for x in non_terminals]
+
+
+def main():
+    times = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    with tempfile.TemporaryDirectory() as cache_dir:
+        construct_time = best_of(None, times)
+        compile_time = best_of(lambda table: table.compile(), times)
+
+        expected = PredictingAnalysisTable()
+        expected.compile()
+        PredictingAnalysisTable().load(cache_dir)
+        loaded = PredictingAnalysisTable()
+        loaded.load(cache_dir)
+        load_time = best_of(lambda table: table.load(cache_dir), times)
+
+    print('构造:\t\t', '%.3f ms' % (construct_time * 1000))
+    print('编译:\t\t', '%.3f ms' % (compile_time * 1000))
+    print('缓存载入:\t', '%.3f ms' % (load_time * 1000), '\t加速比 %.1f' % (compile_time / load_time),
+          '\t结果一致' if dump_table(loaded) == dump_table(expected) else '\t结果不一致')
+    print('构造 + 编译:\t', '%.3f ms' % ((construct_time + compile_time) * 1000),
+          '\t构造 + 缓存载入 %.3f ms' % ((construct_time + load_time) * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+语法分析基准测试: 预测分析表的三种存放方式(二维列表、一维数组、压缩表)的内存、查表耗时和序列化大小
+真实文法之外，再用随机生成的大文法(冲突的格子后填的覆盖先填的)模拟大表的稀疏程度
+用法: python -m benchmark.table_compress_benchmark [产生式数量...]
+"""
+from syntax.syntax import PredictingAnalysisTable
+from syntax.compress import CompressedTable
+from syntax.first_follow import get_bit_indexes, calculate_string_first
+from syntax.rule import productions
+from syntax import registry
+from benchmark.first_follow_benchmark import terminal_count, generate_grammar, calculate_bitset
+from array import array
+import pickle
+import sys
+import time
+
+
+def get_list_size(rows):
+    """
+    估算二维列表占用的内存(格子中的对象是共享的，不计算在内)
+    :param rows: 二维列表
+    :return: 字节数
+    """
+    return sys.getsizeof(rows) + sum(sys.getsizeof(row) for row in rows)
+
+
+def build_dense(grammar, symbol_count):
+    """
+    为随机文法生成一维数组存放的预测分析表
+    :param grammar: 产生式列表
+    :param symbol_count: 符号数量
+    :return: (表, 行数, 列数)
+    """
+    nullable, firsts, follows = calculate_bitset(symbol_count, grammar)
+    row_count = symbol_count - terminal_count
+    table = array('i', [-1]) * (row_count * terminal_count)
+    for index, (left, right) in enumerate(grammar):
+        bits, empty = calculate_string_first(right, terminal_count, nullable, firsts)
+        if empty:
+            bits |= follows[left]
+        for column in get_bit_indexes(bits):
+            table[(left - terminal_count) * terminal_count + column] = index
+    return table, row_count, terminal_count
+
+
+def measure(get, row_count, column_count, repeat):
+    """
+    对每一个格子查表
+    :param get: 查表函数
+    :param row_count: 行数
+    :param column_count: 列数
+    :param repeat: 重复次数
+    :return: 每次查表的耗时
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for row in range(row_count):
+            for column in range(column_count):
+                get(row, column)
+    return (time.perf_counter() - start) / (repeat * row_count * column_count)
+
+
+def report(name, table, row_count, column_count, repeat):
+    """
+    比较三种存放方式并输出
+    :param name: 名称
+    :param table: 一维数组存放的表
+    :param row_count: 行数
+    :param column_count: 列数
+    :param repeat: 查表的重复次数
+    """
+    rows = [table[row * column_count:(row + 1) * column_count].tolist() for row in range(row_count)]
+    compressed = CompressedTable.compress(table, row_count, column_count)
+    for row in range(row_count):
+        for column in range(column_count):
+            assert compressed.get(row, column) == rows[row][column], '压缩表的查表结果不同'
+
+    filled = sum(1 for value in table if value >= 0)
+    print(name, '\t%d x %d, 非空 %.1f%%, 叠放之后 %d 格' % (row_count, column_count, filled * 100 / len(table),
+                                                      len(compressed.values)))
+    layouts = (
+        ('二维列表', get_list_size(rows), lambda r, c: rows[r][c], rows),
+        ('一维数组', sys.getsizeof(table), lambda r, c: table[r * column_count + c], table.tobytes()),
+        ('压缩表', compressed.get_size(), compressed.get, compressed)
+    )
+    for label, size, get, data in layouts:
+        latency = measure(get, row_count, column_count, repeat)
+        print('  ' + label + ':\t', '%8.1f KB' % (size / 1024), '\t%4.0f ns/次' % (latency * 1e9),
+              '\t序列化 %8.1f KB' % (len(pickle.dumps(data, pickle.HIGHEST_PROTOCOL)) / 1024))
+
+
+def main():
+    sizes = [int(i) for i in sys.argv[1:]] or [1000, 10000]
+
+    table = PredictingAnalysisTable()
+    table.compile()
+    indexes = dict((id(production), i) for i, production in enumerate(productions))
+    dense = array('i', [-1]) * (registry.non_terminal_count * registry.terminal_count)
+    for row in range(registry.non_terminal_count):
+        for column in range(registry.terminal_count):
+            production = table.get_production(registry.signs[registry.non_terminal_start + row], registry.signs[column])
+            dense[row * registry.terminal_count + column] = indexes[id(production)] if production else -1
+    report('真实文法', dense, registry.non_terminal_count, registry.terminal_count, 200)
+
+    compressed = PredictingAnalysisTable(compressed=True)
+    compressed.compile()
+    for label, pa_table in (('一维数组', table), ('压缩表', compressed)):
+        get_record = pa_table.get_record
+        latency = measure(lambda r, c: get_record(r + registry.non_terminal_start, c),
+                          registry.non_terminal_count, registry.terminal_count, 200)
+        print('  get_record(' + label + '):\t', '%8.1f KB' % (pa_table.get_table_size() / 1024),
+              '\t%4.0f ns/次' % (latency * 1e9))
+
+    for size in sizes:
+        symbol_count, grammar = generate_grammar(size)
+        report('随机文法 %d' % size, *build_dense(grammar, symbol_count), 2)
+
+
+if __name__ == '__main__':
+    main()
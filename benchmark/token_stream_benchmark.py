@@ -0,0 +1,36 @@
+"""
+Token 流基准测试: 每个 token 一个对象 vs 按列存放的 TokenStream 的内存占用
+用法: python -m benchmark.token_stream_benchmark [字符数]
+"""
+from lexical.lexical import Lexical
+from benchmark.corpus import generate_source
+import sys
+import tracemalloc
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1024 * 1024
+    lexical = Lexical()
+    lexical.load_source(generate_source(size))
+
+    # TokenStream: 只统计词法分析过程中新分配的内存(源代码本身不算)
+    tracemalloc.start()
+    lexical.execute()
+    stream = lexical.get_result()
+    stream_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # 每个 token 一个 Token 对象(包括切出来的内容字符串)
+    tracemalloc.start()
+    tokens = list(stream)
+    list_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    count = len(tokens)
+    print('token 数量:\t', count)
+    print('Token 列表:\t', '%.1f MB' % (list_bytes / 1024 / 1024), '\t%.1f 字节/token' % (list_bytes / count))
+    print('TokenStream:\t', '%.1f MB' % (stream_bytes / 1024 / 1024), '\t%.1f 字节/token' % (stream_bytes / count))
+
+
+if __name__ == '__main__':
+    main()
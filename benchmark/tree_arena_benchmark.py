@@ -0,0 +1,94 @@
+"""
+语法树基准测试: Node 组成的语法树 vs 数组表示的语法树(arena)
+比较语法树结构占用的内存、建立语法树的耗时和先序遍历的耗时
+用法: python -m benchmark.tree_arena_benchmark [字符数]
+"""
+from lexical.lexical import Lexical
+from syntax.syntax import Syntax, prewarm_shared_table
+from syntax.arena import TreeArena, build
+from benchmark.corpus import generate_source
+from benchmark.node_memory_benchmark import measure_nodes
+import gc
+import sys
+import time
+
+
+def best_of(function, repeat=3):
+    """
+    执行多次，取最快的一次
+    :param function: 无参数的函数
+    :param repeat: 重复次数
+    :return: (最后一次的结果, 耗时)
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def traverse_nodes(tree):
+    """
+    先序遍历 Node 组成的语法树
+    :param tree: 语法树
+    :return: 节点数
+    """
+    count = 0
+    stack = [tree.root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(reversed(node.children))
+    return count
+
+
+def traverse_arena(arena):
+    """
+    先序遍历数组表示的语法树
+    :param arena: 数组表示的语法树
+    :return: 节点数
+    """
+    count = 0
+    for _ in arena.iter_preorder():
+        count += 1
+    return count
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 64 * 1024
+    prewarm_shared_table()
+    lexical = Lexical()
+    lexical.load_source(generate_source(size))
+    lexical.execute()
+    tokens = lexical.get_result()
+
+    def parse():
+        syntax = Syntax()
+        syntax.put_source(tokens, lexical.get_source())
+        syntax.execute()
+        return syntax.get_result()
+
+    tree, parse_time = best_of(parse)
+    (arena, _), build_time = best_of(lambda: build(tokens, lexical.get_source()))
+    converted, convert_time = best_of(lambda: TreeArena.from_tree(tree))
+    nodes, node_size = measure_nodes(tree)
+
+    print('语法树:\t', nodes, '个节点')
+    print('Node 语法树:\t 节点结构 %.1f KB' % (node_size / 1024), '\t%.1f 字节/节点' % (node_size / nodes),
+          '\t语法分析(含语义规则) %.3f s' % parse_time)
+    print('arena(只有语法):\t %.1f KB' % (arena.get_size() / 1024), '\t%.1f 字节/节点' % (arena.get_size() / len(arena)),
+          '\t语法分析 %.3f s' % build_time)
+    print('arena(含语义属性):\t %.1f KB' % (converted.get_size() / 1024),
+          '\t%.1f 字节/节点' % (converted.get_size() / len(converted)), '\t从 Node 语法树转换 %.3f s' % convert_time)
+    _, node_traverse_time = best_of(lambda: traverse_nodes(tree))
+    _, arena_traverse_time = best_of(lambda: traverse_arena(arena))
+    print('先序遍历:\t Node %.3f s' % node_traverse_time, '\tarena %.3f s' % arena_traverse_time)
+
+
+if __name__ == '__main__':
+    main()
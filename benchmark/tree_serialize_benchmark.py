@@ -0,0 +1,78 @@
+"""
+语法树序列化基准测试: pickle vs 按列编码的二进制格式(Tree.to_bytes)
+比较大小、序列化和载入的耗时，并检查两种方式载入的语法树与原来的完全相同
+用法: python -m benchmark.tree_serialize_benchmark [字符数]
+"""
+from lexical.lexical import Lexical
+from syntax.syntax import Syntax, Tree, prewarm_shared_table
+from benchmark.corpus import generate_source
+import gc
+import pickle
+import sys
+import time
+
+
+def best_of(function, repeat=3):
+    """
+    执行多次，取最快的一次
+    :param function: 无参数的函数
+    :param repeat: 重复次数
+    :return: (最后一次的结果, 耗时)
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def dump_tree(tree):
+    """
+    按先序列出所有节点的符号、内容、在父节点中的下标和语义属性，用来比较两棵语法树
+    :param tree: 语法树
+    :return: 列表
+    """
+    rows = list()
+    stack = [tree.root]
+    while stack:
+        node = stack.pop()
+        rows.append((node.data.id, node.lexical, node.index, node.get_attributes()))
+        stack.extend(reversed(node.children))
+    return rows
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 64 * 1024
+    prewarm_shared_table()
+    lexical = Lexical()
+    lexical.load_source(generate_source(size))
+    lexical.execute()
+    syntax = Syntax()
+    syntax.put_source(lexical.get_result(), lexical.get_source())
+    syntax.execute()
+    tree = syntax.get_result()
+    expected = dump_tree(tree)
+
+    # 语法树的链表很深，pickle 按递归处理对象，默认的递归深度不够
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 100000))
+    data, pickle_dump_time = best_of(lambda: pickle.dumps(tree, pickle.HIGHEST_PROTOCOL))
+    loaded, pickle_load_time = best_of(lambda: pickle.loads(data))
+    pickle_same = dump_tree(loaded) == expected
+    print('pickle:\t %.1f KB' % (len(data) / 1024), '\t序列化 %.3f s' % pickle_dump_time,
+          '\t载入 %.3f s' % pickle_load_time, '\t一致' if pickle_same else '\t不一致')
+
+    data, dump_time = best_of(tree.to_bytes)
+    loaded, load_time = best_of(lambda: Tree.from_bytes(data))
+    same = dump_tree(loaded) == expected
+    print('二进制格式:\t %.1f KB' % (len(data) / 1024), '\t序列化 %.3f s' % dump_time,
+          '\t载入 %.3f s' % load_time, '\t一致' if same else '\t不一致')
+    print('载入加速比:\t %.1f' % (pickle_load_time / load_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -15,18 +15,76 @@ class Error:
         self.info = error_info
 
 
-class LexicalError(Error):
+class SourceError(Error):
     """
-    词法错误
+    带有源代码位置的错误
     """
-    def __init__(self, error_info, error_line):
+    def __init__(self, error_info, error_line, error_column=-1):
         """
         构造
         :param error_info: 错误信息
         :param error_line: 错误行数
+        :param error_column: 错误列数(未知时为 -1)
         """
         super().__init__(error_info)
         self.line = error_line
+        self.column = error_column
+
+    @classmethod
+    def at(cls, error_info, source_file, offset, first_line=1):
+        """
+        根据源文件中的偏移量构造错误
+        :param error_info: 错误信息
+        :param source_file: 源文件
+        :param offset: 偏移量
+        :param first_line: 源文件第一行对应的行数
+        :return: 错误
+        """
+        line, column = source_file.get_position(offset)
+        return cls(error_info, line + first_line - 1, column)
+
+    def format(self, source_file=None):
+        """
+        格式化错误信息，给出源文件时附带出错的那一行
+        :param source_file: 源文件
+        :return: 错误信息
+        """
+        result = self.info + ' 第 ' + str(self.line) + ' 行'
+        if self.column > 0:
+            result += ' 第 ' + str(self.column) + ' 列'
+        if source_file is not None:
+            text = source_file.get_line(self.line)
+            if text:
+                result += '\n' + text
+                if self.column > 0:
+                    result += '\n' + ''.join(c if c == '\t' else ' ' for c in text[:self.column - 1]) + '^'
+        return result
+
+
+class LexicalError(SourceError):
+    """
+    词法错误
+    """
+    def __init__(self, error_info, error_line, error_column=-1):
+        """
+        构造
+        :param error_info: 错误信息
+        :param error_line: 错误行数
+        :param error_column: 错误列数
+        """
+        super().__init__(error_info, error_line, error_column)
+
+
+class LexicalRuleError(Error):
+    """
+    词法分析规则错误
+    """
+    def __init__(self, error_info):
+        """
+        构造
+        :param error_info: 信息
+        """
+        super().__init__(error_info)
 
 
 class SyntaxRuleError(Error):
@@ -41,18 +99,18 @@ class SyntaxRuleError(Error):
         super().__init__(error_info)
 
 
-class SyntaxError(Error):
+class SyntaxError(SourceError):
     """
     语法错误
     """
-    def __init__(self, error_info, error_line):
+    def __init__(self, error_info, error_line, error_column=-1):
         """
         构造
         :param error_info: 错误信息
         :param line: 错误行数
+        :param error_column: 错误列数
         """
-        super().__init__(error_info)
-        self.line = error_line
+        super().__init__(error_info, error_line, error_column)
 
 
 class SemanticError(Error):
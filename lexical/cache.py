@@ -0,0 +1,212 @@
+"""
+Token 缓存
+以源代码、lexical/rule.py 和扫描引擎实现的哈希为键，把 token 流以紧凑的二进制格式保存到磁盘上，源代码不变时直接读取
+"""
+from lexical import rule as lexical_rule
+from lexical import scanner as lexical_scanner
+from lexical import dfa as lexical_dfa
+from lexical.stream import TokenStream
+import hashlib
+import os
+import struct
+import sys
+
+
+# 缓存目录
+default_cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '__pycache__', 'tokens')
+
+# 缓存目录的默认大小上限(字节)
+default_max_size = 64 * 1024 * 1024
+
+# 文件头: 魔数、格式版本、token 数量、四列各自的元素大小，各列一律按小端序保存
+header = struct.Struct('<4sIQ4B')
+magic = b'CTOK'
+cache_version = 2
+
+# 每个扫描引擎的实现所在的模块，模块的内容变化时缓存失效
+engine_modules = {
+    'regex': (lexical_rule, lexical_scanner),
+    'dfa': (lexical_rule, lexical_scanner, lexical_dfa)
+}
+
+
+class TokenCache:
+    """
+    磁盘上的 token 缓存，目录总大小超过上限时按最近使用时间淘汰
+    """
+    # 扫描引擎名 -> 规则和实现的哈希(所有实例共享)
+    __engine_hashes = dict()
+
+    def __init__(self, cache_dir=default_cache_dir, max_size=default_max_size):
+        """
+        构造
+        :param cache_dir: 缓存目录
+        :param max_size: 缓存目录的大小上限(字节)
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+        # 命中和未命中次数
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_engine_hash(engine_name):
+        """
+        计算词法规则和扫描引擎实现的哈希
+        :param engine_name: 扫描引擎名
+        :return: 十六进制字符串
+        """
+        engine_hash = TokenCache.__engine_hashes.get(engine_name)
+        if engine_hash is None:
+            digest = hashlib.sha1()
+            for module in engine_modules[engine_name]:
+                with open(module.__file__, 'rb') as f:
+                    digest.update(hashlib.sha1(f.read()).digest())
+            engine_hash = digest.hexdigest()
+            TokenCache.__engine_hashes[engine_name] = engine_hash
+        return engine_hash
+
+    def get_path(self, source_file, engine_name):
+        """
+        获取缓存文件的路径
+        :param source_file: 源文件
+        :param engine_name: 扫描引擎名
+        :return: 路径
+        """
+        text = source_file.text
+        # str 的偏移量按字符计算，bytes 的按字节计算，两者分开缓存
+        if isinstance(text, str):
+            digest = hashlib.sha1(b'str:' + text.encode('utf-8', 'surrogatepass'))
+        else:
+            digest = hashlib.sha1(b'bytes:')
+            digest.update(text)
+        digest.update(('\0' + engine_name + '\0' + TokenCache.get_engine_hash(engine_name)).encode())
+        return os.path.join(self.cache_dir, digest.hexdigest() + '.tokens')
+
+    def get(self, source_file, engine_name):
+        """
+        读取缓存
+        :param source_file: 源文件
+        :param engine_name: 扫描引擎名
+        :return: token 流，未命中时返回 None
+        """
+        path = self.get_path(source_file, engine_name)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            tokens = self.__decode(data, source_file)
+        except (OSError, ValueError, struct.error):
+            tokens = None
+        if tokens is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # 更新修改时间，淘汰时按它判断最近使用的顺序
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return tokens
+
+    def put(self, source_file, engine_name, tokens):
+        """
+        写入缓存，然后把目录大小控制在上限以内
+        :param source_file: 源文件
+        :param engine_name: 扫描引擎名
+        :param tokens: token 流
+        """
+        path = self.get_path(source_file, engine_name)
+        data = self.__encode(tokens)
+        if len(data) > self.max_size:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp = path + '.' + str(os.getpid())
+            with open(temp, 'wb') as f:
+                f.write(data)
+            os.replace(temp, path)
+        except OSError:
+            return
+        self.evict()
+
+    def evict(self, max_size=None):
+        """
+        按最近使用时间从旧到新删除缓存文件，直到目录大小不超过上限
+        :param max_size: 大小上限，None 表示使用构造时给出的上限
+        """
+        if max_size is None:
+            max_size = self.max_size
+        entries = list()
+        total = 0
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith('.tokens'):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, entry.path, stat.st_size))
+                        total += stat.st_size
+        except OSError:
+            return
+        entries.sort()
+        for _, path, size in entries:
+            if total <= max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        """
+        清空缓存目录并把计数器归零
+        """
+        self.evict(0)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def __encode(tokens):
+        """
+        编码: 文件头之后依次是类型编号、开始偏移量、结束偏移量、行数四列
+        :param tokens: token 流
+        :return: bytes
+        """
+        # 增量更新过的 token 流先平移到位
+        tokens.flush()
+        columns = (tokens.kinds, tokens.starts, tokens.ends, tokens.lines)
+        parts = [header.pack(magic, cache_version, len(tokens), *(column.itemsize for column in columns))]
+        for column in columns:
+            if sys.byteorder == 'big':
+                column = column[:]
+                column.byteswap()
+            parts.append(column.tobytes())
+        return b''.join(parts)
+
+    @staticmethod
+    def __decode(data, source_file):
+        """
+        解码
+        :param data: bytes
+        :param source_file: 源文件
+        :return: token 流，格式不对或者元素大小与本机不同时返回 None
+        """
+        file_magic, version, count, *itemsizes = header.unpack_from(data)
+        if file_magic != magic or version != cache_version:
+            return None
+        tokens = TokenStream(source_file, 0)
+        columns = (tokens.kinds, tokens.starts, tokens.ends, tokens.lines)
+        if itemsizes != [column.itemsize for column in columns]:
+            return None
+        view = memoryview(data)
+        pos = header.size
+        for column in columns:
+            size = count * column.itemsize
+            if pos + size > len(data):
+                return None
+            column.frombytes(view[pos:pos + size])
+            if sys.byteorder == 'big':
+                column.byteswap()
+            pos += size
+        return tokens
@@ -0,0 +1,680 @@
+"""
+表驱动的 DFA 词法分析器生成
+regex_dict -> Thompson NFA -> 子集构造 -> Hopcroft 最小化 -> 按字符类索引的扁平转移表
+"""
+from lexical.rule import *
+from lexical import rule as lexical_rule
+from lexical.scanner import kind_skip, kind_note_start, kind_note_end
+from lexical.stream import TokenStream
+from error import LexicalError, LexicalRuleError
+from array import array
+from bisect import bisect_right
+import hashlib
+import os
+import pickle
+
+
+# 缓存目录
+default_cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '__pycache__')
+
+# 字符编码上界
+max_char = 0x110000
+
+# 生成结果的格式版本，改变 DFA 的结构时递增，使旧缓存失效
+cache_version = 2
+
+
+class RegexParser:
+    """
+    正则表达式解析器，支持 | * + ? () [] [^] . 以及反斜杠转义
+    语法树节点: ('set', 区间列表) ('cat', a, b) ('alt', a, b) ('star', a) ('plus', a) ('opt', a) ('empty',)
+    """
+    def __init__(self, regex):
+        """
+        构造
+        :param regex: 正则表达式
+        """
+        self.__regex = regex
+        self.__pos = 0
+        self.__error = None
+
+    def parse(self):
+        """
+        解析
+        :return: 语法树，失败返回 None
+        """
+        tree = self.__parse_alternation()
+        if self.__error is None and self.__pos < len(self.__regex):
+            self.__error = LexicalRuleError('正则表达式括号不匹配 ' + self.__regex)
+        if self.__error:
+            return None
+        return tree
+
+    def get_error(self):
+        """
+        获取错误
+        :return: 错误
+        """
+        return self.__error
+
+    def __peek(self):
+        """
+        查看当前字符
+        :return: 当前字符，到末尾返回 ''
+        """
+        if self.__pos < len(self.__regex):
+            return self.__regex[self.__pos]
+        return ''
+
+    def __parse_alternation(self):
+        """
+        alternation -> sequence ('|' sequence)*
+        """
+        tree = self.__parse_sequence()
+        while self.__error is None and self.__peek() == '|':
+            self.__pos += 1
+            tree = ('alt', tree, self.__parse_sequence())
+        return tree
+
+    def __parse_sequence(self):
+        """
+        sequence -> repeat*
+        """
+        tree = ('empty',)
+        while self.__error is None and self.__peek() not in ('', '|', ')'):
+            item = self.__parse_repeat()
+            tree = item if tree[0] == 'empty' else ('cat', tree, item)
+        return tree
+
+    def __parse_repeat(self):
+        """
+        repeat -> atom ('*' | '+' | '?')*
+        """
+        tree = self.__parse_atom()
+        while self.__peek() in ('*', '+', '?'):
+            op = self.__peek()
+            self.__pos += 1
+            tree = ({'*': 'star', '+': 'plus', '?': 'opt'}[op], tree)
+        return tree
+
+    def __parse_atom(self):
+        """
+        atom -> '(' alternation ')' | '[' class ']' | '.' | escape | char
+        """
+        c = self.__peek()
+        self.__pos += 1
+        if c == '(':
+            if self.__regex.startswith('?:', self.__pos):
+                self.__pos += 2
+            tree = self.__parse_alternation()
+            if self.__peek() != ')':
+                self.__error = LexicalRuleError('正则表达式括号不匹配 ' + self.__regex)
+                return ('empty',)
+            self.__pos += 1
+            return tree
+        if c == '[':
+            return ('set', self.__parse_class())
+        if c == '.':
+            return ('set', [(0, ord('\n') - 1), (ord('\n') + 1, max_char - 1)])
+        if c == '\\':
+            return ('set', self.__parse_escape())
+        if c in ('*', '+', '?', '{', '}', '^', '$'):
+            self.__error = LexicalRuleError('不支持的正则表达式语法 ' + self.__regex)
+            return ('empty',)
+        return ('set', [(ord(c), ord(c))])
+
+    def __parse_escape(self):
+        """
+        解析反斜杠之后的转义字符
+        :return: 区间列表
+        """
+        c = self.__peek()
+        self.__pos += 1
+        if c == 'd':
+            return [(ord('0'), ord('9'))]
+        if c == 'w':
+            return [(ord('0'), ord('9')), (ord('A'), ord('Z')), (ord('_'), ord('_')), (ord('a'), ord('z'))]
+        if c == 's':
+            return [(ord('\t'), ord('\r')), (ord(' '), ord(' '))]
+        if c in ('n', 't', 'r'):
+            c = {'n': '\n', 't': '\t', 'r': '\r'}[c]
+        if c == '':
+            self.__error = LexicalRuleError('正则表达式以反斜杠结尾 ' + self.__regex)
+            return []
+        return [(ord(c), ord(c))]
+
+    def __parse_class(self):
+        """
+        解析 [] 字符类
+        :return: 区间列表
+        """
+        negate = False
+        if self.__peek() == '^':
+            negate = True
+            self.__pos += 1
+        intervals = list()
+        first = True
+        while True:
+            c = self.__peek()
+            if c == '':
+                self.__error = LexicalRuleError('正则表达式字符类没有闭合 ' + self.__regex)
+                return []
+            if c == ']' and not first:
+                self.__pos += 1
+                break
+            first = False
+            self.__pos += 1
+            if c == '\\':
+                items = self.__parse_escape()
+                if len(items) != 1 or items[0][0] != items[0][1]:
+                    intervals += items
+                    continue
+                low = items[0][0]
+            else:
+                low = ord(c)
+            # 范围
+            if self.__peek() == '-' and self.__regex[self.__pos + 1:self.__pos + 2] not in ('', ']'):
+                self.__pos += 1
+                c = self.__peek()
+                self.__pos += 1
+                high = self.__parse_escape()[0][0] if c == '\\' else ord(c)
+                intervals.append((low, high))
+            else:
+                intervals.append((low, low))
+        if negate:
+            result = list()
+            start = 0
+            for low, high in sorted(intervals):
+                if low > start:
+                    result.append((start, low - 1))
+                start = max(start, high + 1)
+            if start < max_char:
+                result.append((start, max_char - 1))
+            intervals = result
+        return intervals
+
+
+class LexicalDFA:
+    """
+    由词法规则生成的最小化 DFA
+    """
+    def __init__(self):
+        """
+        构造
+        """
+        # 错误
+        self.__error = None
+
+        # 参与匹配的 type 名，下标即优先级(越小越优先)
+        self.types = list()
+        # 字符区间的分界点，以及每个区间对应的字符类
+        self.boundaries = list()
+        self.segment_classes = list()
+        # ASCII 字符直接查表得到字符类
+        self.ascii_classes = list()
+        # 字符类数量
+        self.class_count = 0
+        # 扁平转移表: table[state * class_count + char_class] = 下一个状态，-1 表示无转移
+        self.table = array('i')
+        # 每个状态接受的 token 类型下标，-1 表示非接受状态
+        self.accept = array('i')
+
+    def get_error(self):
+        """
+        获取错误
+        :return: 错误
+        """
+        return self.__error
+
+    @classmethod
+    def get_rule_hash(cls):
+        """
+        计算 lexical/rule.py 的哈希
+        :return: 十六进制哈希串
+        """
+        with open(lexical_rule.__file__, 'rb') as f:
+            return hashlib.sha1(str(cache_version).encode() + f.read()).hexdigest()
+
+    def load(self, cache_dir=default_cache_dir):
+        """
+        载入 DFA，优先读取磁盘缓存，缓存不存在或已过期时重新生成并写回
+        :param cache_dir: 缓存目录，为 None 时不使用缓存
+        :return: 是否成功
+        """
+        path = None
+        if cache_dir is not None:
+            path = os.path.join(cache_dir, 'lexical-dfa-' + self.get_rule_hash() + '.pickle')
+            try:
+                with open(path, 'rb') as f:
+                    self.__dict__.update(pickle.load(f))
+                return True
+            except (OSError, pickle.UnpicklingError, EOFError):
+                pass
+
+        if not self.compile():
+            return False
+
+        if path is not None:
+            data = dict()
+            for k in ('types', 'boundaries', 'segment_classes', 'ascii_classes', 'class_count', 'table', 'accept'):
+                data[k] = getattr(self, k)
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                temp = path + '.' + str(os.getpid())
+                with open(temp, 'wb') as f:
+                    pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+                os.replace(temp, path)
+            except OSError:
+                pass
+        return True
+
+    def compile(self):
+        """
+        从 regex_dict 生成 DFA，注释符号的优先级最高
+        :return: 是否成功
+        """
+        self.types = list()
+        for i in note_char_type:
+            self.types.append(i)
+        for i in split_char_type:
+            self.types.append(i)
+        for i in token_type:
+            self.types.append(i)
+
+        # 解析所有正则表达式
+        trees = list()
+        for t in self.types:
+            parser = RegexParser(regex_dict[t])
+            tree = parser.parse()
+            if tree is None:
+                self.__error = parser.get_error()
+                return False
+            trees.append(tree)
+
+        # 划分字符类
+        sets = list()
+        for tree in trees:
+            self.__collect_sets(tree, sets)
+        set_classes = self.__split_classes(sets)
+
+        # Thompson 构造 NFA
+        nfa_epsilon = list()
+        nfa_moves = list()
+        nfa_accept = dict()
+        nfa_start = self.__new_state(nfa_epsilon, nfa_moves)
+        counter = [0]
+        for priority in range(0, len(trees)):
+            start, end = self.__build_nfa(trees[priority], nfa_epsilon, nfa_moves, set_classes, counter)
+            nfa_epsilon[nfa_start].append(start)
+            nfa_accept[end] = priority
+
+        # 子集构造
+        dfa_moves, dfa_accept = self.__subset_construction(nfa_start, nfa_epsilon, nfa_moves, nfa_accept)
+
+        # Hopcroft 最小化
+        self.__minimize(dfa_moves, dfa_accept)
+        return True
+
+    @classmethod
+    def __collect_sets(cls, tree, sets):
+        """
+        收集语法树中所有的字符集合
+        :param tree: 语法树
+        :param sets: 结果
+        """
+        if tree[0] == 'set':
+            sets.append(tree[1])
+        else:
+            for child in tree[1:]:
+                cls.__collect_sets(child, sets)
+
+    def __split_classes(self, sets):
+        """
+        将字符空间划分成互不相交的字符类，同一字符类中的字符在所有字符集合中的归属都相同
+        :param sets: 所有的字符集合
+        :return: 每个字符集合对应的字符类集合
+        """
+        points = {0, max_char}
+        for intervals in sets:
+            for low, high in intervals:
+                points.add(low)
+                points.add(high + 1)
+        self.boundaries = sorted(points)[:-1]
+
+        # 每个区间属于哪些字符集合
+        signatures = [list() for _ in self.boundaries]
+        for i in range(0, len(sets)):
+            for low, high in sets[i]:
+                k = bisect_right(self.boundaries, low) - 1
+                while k < len(self.boundaries) and self.boundaries[k] <= high:
+                    signatures[k].append(i)
+                    k += 1
+
+        # 归属相同的区间合并为同一个字符类
+        class_ids = dict()
+        self.segment_classes = list()
+        for signature in signatures:
+            key = tuple(signature)
+            if key not in class_ids:
+                class_ids[key] = len(class_ids)
+            self.segment_classes.append(class_ids[key])
+        self.class_count = len(class_ids)
+        self.ascii_classes = [self.segment_classes[bisect_right(self.boundaries, c) - 1] for c in range(0, 128)]
+
+        set_classes = [set() for _ in sets]
+        for signature, class_id in class_ids.items():
+            for i in signature:
+                set_classes[i].add(class_id)
+        return set_classes
+
+    @classmethod
+    def __new_state(cls, nfa_epsilon, nfa_moves):
+        """
+        新建 NFA 状态
+        :return: 状态编号
+        """
+        nfa_epsilon.append(list())
+        nfa_moves.append(list())
+        return len(nfa_epsilon) - 1
+
+    def __build_nfa(self, tree, nfa_epsilon, nfa_moves, set_classes, counter):
+        """
+        Thompson 构造
+        :param tree: 语法树
+        :param counter: 当前是第几个字符集合
+        :return: (开始状态, 结束状态)
+        """
+        start = self.__new_state(nfa_epsilon, nfa_moves)
+        end = self.__new_state(nfa_epsilon, nfa_moves)
+        kind = tree[0]
+        if kind == 'empty':
+            nfa_epsilon[start].append(end)
+        elif kind == 'set':
+            nfa_moves[start].append((set_classes[counter[0]], end))
+            counter[0] += 1
+        elif kind == 'cat':
+            s1, e1 = self.__build_nfa(tree[1], nfa_epsilon, nfa_moves, set_classes, counter)
+            s2, e2 = self.__build_nfa(tree[2], nfa_epsilon, nfa_moves, set_classes, counter)
+            nfa_epsilon[start].append(s1)
+            nfa_epsilon[e1].append(s2)
+            nfa_epsilon[e2].append(end)
+        elif kind == 'alt':
+            for child in tree[1:]:
+                s, e = self.__build_nfa(child, nfa_epsilon, nfa_moves, set_classes, counter)
+                nfa_epsilon[start].append(s)
+                nfa_epsilon[e].append(end)
+        else:
+            s, e = self.__build_nfa(tree[1], nfa_epsilon, nfa_moves, set_classes, counter)
+            nfa_epsilon[start].append(s)
+            nfa_epsilon[e].append(end)
+            if kind in ('star', 'opt'):
+                nfa_epsilon[start].append(end)
+            if kind in ('star', 'plus'):
+                nfa_epsilon[e].append(s)
+        return start, end
+
+    @classmethod
+    def __closure(cls, states, nfa_epsilon):
+        """
+        求 epsilon 闭包
+        :param states: 状态集合
+        :return: 闭包
+        """
+        result = set(states)
+        stack = list(states)
+        while stack:
+            for s in nfa_epsilon[stack.pop()]:
+                if s not in result:
+                    result.add(s)
+                    stack.append(s)
+        return frozenset(result)
+
+    def __subset_construction(self, nfa_start, nfa_epsilon, nfa_moves, nfa_accept):
+        """
+        子集构造
+        :return: (DFA 转移列表, DFA 接受类型列表)
+        """
+        start = self.__closure([nfa_start], nfa_epsilon)
+        ids = {start: 0}
+        queue = [start]
+        dfa_moves = list()
+        dfa_accept = list()
+        while len(dfa_moves) < len(queue):
+            current = queue[len(dfa_moves)]
+            # 优先级最高(下标最小)的接受类型
+            label = -1
+            for s in current:
+                if s in nfa_accept and (label < 0 or nfa_accept[s] < label):
+                    label = nfa_accept[s]
+            dfa_accept.append(label)
+
+            targets = dict()
+            for s in current:
+                for classes, target in nfa_moves[s]:
+                    for c in classes:
+                        targets.setdefault(c, set()).add(target)
+            moves = dict()
+            for c, states in targets.items():
+                closure = self.__closure(states, nfa_epsilon)
+                if closure not in ids:
+                    ids[closure] = len(queue)
+                    queue.append(closure)
+                moves[c] = ids[closure]
+            dfa_moves.append(moves)
+        return dfa_moves, dfa_accept
+
+    def __minimize(self, dfa_moves, dfa_accept):
+        """
+        Hopcroft 最小化，并生成扁平转移表
+        """
+        # 补上一个死状态使 DFA 完全
+        dead = len(dfa_moves)
+        count = dead + 1
+        delta = [[dead] * self.class_count for _ in range(0, count)]
+        for s in range(0, dead):
+            for c, t in dfa_moves[s].items():
+                delta[s][c] = t
+        labels = dfa_accept + [-1]
+
+        # 逆转移
+        inverse = [[list() for _ in range(0, self.class_count)] for _ in range(0, count)]
+        for s in range(0, count):
+            for c in range(0, self.class_count):
+                inverse[delta[s][c]][c].append(s)
+
+        # 初始划分: 按接受类型分组
+        groups = dict()
+        for s in range(0, count):
+            groups.setdefault(labels[s], set()).add(s)
+        blocks = list(groups.values())
+        block_of = [0] * count
+        for i in range(0, len(blocks)):
+            for s in blocks[i]:
+                block_of[s] = i
+        waiting = set(range(0, len(blocks)))
+
+        while waiting:
+            splitter = set(blocks[waiting.pop()])
+            for c in range(0, self.class_count):
+                predecessors = set()
+                for s in splitter:
+                    predecessors.update(inverse[s][c])
+                touched = dict()
+                for s in predecessors:
+                    touched.setdefault(block_of[s], set()).add(s)
+                for b, inside in touched.items():
+                    if len(inside) == len(blocks[b]):
+                        continue
+                    outside = blocks[b] - inside
+                    blocks[b] = inside
+                    blocks.append(outside)
+                    new = len(blocks) - 1
+                    for s in outside:
+                        block_of[s] = new
+                    if b in waiting or len(outside) <= len(inside):
+                        waiting.add(new)
+                    else:
+                        waiting.add(b)
+
+        # 重新编号: 开始状态为 0，死状态所在的块去掉
+        dead_block = block_of[dead]
+        numbers = {block_of[0]: 0}
+        order = [block_of[0]]
+        for s in range(0, count):
+            b = block_of[s]
+            if b != dead_block and b not in numbers:
+                numbers[b] = len(order)
+                order.append(b)
+
+        self.table = array('i', [-1]) * (len(order) * self.class_count)
+        self.accept = array('i', [-1]) * len(order)
+        for b in order:
+            s = next(iter(blocks[b]))
+            self.accept[numbers[b]] = labels[s]
+            for c in range(0, self.class_count):
+                t = block_of[delta[s][c]]
+                if t != dead_block:
+                    self.table[numbers[b] * self.class_count + c] = numbers[t]
+
+
+class DFAScanner:
+    """
+    表驱动扫描器，接口与 Scanner 相同，结果也与 Scanner 完全相同
+    与总正则的分支顺序一致: 取能匹配的规则中在 rule.py 里排在最前面的一条，再取这条规则的最长匹配
+    因此 >= 是 > 和 =，intx 是 int 和 x，而不是整体最长的匹配
+    """
+    # 生成好的 DFA(所有实例共享)
+    __dfa = None
+
+    def __init__(self):
+        """
+        构造
+        """
+        # 错误
+        self.__error = None
+        # 结果
+        self.__tokens = TokenStream()
+
+        if DFAScanner.__dfa is None:
+            dfa = LexicalDFA()
+            if dfa.load():
+                DFAScanner.__dfa = dfa
+            else:
+                self.__error = dfa.get_error()
+
+    def scan(self, source_file, line=1, offset=0):
+        """
+        扫描源代码
+        :param source_file: 源文件
+        :param line: 起始行数
+        :param offset: 源文件第一个字符的偏移量
+        :return: 是否扫描成功
+        """
+        self.__tokens = TokenStream(source_file, offset)
+        dfa = DFAScanner.__dfa
+        if dfa is None:
+            return False
+        self.__error = None
+        source = source_file.text
+        first_line = line
+
+        table = dfa.table
+        accept = dfa.accept
+        class_count = dfa.class_count
+        ascii_classes = dfa.ascii_classes
+        boundaries = dfa.boundaries
+        segment_classes = dfa.segment_classes
+        kinds_append = self.__tokens.kinds.append
+        starts_append = self.__tokens.starts.append
+        ends_append = self.__tokens.ends.append
+        lines_append = self.__tokens.lines.append
+
+        # 接受类型 -> token 类型编号，负数表示不产生 token
+        label_kinds = list()
+        for t in dfa.types:
+            if t == note_char_type[0]:
+                label_kinds.append(kind_note_start)
+            elif t == note_char_type[1]:
+                label_kinds.append(kind_note_end)
+            elif t in split_char_type:
+                label_kinds.append(kind_skip)
+            else:
+                label_kinds.append(token_type.index(t))
+
+        # 字节模式(bytes 或 mmap)下取下标得到的就是字符编码，不需要 ord
+        is_text = isinstance(source, str)
+        note_end = regex_dict[note_char_type[1]].replace('\\', '')
+        if is_text:
+            char_newline, char_return, char_tab = '\n', '\r', '\t'
+        else:
+            note_end = note_end.encode('ascii')
+            char_newline, char_return, char_tab = ord('\n'), ord('\r'), ord('\t')
+
+        pos = 0
+        length = len(source)
+        while pos < length:
+            # 换行符不属于任何 token，只推进行号；制表符视为空白
+            c = source[pos]
+            if c == char_newline or c == char_return:
+                line += 1
+                pos += 1
+                continue
+            if c == char_tab:
+                pos += 1
+                continue
+            state = 0
+            label = -1
+            end = pos
+            i = pos
+            while i < length:
+                o = ord(source[i]) if is_text else source[i]
+                if o < 128:
+                    state = table[state * class_count + ascii_classes[o]]
+                else:
+                    state = table[state * class_count + segment_classes[bisect_right(boundaries, o) - 1]]
+                if state < 0:
+                    break
+                i += 1
+                # 每个状态的接受类型是它接受的优先级最高的规则，只接受优先级不低于已有结果的匹配
+                found = accept[state]
+                if found >= 0 and (found <= label or label < 0):
+                    label = found
+                    end = i
+            if label < 0:
+                self.__error = LexicalError.at('词法错误', source_file, pos, first_line)
+                return False
+            kind = label_kinds[label]
+            if kind >= 0:
+                kinds_append(kind)
+                starts_append(offset + pos)
+                ends_append(offset + end)
+                lines_append(line)
+            elif kind == kind_note_start:
+                # 跳过整段注释，只统计其中的行数
+                note = source.find(note_end, end)
+                if note < 0:
+                    self.__error = LexicalError.at('/* 没有相匹配的 */', source_file, pos, first_line)
+                    return False
+                # mmap 没有带范围的 count，先切出注释内容
+                body = source[end:note]
+                line += body.count(char_newline) + body.count(char_return)
+                end = note + len(note_end)
+            elif kind == kind_note_end:
+                self.__error = LexicalError.at('多余的 */', source_file, pos, first_line)
+                return False
+            pos = end
+        return True
+
+    def get_result(self):
+        """
+        获取结果
+        :return: token 流
+        """
+        return self.__tokens
+
+    def get_error(self):
+        """
+        获取错误
+        :return: 错误原因
+        """
+        return self.__error
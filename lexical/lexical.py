@@ -2,261 +2,325 @@
 词法分析器
 """
 from lexical.rule import *
+from lexical.stream import Token, TokenStream
+from lexical.scanner import Scanner
+from lexical.dfa import DFAScanner
+from lexical.parallel import parallel_scan, find_safe_point
+from source import SourceFile
 from error import LexicalError
-import re
+from bisect import bisect_left
+import mmap
+import os
 
 
-class Token:
-    """
-    Token
-    """
-    def __init__(self, token_type='', token_str='', token_line=-1):
-        """
-        构造
-        :param token_type: Token 的类型
-        :param token_str: Token 的内容
-        :param token_line: Token 所在行数
-        """
-        self.type = token_type
-        self.str = token_str
-        self.line = token_line
+# 可选的扫描引擎
+engines = {
+    'regex': Scanner,
+    'dfa': DFAScanner
+}
 
 
 class Lexical:
     """
     词法分析器
     """
-    def __init__(self):
+    def __init__(self, engine='regex', cache=None):
         """
         构造
+        :param engine: 扫描引擎，'regex'(总正则) 或 'dfa'(表驱动 DFA)，两者的结果完全相同
+        :param cache: token 缓存(TokenCache)，None 表示不使用缓存
         """
         # 错误
         self.__error = None
 
-        # 源代码
-        self.__source = ''
+        # 扫描引擎
+        self.__engine = engines[engine]
+        self.__engine_name = engine
+
+        # token 缓存
+        self.__cache = cache
 
-        # 分隔出来的每一行
-        self.__lines = list()
+        # 源文件
+        self.__source = SourceFile('')
 
         # 结果
-        self.__tokens = list()
+        self.__tokens = TokenStream()
+        # 结果是否与源文件一致(增量分析的前提)
+        self.__synced = True
 
     def load_source(self, source):
         """
         装载源代码
-        :param source: 源代码
+        :param source: 源代码(字符串或 SourceFile)
         """
-        self.__source = source
+        if isinstance(source, SourceFile):
+            self.__source = source
+        else:
+            self.__source = SourceFile(source)
+        self.__synced = False
 
-    def execute(self):
+    def load_file(self, path, use_mmap=True):
         """
-        执行词法分析
-        :return: 词法分析是否成功
+        以字节模式装载源文件，扫描器直接在 bytes 上匹配，只有 id、num 等 token 的内容才会被解码
+        :param path: 文件路径
+        :param use_mmap: 是否把文件映射到内存(否则一次读入 bytes)
         """
-        self.__replace_useless_chars()
-        if self.__del_notes():
-            self.__split_lines()
-            if self.__split_tokens():
-                self.__del_spaces()
-                return True
+        with open(path, 'rb') as file:
+            # 空文件不能映射
+            if use_mmap and os.fstat(file.fileno()).st_size > 0:
+                text = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
             else:
-                return False
-        else:
-            return False
+                text = file.read()
+        self.__source = SourceFile(text, path)
+        self.__synced = False
 
-    def get_result(self):
+    def get_source(self):
         """
-        获取结果
-        :return: token 列表
+        获取源文件
+        :return: 源文件
         """
-        return self.__tokens
+        return self.__source
 
-    def get_error(self):
+    def execute(self):
         """
-        获取错误
-        :return: 错误原因
+        执行词法分析
+        :return: 词法分析是否成功
         """
-        return self.__error
+        return self.__split_tokens()
 
-    def __replace_useless_chars(self):
+    def execute_parallel(self, workers=None, chunk_size=1024 * 1024):
         """
-        替换无用的字符
+        多进程执行词法分析，源代码在注释之外的行尾处切分，结果与 execute 完全相同
+        :param workers: 进程数，None 表示 CPU 核数
+        :param chunk_size: 每一块的大致字符数
+        :return: 词法分析是否成功
         """
-        # 将 \r 替换成 \n
-        self.__source = self.__source.replace('\r', '\n')
-        # 将 \t 替换成四个空格
-        self.__source = self.__source.replace('\t', '    ')
+        tokens, error = parallel_scan(self.__engine, self.__source, workers, chunk_size)
+        if error is not None:
+            self.__error = error
+            return False
+        self.__tokens = tokens
+        self.__synced = True
+        return True
 
-    def __del_notes(self):
+    def apply_edit(self, start, end, new_text, window=4096):
         """
-        删除注释
-        :return: 是否删除成功
+        修改源代码并增量更新 token 流
+        从编辑位置之前的 token 边界开始重新扫描，直到新的 token 与原来的 token 重新对齐为止，
+        之后的 token 只记下平移量(见 TokenStream.shift_index)，不逐个修改，每次修改的开销与文件大小无关
+        之前没有成功执行过词法分析时，重新扫描整个源文件
+        :param start: 被替换部分的开始偏移量
+        :param end: 被替换部分的结束偏移量
+        :param new_text: 新的内容(类型与源代码相同)
+        :param window: 第一次重新扫描的大致字符数，没有对齐时加倍
+        :return: 变化的 token 范围 (first, old_stop, new_stop)，即原来的 [first, old_stop) 被替换成了现在的 [first, new_stop)，出错时返回 None
         """
-        # 计数器，用来确认注释开始符和注释结束符的数量是否相等
-        note_count = 0
-        # 缓冲区
-        buffer = self.__source
-        # 结果
-        result = self.__source
+        self.__source = self.__source.replace(start, end, new_text)
+        text = self.__source.text
+        delta = len(new_text) - (end - start)
+        tokens = self.__tokens
+        count = len(tokens)
+        self.__error = None
 
-        # 判断是否匹配到了末尾
+        if not self.__synced:
+            if not self.__split_tokens():
+                return None
+            return 0, count, len(self.__tokens)
+
+        # 第一个结束位置不在编辑位置之前的 token，再多退一个，防止它的匹配依赖了编辑位置附近的字符
+        # 还没有平移的部分单独查找
+        index, shift = tokens.shift_index, tokens.shift_delta
+        if index > 0 and tokens.ends[index - 1] >= start:
+            first = bisect_left(tokens.ends, start, 0, index)
+        else:
+            first = bisect_left(tokens.ends, start - shift, index, count)
+        first = max(first - 1, 0)
+        # 之前的 token 都已经平移到位，从 first 开始的 token 还要加上 shift
+        tokens.move_shift(first)
+        pos = tokens.ends[first - 1] if first > 0 else 0
+        line = tokens.lines[first - 1] if first > 0 else 1
+        # 可能与新 token 对齐的原 token 从 old 开始(完全在被替换部分之后)
+        old = bisect_left(tokens.starts, end - shift, first, count)
+        # 原 token 在新源代码中的偏移量还要加上的量
+        shift += delta
+        fresh = TokenStream()
+
+        scanner = self.__engine()
+        newline, carriage_return = ('\n', '\r') if isinstance(text, str) else (b'\n', b'\r')
         while True:
-            # 尝试匹配 */
-            match = re.compile(regex_dict[note_char_type[0]]).search(buffer)
-            # 如果匹配到了
-            if match:
-                left_note_start = match.start()
-                # 开始匹配 */
-                match2 = re.compile(regex_dict[note_char_type[1]]).search(buffer)
-                # 如果匹配到了
-                if match2:
-                    right_note_end = match2.end()
-                    # 判断匹配到的区间中有几行
-                    line_count = result[left_note_start:right_note_end].count('\n')
-                    # 执行删除
-                    result = result.replace(result[left_note_start:right_note_end], '\n' * line_count)
-                    # 删除完毕之后进入下一次循环
-                    buffer = result
-                    continue
-                # 如果没有匹配到，说明两者数量不匹配，报错
-                else:
-                    # 判断错误所在的行数
-                    enter_location = list()
-                    enter_location.append(0)
-                    for i in range(0, len(result)):
-                        if result[i] == '\n':
-                            enter_location.append(i)
-                    find = False
+            stop = find_safe_point(text, pos, pos + window)
+            if stop < 0:
+                stop = len(text)
+            chunk = text[pos:stop]
+            if not scanner.scan(SourceFile(chunk), line, pos):
+                self.__synced = False
+                self.__error = scanner.get_error()
+                # 扫描从行中间开始，第一行的列数需要补上前面的部分
+                if isinstance(self.__error, LexicalError) and self.__error.line == line and self.__error.column > 0:
+                    self.__error.column += pos - max(text.rfind(newline, 0, pos), text.rfind(carriage_return, 0, pos)) - 1
+                return None
+            result = scanner.get_result()
+            for i in range(len(result)):
+                token_start = result.starts[i]
+                while old < count and tokens.starts[old] + shift < token_start:
+                    old += 1
+                if old < count and tokens.starts[old] + shift == token_start and \
+                        tokens.ends[old] + shift == result.ends[i] and tokens.kinds[old] == result.kinds[i]:
+                    # 重新对齐，之后的扫描结果与原来相同
+                    self.__replace_tokens(first, old, fresh, shift, result.lines[i] - tokens.lines[old])
+                    return first, old, first + len(fresh)
+                fresh.append(result.kinds[i], token_start, result.ends[i], result.lines[i])
+            line += chunk.count(newline) + chunk.count(carriage_return)
+            pos = stop
+            if pos >= len(text):
+                self.__replace_tokens(first, count, fresh, 0, 0)
+                return first, count, first + len(fresh)
+            window *= 2
 
-                    error_line = 0
-                    for i in range(0, len(enter_location) - 1):
-                        if enter_location[i] < left_note_start < enter_location[i + 1]:
-                            error_line = i + 1
-                            find = True
-                            break
-                    if not find:
-                        error_line = len(enter_location)
+    def iter_tokens(self, file, chunk_size=65536):
+        """
+        流式词法分析，按块读取文件并逐个产生 token
+        只在注释之外的行尾处切分，占用的内存与块大小、最长的行和最长的注释有关，与文件大小无关
+        二进制模式打开的文件与 load_file 一样直接在 bytes 上扫描，偏移量按字节计算
+        出错时停止产生 token，错误通过 get_error 获取
+        :param file: 文件对象(文本或二进制模式)
+        :param chunk_size: 每次读取的字符数(二进制模式下是字节数)
+        :return: token 生成器
+        """
+        self.__error = None
+        scanner = self.__engine()
+        note_start = regex_dict[note_char_type[0]].replace('\\', '')
+        note_end = regex_dict[note_char_type[1]].replace('\\', '')
+        newline, carriage_return = '\n', '\r'
 
-                    # 报错
-                    self.__error = LexicalError('/* 没有相匹配的 */', error_line)
-                    return False
-            # 如果没有匹配到
-            else:
-                # 尝试寻找有没有落单的 */
-                match2 = re.compile(regex_dict[note_char_type[1]]).search(buffer)
-                # 如果找到了说明错误了
-                if match2:
-                    right_note_start = match2.start()
-                    # 判断错误所在的行数
-                    enter_location = list()
-                    enter_location.append(0)
-                    for i in range(0, len(result)):
-                        if result[i] == '\n':
-                            enter_location.append(i)
-                    find = False
+        chunk = file.read(chunk_size)
+        if not isinstance(chunk, str):
+            note_start, note_end = note_start.encode('ascii'), note_end.encode('ascii')
+            newline, carriage_return = b'\n', b'\r'
 
-                    error_line = 0
-                    for i in range(0, len(enter_location) - 1):
-                        if enter_location[i] < right_note_start < enter_location[i + 1]:
-                            error_line = i + 1
-                            find = True
-                            break
-                    if not find:
-                        error_line = len(enter_location)
+        # 尚未扫描的文本(总是从某一行的开头开始)，它的第一个字符所在的行数和偏移量
+        pending = chunk[:0]
+        line = 1
+        offset = 0
+        # 已经确定注释状态的位置，是否处于注释中，注释之外最后一个行尾之后的位置
+        checked = 0
+        in_note = False
+        safe = 0
 
-                    # 报错
-                    self.__error = LexicalError('多余的 */', error_line)
-                    return False
-                # 如果没有找到那就说明已经找完了，跳出
+        eof = False
+        while not eof:
+            eof = len(chunk) == 0
+            pending += chunk
+            chunk = None
+            # 末尾的字符可能是注释符号的前一半，留到下一块再判断
+            limit = len(pending)
+            if not eof and limit > 0 and (note_start.startswith(pending[-1:]) or note_end.startswith(pending[-1:])):
+                limit -= 1
+
+            # 跟踪注释状态，记录注释之外的最后一个行尾
+            pos = checked
+            # 下一个 */ 的位置，-2 表示需要重新查找
+            next_end = -2
+            while True:
+                if in_note:
+                    end = pending.find(note_end, pos)
+                    if end < 0:
+                        pos = max(pos, limit)
+                        break
+                    pos = end + len(note_end)
+                    in_note = False
                 else:
-                    break
+                    start = pending.find(note_start, pos)
+                    if next_end == -2 or 0 <= next_end < pos:
+                        next_end = pending.find(note_end, pos)
+                    # 落单的 */ 留给扫描器报错
+                    stray = next_end >= 0 and (start < 0 or next_end < start)
+                    if stray:
+                        stop = next_end + len(note_end)
+                    elif start >= 0:
+                        stop = start
+                    else:
+                        stop = max(pos, limit)
+                    safe = max(safe, pending.rfind(newline, pos, stop) + 1, pending.rfind(carriage_return, pos, stop) + 1)
+                    pos = stop
+                    if not stray:
+                        if start < 0:
+                            break
+                        in_note = True
+                        pos = start + len(note_start)
+            checked = pos
 
-        # 将 result 保存到 __source 中
-        self.__source = result
-        return True
+            # token 不会跨行，扫描注释之外的所有完整的行
+            cut = len(pending) if eof else safe
+            if cut > 0:
+                text = pending[:cut]
+                if not scanner.scan(SourceFile(text), line, offset):
+                    self.__error = scanner.get_error()
+                    return
+                line += text.count(newline) + text.count(carriage_return)
+                offset += cut
+                pending = pending[cut:]
+                checked -= cut
+                safe = 0
+                for token in scanner.get_result():
+                    yield token
+            if not eof:
+                chunk = file.read(chunk_size)
 
-    def __split_lines(self):
+    def get_result(self):
         """
-        将完成源代码分割成行序列
+        获取结果
+        :return: token 流(可以当作 Token 列表使用)
         """
-        # 清空 __tokens
-        self.__tokens.clear()
-        # 按行分割
-        temp = self.__source.split('\n')
-        # 将分割出来的行序列添加到 __tokens 中
-        for t in temp:
-            self.__lines.append(' ' + t)
+        return self.__tokens
 
-    def __split_tokens(self):
+    def get_error(self):
         """
-        从行序列中分割出 token
-        :return: 是否分割成功
+        获取错误
+        :return: 错误原因
         """
-        # 先将 __lines 拷贝一份到临时变量中
-        lines = list()
-        for line in self.__lines:
-            lines.append(line)
-        # 缓冲区
-        buffer = ''
-        # 当前所在行数
-        current_line_num = 0
-        # 结果
-        tokens = list()
-
-        # 参与匹配的 type 名
-        types = list()
-        for i in split_char_type:
-            types.append(i)
-        for i in token_type:
-            types.append(i)
-
-        while len(lines) > 0:
-            # 当前循环中是否匹配成功
-            match_this_time = False
-
-            # 如果缓冲区中没有数据了，就填充一行到缓冲区
-            if buffer == '':
-                buffer = lines[0]
-                lines = lines[1:]
-                # 行号自增
-                current_line_num += 1
+        return self.__error
 
-            # 开始匹配
-            # 尝试用所有的正则表达式来匹配
-            for t in types:
-                match = re.compile(regex_dict[t]).match(buffer)
-                # 如果匹配到了
-                if match:
-                    # 将其添加到 tokens 中
-                    tokens.append(Token(t, buffer[match.start():match.end()], current_line_num))
-                    # buffer 去除已经匹配的部分
-                    buffer = buffer[match.end():]
-                    match_this_time = True
-                    break
-            # 如果匹配完所有的正则表达式都不成功
-            if not match_this_time:
-                # 报错
-                self.__error = LexicalError('词法错误', current_line_num)
-                # 返回失败
-                return False
-        # 循环正常结束则说明完全匹配成功，将结果保存到 __tokens 中，返回成功
-        for token in tokens:
-            self.__tokens.append(token)
-        return True
+    def __replace_tokens(self, first, stop, fresh, delta, line_delta):
+        """
+        用重新扫描得到的 token 替换 [first, stop) 范围内的 token，之后的 token 只记下平移量
+        :param first: 开始下标(之后的 token 都还没有平移)
+        :param stop: 结束下标
+        :param fresh: 重新扫描得到的 token
+        :param delta: 之后的 token 还要加上的偏移量
+        :param line_delta: 之后的 token 还要加上的行数
+        """
+        tokens = self.__tokens
+        tokens.source_file = self.__source
+        tokens.kinds[first:stop] = fresh.kinds
+        tokens.starts[first:stop] = fresh.starts
+        tokens.ends[first:stop] = fresh.ends
+        tokens.lines[first:stop] = fresh.lines
+        tokens.shift_index = first + len(fresh)
+        tokens.shift_delta = delta
+        tokens.shift_lines = line_delta
 
-    def __del_spaces(self):
+    def __split_tokens(self):
         """
-        删除 __tokens 中的空格
+        从源代码中分割出 token
+        :return: 是否分割成功
         """
-        # 新建临时变量
-        tokens = list()
-        # 将 __tokens 中的内容拷贝到 tokens 中
-        for token in self.__tokens:
-            tokens.append(token)
-        # 清空 __tokens
-        self.__tokens.clear()
-        # 如果不是空格就添加进原来的 __tokens，相当于从原来的列表中去除了空格
-        for token in tokens:
-            if token.type != split_char_type[0]:
-                self.__tokens.append(token)
+        if self.__cache is not None:
+            tokens = self.__cache.get(self.__source, self.__engine_name)
+            if tokens is not None:
+                self.__tokens = tokens
+                self.__synced = True
+                return True
+
+        scanner = self.__engine()
+        if scanner.scan(self.__source):
+            # 扫描正常结束则说明完全匹配成功，将结果保存到 __tokens 中，返回成功
+            self.__tokens = scanner.get_result()
+            self.__synced = True
+            if self.__cache is not None:
+                self.__cache.put(self.__source, self.__engine_name, self.__tokens)
+            return True
+        else:
+            self.__error = scanner.get_error()
+            self.__synced = False
+            return False
@@ -0,0 +1,145 @@
+"""
+多进程词法分析
+源代码在注释之外的行尾处被切成若干块，每一块由一个进程独立扫描，结果按顺序拼接
+"""
+from lexical.rule import *
+from lexical.stream import TokenStream
+from lexical.prescan import PreScan
+from source import SourceFile
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+
+
+def find_safe_point(text, pos, target):
+    """
+    预扫描源代码，找出 target 之后第一个处于注释之外的行首
+    token 不会跨行，在这样的位置开始扫描，结果与从头扫描到这里完全相同
+    预扫描只查找注释符号和换行符，不做完整的词法分析
+    :param text: 源代码(str、bytes 或 mmap)
+    :param pos: 开始预扫描的位置，必须处于注释之外
+    :param target: 目标位置
+    :return: 偏移量，找不到时返回 -1
+    """
+    note_start = regex_dict[note_char_type[0]].replace('\\', '')
+    note_end = regex_dict[note_char_type[1]].replace('\\', '')
+    newline, carriage_return = '\n', '\r'
+    if not isinstance(text, str):
+        note_start, note_end = note_start.encode('ascii'), note_end.encode('ascii')
+        newline, carriage_return = b'\n', b'\r'
+
+    length = len(text)
+    while True:
+        target = max(pos, target)
+        # target 之后的第一个换行符，只在找到的 \n 之前查找 \r，避免重复扫描到文件结尾
+        end = text.find(newline, target)
+        first_return = text.find(carriage_return, target, end if end >= 0 else length)
+        if first_return >= 0:
+            end = first_return
+        if end < 0:
+            return -1
+        # pos 到换行符之间有注释开始，跳过整段注释再找
+        start = text.find(note_start, pos, end)
+        if start < 0:
+            return end + 1
+        stop = text.find(note_end, start + len(note_start))
+        if stop < 0:
+            # 注释一直延续到文件结尾(由扫描器报错)
+            return -1
+        pos = stop + len(note_end)
+
+
+def find_split_points(text, chunk_size):
+    """
+    找出切分位置
+    :param text: 源代码(str、bytes 或 mmap)
+    :param chunk_size: 每一块的大致字符数
+    :return: 每一块开头的偏移量，第一个总是 0
+    """
+    points = [0]
+    while points[-1] + chunk_size < len(text):
+        point = find_safe_point(text, points[-1], points[-1] + chunk_size)
+        if point < 0:
+            break
+        points.append(point)
+    return points
+
+
+def scan_chunk(engine, text, line, offset):
+    """
+    在工作进程中扫描一块源代码
+    :param engine: 扫描引擎
+    :param text: 这一块的源代码
+    :param line: 这一块第一行的行数
+    :param offset: 这一块第一个字符的偏移量
+    :return: (类型编号, 开始偏移量, 结束偏移量, 行数, 错误)，出错时前四项为 None
+    """
+    scanner = engine()
+    if not scanner.scan(SourceFile(text), line, offset):
+        return None, None, None, None, scanner.get_error()
+    tokens = scanner.get_result()
+    return tokens.kinds, tokens.starts, tokens.ends, tokens.lines, None
+
+
+def parallel_scan(engine, source_file, workers=None, chunk_size=1024 * 1024):
+    """
+    多进程扫描源代码，结果与顺序扫描完全相同
+    :param engine: 扫描引擎
+    :param source_file: 源文件
+    :param workers: 进程数，None 表示 CPU 核数
+    :param chunk_size: 每一块的大致字符数
+    :return: (token 流, 错误)，成功时错误为 None
+    """
+    text = source_file.text
+    tokens = TokenStream(source_file, 0)
+    length = len(text)
+    points = find_split_points(text, chunk_size)
+
+    # 多进程扫描时，注释之外有非法字符则一定会在它所在的行或者更早的位置出错，之后的块不必交给其他进程扫描
+    # 只有一块或者只有一个进程时按顺序扫描，遇到错误就会停止，不需要预扫描
+    if workers != 1 and len(points) > 1:
+        prescan = PreScan(text)
+        first_invalid = prescan.get_first_invalid()
+        if first_invalid >= 0:
+            line_starts = prescan.line_starts
+            index = bisect_right(line_starts, first_invalid)
+            length = line_starts[index] if index < len(line_starts) else length
+            text = text[:length]
+            points = find_split_points(text, chunk_size)
+    points.append(length)
+
+    # 每一块的源代码、第一行的行数、偏移量
+    newline, carriage_return = ('\n', '\r') if isinstance(text, str) else (b'\n', b'\r')
+    chunks = list()
+    line = 1
+    for start, end in zip(points, points[1:]):
+        chunk = text[start:end]
+        chunks.append((chunk, line, start))
+        line += chunk.count(newline) + chunk.count(carriage_return)
+
+    if workers == 1 or len(chunks) <= 1:
+        results = (scan_chunk(engine, *chunk) for chunk in chunks)
+        return merge_results(tokens, results)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(scan_chunk, engine, *chunk) for chunk in chunks]
+        result = merge_results(tokens, (future.result() for future in futures))
+        # 出错之后的块不再需要
+        for future in futures:
+            future.cancel()
+        return result
+
+
+def merge_results(tokens, results):
+    """
+    按顺序拼接每一块的扫描结果，遇到第一个错误就停止(之前的块与顺序扫描的结果相同)
+    :param tokens: token 流
+    :param results: 每一块的扫描结果
+    :return: (token 流, 错误)
+    """
+    for kinds, starts, ends, lines, error in results:
+        if error is not None:
+            return tokens, error
+        tokens.kinds.extend(kinds)
+        tokens.starts.extend(starts)
+        tokens.ends.extend(ends)
+        tokens.lines.extend(lines)
+    return tokens, None
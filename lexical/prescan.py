@@ -0,0 +1,141 @@
+"""
+源代码预扫描
+一次性找出换行符、注释符号的候选位置和非法字符的位置，有 NumPy 时使用向量化的实现
+"""
+from lexical.rule import *
+from lexical.dfa import RegexParser
+from source import numpy, get_codes, find_line_starts
+from array import array
+from bisect import bisect_left
+import re
+
+
+# 字符类
+char_invalid = 0
+char_blank = 1
+char_newline = 2
+char_token = 3
+
+
+def get_char_classes():
+    """
+    根据 lexical/rule.py 计算每个 ASCII 字符的字符类，不出现在任何规则中的字符是非法字符
+    :return: 长度为 256 的 bytes，非 ASCII 字符都视为非法字符
+    """
+    classes = bytearray(256)
+    for t in list(note_char_type) + list(split_char_type) + list(token_type):
+        tree = RegexParser(regex_dict[t]).parse()
+        nodes = [tree] if tree is not None else []
+        while len(nodes) > 0:
+            node = nodes.pop()
+            if node[0] == 'set':
+                for low, high in node[1]:
+                    for o in range(low, min(high, 127) + 1):
+                        classes[o] = char_blank if t in split_char_type else char_token
+            else:
+                nodes.extend(node[1:])
+    classes[ord('\t')] = char_blank
+    classes[ord('\n')] = char_newline
+    classes[ord('\r')] = char_newline
+    return bytes(classes)
+
+
+def get_invalid_pattern(char_classes):
+    """
+    匹配非法字符的正则表达式: 不属于任何合法字符的字符(包括所有非 ASCII 字符)
+    :param char_classes: 字节 -> 字符类
+    :return: (str 的正则表达式, bytes 的正则表达式)
+    """
+    valid = ''.join(re.escape(chr(o)) for o in range(0, 128) if char_classes[o] != char_invalid)
+    pattern = '[^' + valid + ']'
+    return re.compile(pattern), re.compile(pattern.encode('ascii'))
+
+
+class PreScan:
+    """
+    源代码预扫描的结果
+    """
+    # 字节 -> 字符类(所有实例共享)
+    __char_classes = None
+    # 匹配非法字符的正则表达式(所有实例共享)
+    __invalid_patterns = None
+
+    def __init__(self, text):
+        """
+        构造
+        :param text: 源代码(str、bytes 或 mmap)
+        """
+        if PreScan.__char_classes is None:
+            PreScan.__char_classes = get_char_classes()
+            PreScan.__invalid_patterns = get_invalid_pattern(PreScan.__char_classes)
+        char_classes = PreScan.__char_classes
+
+        # 每一行开头的偏移量
+        self.line_starts = find_line_starts(text)
+        # 非法字符的位置
+        self.invalid = array('q')
+        # 注释开始、结束符号的候选位置(可能在注释内部)，只用来判断非法字符是否处于注释中
+        self.__note_starts = array('q')
+        self.__note_ends = array('q')
+
+        note_start = regex_dict[note_char_type[0]].replace('\\', '')
+        note_end = regex_dict[note_char_type[1]].replace('\\', '')
+        if numpy is not None and len(text) > 0:
+            codes = get_codes(text)
+            # 非 ASCII 字符统一映射到 128(非法)
+            lookup = numpy.frombuffer(char_classes, dtype=numpy.uint8)
+            classes = lookup[numpy.minimum(codes, 128)]
+            self.invalid.frombytes(numpy.flatnonzero(classes == char_invalid).astype(numpy.int64).tobytes())
+            for positions, delimiter in ((self.__note_starts, note_start), (self.__note_ends, note_end)):
+                count = len(codes) - len(delimiter) + 1
+                hits = numpy.ones(max(count, 0), dtype=bool)
+                for i, c in enumerate(delimiter):
+                    hits &= codes[i:i + count] == ord(c)
+                positions.frombytes(numpy.flatnonzero(hits).astype(numpy.int64).tobytes())
+            return
+
+        # 没有 NumPy 时，bytes 和 ASCII 的 str 用 bytes.translate 在 C 层面查表；
+        # mmap 和含非 ASCII 字符的 str 直接用正则查找非法字符，不需要拷贝或逐字符转换
+        str_pattern, bytes_pattern = PreScan.__invalid_patterns
+        if isinstance(text, str):
+            data = text.encode('ascii') if text.isascii() else None
+            invalid_pattern = str_pattern
+        else:
+            data = text if isinstance(text, bytes) else None
+            invalid_pattern = bytes_pattern
+            note_start, note_end = note_start.encode('ascii'), note_end.encode('ascii')
+        if data is not None:
+            self.invalid.extend(match.start() for match in re.finditer(b'\x00', data.translate(char_classes)))
+        else:
+            self.invalid.extend(match.start() for match in invalid_pattern.finditer(text))
+        for positions, delimiter in ((self.__note_starts, note_start), (self.__note_ends, note_end)):
+            positions.extend(match.start() for match in re.finditer(re.escape(delimiter), text))
+
+    def get_first_invalid(self):
+        """
+        找出注释之外的第一个非法字符，词法分析一定会在这里或者更早的位置出错
+        :return: 偏移量，没有时返回 -1
+        """
+        note_starts = self.__note_starts
+        note_ends = self.__note_ends
+        start_length = len(regex_dict[note_char_type[0]].replace('\\', ''))
+        end_length = len(regex_dict[note_char_type[1]].replace('\\', ''))
+        # 已经确定处于注释之外的位置
+        pos = 0
+        for position in self.invalid:
+            while True:
+                # pos 之后的第一个注释开始
+                i = bisect_left(note_starts, pos)
+                if i >= len(note_starts) or note_starts[i] > position:
+                    return position
+                # 与之配对的注释结束(不能与开始符号重叠)
+                j = bisect_left(note_ends, note_starts[i] + start_length)
+                if j >= len(note_ends):
+                    # 注释一直延续到文件结尾
+                    return -1
+                end = note_ends[j] + end_length
+                if end > position:
+                    # 处于这段注释中
+                    break
+                pos = end
+        return -1
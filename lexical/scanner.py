@@ -0,0 +1,187 @@
+"""
+扫描器
+"""
+from lexical.rule import *
+from lexical.stream import TokenStream
+from error import LexicalError, LexicalRuleError
+import re
+
+
+# 不产生 token 的分组: 空白、换行、注释开始、注释结束
+kind_skip = -1
+kind_newline = -2
+kind_note_start = -3
+kind_note_end = -4
+
+
+class Scanner:
+    """
+    单遍扫描器，所有的正则表达式被合并成一个带命名分组的总正则，按位置推进匹配
+    注释、换行、制表符都在同一遍扫描中处理，不需要预先拷贝和改写源代码
+    源代码可以是 str，也可以是 bytes 或 mmap(字节模式，要求词法规则只含 ASCII 字符)
+    """
+    # 总正则、注释结束符的正则、换行符的正则、关键字查找表，str 和 bytes 各一份(只编译一次，所有实例共享)
+    # 关键字查找表: 首字母 -> [(关键字, 长度, 类型编号)]，按 rule.py 中的优先级排列
+    __tables = None
+    # 分组编号 -> token 类型编号(token_type 中的下标)，负数表示不产生 token 的分组
+    __group_kinds = None
+
+    def __init__(self):
+        """
+        构造
+        """
+        # 错误
+        self.__error = None
+        # 结果
+        self.__tokens = TokenStream()
+
+        if Scanner.__tables is None:
+            Scanner.__compile()
+
+    @classmethod
+    def __compile(cls):
+        """
+        根据 lexical/rule.py 生成总正则和关键字查找表
+        """
+        # 参与匹配的 type 名，顺序即优先级
+        types = list()
+        for i in split_char_type:
+            types.append(i)
+        for i in token_type:
+            types.append(i)
+
+        # 能被 id 完整匹配的字面量(且优先级在 id 之前)视为关键字，不进入总正则，而是在匹配到 id 之后查表
+        keywords = dict()
+        keyword_types = set()
+        id_regex = re.compile(regex_dict['id'])
+        for t in types[:types.index('id')]:
+            keyword = regex_dict[t]
+            if re.escape(keyword) == keyword and id_regex.fullmatch(keyword):
+                keywords.setdefault(keyword[0], list()).append((keyword, len(keyword), token_type.index(t)))
+                keyword_types.add(t)
+
+        # 拼接总正则，id 放到第一个关键字原本所在的位置，保证相对优先级不变
+        # 注释符号排在最前面，否则会被当成除号和乘号；\r 和 \n 都算作换行，\t 算作空白
+        alternatives = ['(?P<newline>\\r|\\n)', '(?P<tab>\\t+)']
+        group_names = {'newline': kind_newline, 'tab': kind_skip}
+        id_placed = False
+        for t in list(note_char_type) + types:
+            if t in keyword_types:
+                t = 'id'
+            if t == 'id':
+                if id_placed:
+                    continue
+                id_placed = True
+            name = 'g' + str(len(alternatives))
+            if t == note_char_type[0]:
+                group_names[name] = kind_note_start
+            elif t == note_char_type[1]:
+                group_names[name] = kind_note_end
+            elif t in split_char_type:
+                group_names[name] = kind_skip
+            else:
+                group_names[name] = token_type.index(t)
+            alternatives.append('(?P<' + name + '>' + regex_dict[t] + ')')
+        pattern = re.compile('|'.join(alternatives))
+
+        group_kinds = [kind_skip] * (pattern.groups + 1)
+        for name, index in pattern.groupindex.items():
+            group_kinds[index] = group_names[name]
+
+        tables = {
+            str: (pattern, re.compile(regex_dict[note_char_type[1]]), re.compile('\r|\n'), keywords)
+        }
+        # 字节模式使用同样的正则编译成 bytes 版本
+        try:
+            bytes_keywords = dict()
+            for first, items in keywords.items():
+                bytes_keywords[ord(first)] = [(k.encode('ascii'), n, kind) for k, n, kind in items]
+            tables[bytes] = (re.compile(pattern.pattern.encode('ascii')),
+                             re.compile(regex_dict[note_char_type[1]].encode('ascii')),
+                             re.compile(b'\r|\n'),
+                             bytes_keywords)
+        except UnicodeEncodeError:
+            tables[bytes] = None
+
+        cls.__tables = tables
+        cls.__group_kinds = group_kinds
+
+    def scan(self, source_file, line=1, offset=0):
+        """
+        扫描源代码
+        :param source_file: 源文件
+        :param line: 起始行数
+        :param offset: 源文件第一个字符的偏移量
+        :return: 是否扫描成功
+        """
+        self.__tokens = TokenStream(source_file, offset)
+        self.__error = None
+        source = source_file.text
+        first_line = line
+
+        tables = Scanner.__tables[str if isinstance(source, str) else bytes]
+        if tables is None:
+            self.__error = LexicalRuleError('词法规则含有非 ASCII 字符，不能使用字节模式')
+            return False
+        pattern, note_end, newline, keywords = tables
+        match_at = pattern.match
+        note_end_search = note_end.search
+        newline_findall = newline.findall
+        group_kinds = Scanner.__group_kinds
+        id_kind = token_type.index('id')
+        kinds_append = self.__tokens.kinds.append
+        starts_append = self.__tokens.starts.append
+        ends_append = self.__tokens.ends.append
+        lines_append = self.__tokens.lines.append
+
+        pos = 0
+        length = len(source)
+        while pos < length:
+            match = match_at(source, pos)
+            # 如果所有的正则表达式都匹配不成功，报错
+            if not match:
+                self.__error = LexicalError.at('词法错误', source_file, pos, first_line)
+                return False
+            kind = group_kinds[match.lastindex]
+            end = match.end()
+            if kind >= 0:
+                if kind == id_kind:
+                    # 查表判断是否以关键字开头
+                    for keyword, keyword_length, keyword_kind in keywords.get(source[pos], ()):
+                        if source[pos:pos + keyword_length] == keyword:
+                            kind = keyword_kind
+                            end = pos + keyword_length
+                            break
+                kinds_append(kind)
+                starts_append(offset + pos)
+                ends_append(offset + end)
+                lines_append(line)
+            elif kind == kind_newline:
+                line += 1
+            elif kind == kind_note_start:
+                # 跳过整段注释，只统计其中的行数
+                note = note_end_search(source, end)
+                if not note:
+                    self.__error = LexicalError.at('/* 没有相匹配的 */', source_file, pos, first_line)
+                    return False
+                line += len(newline_findall(source, end, note.start()))
+                end = note.end()
+            elif kind == kind_note_end:
+                self.__error = LexicalError.at('多余的 */', source_file, pos, first_line)
+                return False
+            pos = end
+        return True
+
+    def get_result(self):
+        """
+        获取结果
+        :return: token 流
+        """
+        return self.__tokens
+
+    def get_error(self):
+        """
+        获取错误
+        :return: 错误原因
+        """
+        return self.__error
@@ -0,0 +1,167 @@
+"""
+Token 流
+"""
+from lexical.rule import *
+from array import array
+import re
+
+
+def get_fixed_strs():
+    """
+    获取每种 token 固定的内容，正则表达式只匹配一个字面量的 token 不需要从源代码中切出
+    :return: 类型编号 -> 内容，内容不固定的类型为 None
+    """
+    fixed_strs = list()
+    for t in token_type:
+        regex = regex_dict[t]
+        # 去掉转义的符号后不含元字符的正则就是一个字面量(\d 之类的转义不算)
+        literal = re.sub(r'\\([^0-9a-zA-Z])', r'\1', regex)
+        plain = re.sub(r'\\[^0-9a-zA-Z]', '', regex)
+        fixed_strs.append(literal if not any(c in '.^$*+?{}[]|()\\' for c in plain) else None)
+    return fixed_strs
+
+
+# 类型编号 -> 固定的内容
+fixed_strs = get_fixed_strs()
+
+
+class Token:
+    """
+    Token
+    """
+    def __init__(self, token_type='', token_str='', token_line=-1, token_offset=-1, token_kind=-1):
+        """
+        构造
+        :param token_type: Token 的类型
+        :param token_str: Token 的内容
+        :param token_line: Token 所在行数
+        :param token_offset: Token 在源文件中的偏移量(配合 SourceFile 可以得到列数)
+        :param token_kind: Token 的类型编号(token_type 中的下标，也是语法分析中终结符的编号)，未知时为 -1
+        """
+        self.type = token_type
+        self.str = token_str
+        self.line = token_line
+        self.offset = token_offset
+        self.kind = token_kind
+
+
+class TokenStream:
+    """
+    紧凑的 Token 流，按列存放类型编号、起止偏移量和行数，Token 的内容只在需要时才从源代码中切出
+    支持 len、下标和迭代，访问时返回 Token，可以当作 Token 列表使用
+    源代码是 bytes 或 mmap 时，只有内容不固定的 token(如 id、num)才需要切出并解码
+    """
+    def __init__(self, source_file=None, base=0):
+        """
+        构造
+        :param source_file: 源文件
+        :param base: 源文件第一个字符的偏移量
+        """
+        self.source_file = source_file
+        self.base = base
+
+        # 类型编号(token_type 中的下标)
+        self.kinds = array('H')
+        # 起止偏移量
+        self.starts = array('q')
+        self.ends = array('q')
+        # 所在行数
+        self.lines = array('i')
+
+        # 还没有平移的部分: 下标不小于 shift_index 的 token，偏移量还要加上 shift_delta，行数还要加上 shift_lines
+        # 增量更新时只记下平移量，访问单个 token 时加上，完整遍历时才一起平移
+        self.shift_index = 0
+        self.shift_delta = 0
+        self.shift_lines = 0
+
+    def append(self, kind, start, end, line):
+        """
+        添加一个 token
+        :param kind: 类型编号
+        :param start: 开始偏移量
+        :param end: 结束偏移量
+        :param line: 所在行数
+        """
+        self.kinds.append(kind)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line)
+
+    def move_shift(self, index):
+        """
+        让还没有平移的部分从 index 开始，只需要处理 index 与原来的 shift_index 之间的 token
+        :param index: 新的 shift_index
+        """
+        if self.shift_delta == 0 and self.shift_lines == 0:
+            self.shift_index = index
+            return
+        if index > self.shift_index:
+            # 原来的 shift_index 与 index 之间的 token 平移到位
+            self.__shift_range(self.shift_index, index, self.shift_delta, self.shift_lines)
+        elif index < self.shift_index:
+            # index 与原来的 shift_index 之间的 token 改为还没有平移
+            self.__shift_range(index, self.shift_index, -self.shift_delta, -self.shift_lines)
+        self.shift_index = index
+
+    def flush(self):
+        """
+        把还没有平移的部分全部平移到位，之后可以直接使用 starts、ends、lines
+        """
+        self.move_shift(len(self))
+        self.shift_index = 0
+        self.shift_delta = 0
+        self.shift_lines = 0
+
+    def __shift_range(self, first, stop, delta, line_delta):
+        """
+        平移 [first, stop) 范围内的 token
+        :param first: 开始下标
+        :param stop: 结束下标
+        :param delta: 偏移量的变化
+        :param line_delta: 行数的变化
+        """
+        if delta != 0:
+            self.starts[first:stop] = array('q', map(delta.__add__, self.starts[first:stop]))
+            self.ends[first:stop] = array('q', map(delta.__add__, self.ends[first:stop]))
+        if line_delta != 0:
+            self.lines[first:stop] = array('i', map(line_delta.__add__, self.lines[first:stop]))
+
+    def get_str(self, index):
+        """
+        获取内容
+        :param index: 下标
+        :return: 内容
+        """
+        kind = self.kinds[index]
+        if fixed_strs[kind] is not None:
+            return fixed_strs[kind]
+        base = self.base - self.shift_delta if index >= self.shift_index else self.base
+        token_str = self.source_file.text[self.starts[index] - base:self.ends[index] - base]
+        return token_str if isinstance(token_str, str) else token_str.decode('ascii')
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        kind = self.kinds[index]
+        if index >= self.shift_index:
+            return Token(token_type[kind], self.get_str(index), self.lines[index] + self.shift_lines,
+                         self.starts[index] + self.shift_delta, kind)
+        return Token(token_type[kind], self.get_str(index), self.lines[index], self.starts[index], kind)
+
+    def __iter__(self):
+        self.flush()
+        text = self.source_file.text if self.source_file is not None else ''
+        is_text = isinstance(text, str)
+        base = self.base
+        for kind, start, end, line in zip(self.kinds, self.starts, self.ends, self.lines):
+            token_str = fixed_strs[kind]
+            if token_str is None:
+                token_str = text[start - base:end - base]
+                if not is_text:
+                    token_str = token_str.decode('ascii')
+            yield Token(token_type[kind], token_str, line, start, kind)
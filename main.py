@@ -3,6 +3,7 @@
 """
 from lexical.lexical import Lexical
 from syntax.syntax import Syntax
+from error import SourceError
 
 
 # 新建词法分析器
@@ -23,7 +24,7 @@ if lexical_success:
 
     # 开始执行语法分析
     syntax = Syntax()
-    syntax.put_source(lexical_result)
+    syntax.put_source(lexical_result, lexical.get_source())
     syntax_success = syntax.execute()
     print('语法分析和语义分析是否成功\t', syntax_success)
     if syntax_success:
@@ -35,6 +36,9 @@ if lexical_success:
             i += 1
             print(i, '  \t', code)
     else:
-        print('错误原因:\t', syntax.get_error().info, syntax.get_error().line, '行')
+        if isinstance(syntax.get_error(), SourceError):
+            print('错误原因:\t', syntax.get_error().format(lexical.get_source()))
+        else:
+            print('错误原因:\t', syntax.get_error().info)
 else:
-    print('错误原因:\t', lexical.get_error().info)
+    print('错误原因:\t', lexical.get_error().format(lexical.get_source()))
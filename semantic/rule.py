@@ -95,6 +95,10 @@ class SemanticRule:
     """
     语义规则
     """
+    # 是否依赖前面的兄弟节点: 读取它们的属性(get_pre_brother)，或者使用它们的语义规则建立的符号表，
+    # 语法错误恢复时据此判断兄弟节点的损坏是否影响这条规则
+    depends_on_brothers = False
+
     def __init__(self, node):
         """
         构造
@@ -498,6 +502,16 @@ class SemanticRuleFactory:
 
         return None
 
+    @classmethod
+    def get_class(cls, rule_key):
+        """
+        获取语义规则关键字对应的类，用来在载入文法时预先解析，避免分析时按名字查找
+        :param rule_key: 关键字
+        :return: 类，没有对应的语义规则时返回 None
+        """
+        instance = cls.get_instance(rule_key, None)
+        return type(instance) if instance is not None else None
+
 # S 产生式开始
 # E 产生式结束
 # CN 产生式第N个元素应用之后
@@ -552,6 +566,8 @@ class Define0E(SemanticRule):
 
 
 class Define0C2(SemanticRule):
+    depends_on_brothers = True
+
     def __rule(self, node):
         node.type = node.get_pre_brother(2).type
         node.id = node.get_pre_brother(1).lexical
@@ -682,6 +698,9 @@ class FunDefineFollow0C1(SemanticRule):
 
 
 class FunDefineFollow0C3(SemanticRule):
+    # 函数体使用 params 的语义规则建立的符号表
+    depends_on_brothers = True
+
     def execute(self):
         self.__rule(self.node)
 
@@ -989,6 +1008,8 @@ class NormalStatement1E(SemanticRule):
 
 
 class NormalStatement1C1(SemanticRule):
+    depends_on_brothers = True
+
     def execute(self):
         self.__rule(self.node)
 
@@ -1036,9 +1057,12 @@ class NormalStatementFollow1E(SemanticRule):
         self.__rule(self.node)
 
     def __rule(self, node):
-        for c in node.children[0].code:
-            node.code.append(c)
-        node.code.append('call ' + node.id + ', ' + str(symbol_table_pool.query(node.id).get_params_num()))
+        if symbol_table_pool.fun_table.exist(node.id):
+            for c in node.children[0].code:
+                node.code.append(c)
+            node.code.append('call ' + node.id + ', ' + str(symbol_table_pool.query(node.id).get_params_num()))
+        else:
+            self.errors.append(SemanticError('函数' + node.id + '未定义'))
 
 
 class NormalStatementFollow1C0(SemanticRule):
@@ -1075,7 +1099,9 @@ class CallParams0E(SemanticRule):
         self.__rule(self.node)
 
     def __rule(self, node):
-        if symbol_table_pool.query(node.id).get_params_num() != node.children[0].num:
+        if not symbol_table_pool.fun_table.exist(node.id):
+            self.errors.append(SemanticError('函数' + node.id + '未定义'))
+        elif symbol_table_pool.query(node.id).get_params_num() != node.children[0].num:
             self.errors.append(SemanticError('函数体' + node.fun + '调用' + node.id + '的时候，参数数量不匹配'))
         else:
             for c in node.children[0].code:
@@ -1729,6 +1755,8 @@ class Factor1E(SemanticRule):
 
 
 class Factor1C1(SemanticRule):
+    depends_on_brothers = True
+
     def execute(self):
         self.__rule(self.node)
 
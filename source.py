@@ -0,0 +1,151 @@
+"""
+源文件
+"""
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+import re
+
+# NumPy 是可选的，有的时候用于向量化地处理源代码
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def get_codes(text):
+    """
+    把源代码看作字符编码数组(需要 NumPy)，不含非 ASCII 字符时是 uint8，否则是 uint32
+    :param text: 源代码(str、bytes 或 mmap)
+    :return: NumPy 数组
+    """
+    if not isinstance(text, str):
+        return numpy.frombuffer(text, dtype=numpy.uint8)
+    if text.isascii():
+        return numpy.frombuffer(text.encode('ascii'), dtype=numpy.uint8)
+    return numpy.frombuffer(text.encode('utf-32-le'), dtype=numpy.uint32)
+
+
+def find_line_starts(text):
+    """
+    找出每一行开头的偏移量(\r 和 \n 都算作换行，与词法分析一致)
+    有 NumPy 时一次向量化比较得到所有换行符，否则用 split 在 C 层面完成切分，只对行长度做累加
+    :param text: 源代码(str、bytes 或 mmap)
+    :return: 偏移量数组
+    """
+    line_starts = array('q', [0])
+    if numpy is not None and len(text) > 0:
+        codes = get_codes(text)
+        breaks = numpy.flatnonzero((codes == 10) | (codes == 13)) + 1
+        line_starts.frombytes(breaks.astype(numpy.int64).tobytes())
+    elif isinstance(text, (str, bytes)):
+        newline, carriage_return = ('\n', '\r') if isinstance(text, str) else (b'\n', b'\r')
+        lines = text.replace(carriage_return, newline).split(newline)
+        lines.pop()
+        line_starts.extend(accumulate(map((1).__add__, map(len, lines))))
+    else:
+        for match in re.finditer(b'\r|\n', text):
+            line_starts.append(match.end())
+    return line_starts
+
+
+class SourceFile:
+    """
+    源文件，负责把偏移量转换成行号和列号
+    """
+    def __init__(self, text, name=''):
+        """
+        构造
+        :param text: 源代码(str，或者只含 ASCII 字符的 bytes、mmap)
+        :param name: 文件名
+        """
+        self.text = text
+        self.name = name
+
+        # 每一行开头的偏移量，第一次使用时才建立
+        self.__line_starts = None
+        # 还没有平移的部分: 下标不小于 __shift_index 的行开头还要加上 __shift_delta(修改之后增量更新时使用)
+        self.__shift_index = 0
+        self.__shift_delta = 0
+
+    def get_line_starts(self):
+        """
+        获取每一行开头的偏移量(\\r 和 \\n 都算作换行，与词法分析一致)
+        :return: 偏移量数组
+        """
+        if self.__line_starts is None:
+            self.__line_starts = find_line_starts(self.text)
+        elif self.__shift_delta != 0:
+            self.__move_shift(len(self.__line_starts))
+            self.__shift_delta = 0
+        return self.__line_starts
+
+    def replace(self, start, end, text):
+        """
+        替换一段内容，得到新的源文件
+        已经建立的行开头偏移量交给新的源文件增量更新: 只找出新内容中的换行，之后的行开头只记下平移量，用到时再平移
+        :param start: 被替换部分的开始偏移量
+        :param end: 被替换部分的结束偏移量
+        :param text: 新的内容(类型与源代码相同)
+        :return: 新的源文件
+        """
+        source_file = SourceFile(self.text[:start] + text + self.text[end:], self.name)
+        line_starts = self.__line_starts
+        if line_starts is None:
+            return source_file
+
+        # 被替换部分之后的行开头(不大于 start 的保持不变)
+        index, shift = self.__shift_index, self.__shift_delta
+        if index > 0 and line_starts[index - 1] > start:
+            first = bisect_right(line_starts, start, 0, index)
+        else:
+            first = bisect_right(line_starts, start - shift, index)
+        self.__move_shift(first)
+        # 被替换部分中的换行产生的行开头换成新内容中的，之后的只记下平移量
+        stop = bisect_right(line_starts, end - shift, first)
+        added = find_line_starts(text)
+        line_starts[first:stop] = array('q', map(start.__add__, added[1:]))
+
+        # 数组直接交给新的源文件，原来的源文件需要时重新建立
+        self.__line_starts = None
+        self.__shift_index = 0
+        self.__shift_delta = 0
+        source_file.__line_starts = line_starts
+        source_file.__shift_index = first + len(added) - 1
+        source_file.__shift_delta = shift + len(text) - (end - start)
+        return source_file
+
+    def __move_shift(self, index):
+        """
+        让还没有平移的部分从 index 开始，只需要处理 index 与原来的 __shift_index 之间的行开头
+        :param index: 新的 __shift_index
+        """
+        first, stop, delta = index, self.__shift_index, -self.__shift_delta
+        if index > self.__shift_index:
+            first, stop, delta = self.__shift_index, index, self.__shift_delta
+        if delta != 0:
+            self.__line_starts[first:stop] = array('q', map(delta.__add__, self.__line_starts[first:stop]))
+        self.__shift_index = index
+
+    def get_position(self, offset):
+        """
+        将偏移量转换成行号和列号
+        :param offset: 偏移量
+        :return: (行号, 列号)，都从 1 开始
+        """
+        line_starts = self.get_line_starts()
+        line = bisect_right(line_starts, offset)
+        return line, offset - line_starts[line - 1] + 1
+
+    def get_line(self, line):
+        """
+        获取某一行的内容
+        :param line: 行号
+        :return: 该行内容(不含换行符)，行号不存在时返回空串
+        """
+        line_starts = self.get_line_starts()
+        if line < 1 or line > len(line_starts):
+            return ''
+        end = line_starts[line] - 1 if line < len(line_starts) else len(self.text)
+        text = self.text[line_starts[line - 1]:end]
+        return text if isinstance(text, str) else text.decode('ascii', 'replace')
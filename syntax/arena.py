@@ -0,0 +1,501 @@
+"""
+数组表示的语法树(arena)
+节点按编号存放在几列平行的 array('i') 中: 符号编号、父节点、第一个孩子、下一个兄弟、token 下标
+同一个节点的孩子编号连续，节点的内容(lexical)按 token 下标存放在 token 表中
+语义属性按属性名分开存放在旁表中，只为设置了这个属性的节点分配
+没有节点对象和孩子列表，占用的内存比 Node 组成的语法树小一个数量级，遍历时顺序访问数组，可以直接 pickle 或者在进程之间传递
+可以用 build 直接从 token 序列分析得到(只检查语法，不执行语义规则)，也可以用 TreeArena.from_tree 从执行过语义规则的语法树转换得到
+to_bytes 和 from_bytes 把它按列编码成紧凑的二进制格式，用来缓存语法分析结果或者在进程之间传递:
+头部(标识、版本、节点数)之后是一串带长度前缀的段: 五列节点数组、token 表、属性名表、属性中的字符串表、
+每个属性的 (节点编号, 值的类型, 值) 三列、列表值的元素，字符串表中同一个字符串只存一次
+"""
+from syntax import registry
+from syntax import syntax as syntax_module
+from syntax.recognizer import get_kinds, get_syntax_error
+from syntax.syntax import Node, Tree
+from error import SyntaxRuleError
+from array import array
+import struct
+import sys
+
+
+# 二进制格式的标识和版本，改变格式时递增版本
+serialize_magic = b'SYNT'
+serialize_version = 1
+header_format = '<4sHI'
+
+# 属性值的类型
+value_str = 1
+value_int = 2
+value_bool = 3
+value_list = 4
+
+
+def column_to_bytes(column):
+    """
+    把数组编码成小端字节串
+    :param column: array
+    :return: 字节串
+    """
+    if sys.byteorder != 'little':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def column_from_bytes(typecode, data):
+    """
+    从小端字节串解码数组
+    :param typecode: 数组类型
+    :param data: 字节串
+    :return: array
+    """
+    column = array(typecode)
+    if len(data) % column.itemsize != 0:
+        raise ValueError('语法树序列化格式错误')
+    column.frombytes(data)
+    if sys.byteorder != 'little':
+        column.byteswap()
+    return column
+
+
+def strings_to_bytes(strings):
+    """
+    编码字符串表: 字符串数量、每个字符串的长度(字符数)、所有字符串连接之后的 UTF-8
+    :param strings: 字符串列表
+    :return: 字节串
+    """
+    lengths = array('I', [len(string) for string in strings])
+    return struct.pack('<I', len(strings)) + column_to_bytes(lengths) + ''.join(strings).encode('utf-8')
+
+
+def strings_from_bytes(data):
+    """
+    解码字符串表
+    :param data: 字节串
+    :return: 字符串列表
+    """
+    count, = struct.unpack_from('<I', data)
+    lengths = column_from_bytes('I', data[4:4 + 4 * count])
+    text = bytes(data[4 + 4 * count:]).decode('utf-8')
+    strings = list()
+    position = 0
+    for length in lengths:
+        strings.append(text[position:position + length])
+        position += length
+    if position != len(text):
+        raise ValueError('语法树序列化格式错误')
+    return strings
+
+
+class TreeArena:
+    """
+    数组表示的语法树，0 号节点是根节点，-1 表示没有
+    """
+    def __init__(self):
+        """
+        构造(空树)
+        """
+        # 符号编号
+        self.ids = array('i')
+        # 父节点、第一个孩子、下一个兄弟
+        self.parents = array('i')
+        self.first_children = array('i')
+        self.next_siblings = array('i')
+        # token 下标，非终结符为 -1
+        self.tokens = array('i')
+        # token 下标 -> 内容
+        self.lexicals = list()
+        # 属性名 -> {节点编号: 值}
+        self.attributes = dict()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add_root(self, symbol_id):
+        """
+        添加根节点
+        :param symbol_id: 符号编号
+        :return: 节点编号
+        """
+        return self.__add(symbol_id, -1)
+
+    def add_children(self, parent, symbol_ids):
+        """
+        为一个还没有孩子的节点一次添加所有的孩子，孩子的编号连续
+        :param parent: 父节点
+        :param symbol_ids: 孩子的符号编号
+        :return: 第一个孩子的编号，没有孩子时返回 -1
+        """
+        if len(symbol_ids) == 0:
+            return -1
+        first = len(self.ids)
+        for symbol_id in symbol_ids:
+            self.__add(symbol_id, parent)
+        for index in range(first, len(self.ids) - 1):
+            self.next_siblings[index] = index + 1
+        self.first_children[parent] = first
+        return first
+
+    def __add(self, symbol_id, parent):
+        """
+        添加一个没有孩子和兄弟的节点
+        :param symbol_id: 符号编号
+        :param parent: 父节点
+        :return: 节点编号
+        """
+        index = len(self.ids)
+        self.ids.append(symbol_id)
+        self.parents.append(parent)
+        self.first_children.append(-1)
+        self.next_siblings.append(-1)
+        self.tokens.append(-1)
+        return index
+
+    def set_lexical(self, index, lexical):
+        """
+        设置终结符节点的内容，按出现的顺序分配 token 下标
+        :param index: 节点编号
+        :param lexical: 内容
+        """
+        self.tokens[index] = len(self.lexicals)
+        self.lexicals.append(lexical)
+
+    def get_sign(self, index):
+        """
+        获取节点的符号
+        :param index: 节点编号
+        :return: 共享的 Sign 实例
+        """
+        return registry.signs[self.ids[index]]
+
+    def get_parent(self, index):
+        """
+        获取父节点
+        :param index: 节点编号
+        :return: 父节点编号，根节点返回 -1
+        """
+        return self.parents[index]
+
+    def get_children(self, index):
+        """
+        获取所有孩子
+        :param index: 节点编号
+        :return: 孩子编号列表
+        """
+        children = list()
+        child = self.first_children[index]
+        while child >= 0:
+            children.append(child)
+            child = self.next_siblings[child]
+        return children
+
+    def get_lexical(self, index):
+        """
+        获取节点的内容
+        :param index: 节点编号
+        :return: 内容，非终结符返回 None
+        """
+        token = self.tokens[index]
+        return self.lexicals[token] if token >= 0 else None
+
+    def get_attribute(self, index, name, default=None):
+        """
+        获取语义属性
+        :param index: 节点编号
+        :param name: 属性名
+        :param default: 没有设置时的值
+        :return: 属性值
+        """
+        table = self.attributes.get(name)
+        if table is None:
+            return default
+        return table.get(index, default)
+
+    def set_attribute(self, index, name, value):
+        """
+        设置语义属性，第一次设置某个属性时才建立它的旁表
+        :param index: 节点编号
+        :param name: 属性名
+        :param value: 属性值
+        """
+        table = self.attributes.get(name)
+        if table is None:
+            table = self.attributes[name] = dict()
+        table[index] = value
+
+    def iter_preorder(self):
+        """
+        先序遍历
+        :return: 节点编号生成器
+        """
+        if len(self.ids) == 0:
+            return
+        first_children = self.first_children
+        next_siblings = self.next_siblings
+        stack = [0]
+        while stack:
+            index = stack.pop()
+            yield index
+            child = first_children[index]
+            if child >= 0:
+                children = list()
+                while child >= 0:
+                    children.append(child)
+                    child = next_siblings[child]
+                children.reverse()
+                stack.extend(children)
+
+    def get_size(self):
+        """
+        估算占用的内存(不含 token 内容和属性值本身，它们与 Node 组成的语法树共享)
+        :return: 字节数
+        """
+        size = sys.getsizeof(self.ids) + sys.getsizeof(self.parents) + sys.getsizeof(self.first_children)
+        size += sys.getsizeof(self.next_siblings) + sys.getsizeof(self.tokens) + sys.getsizeof(self.lexicals)
+        size += sys.getsizeof(self.attributes)
+        for table in self.attributes.values():
+            size += sys.getsizeof(table)
+        return size
+
+    @classmethod
+    def from_tree(cls, tree):
+        """
+        从 Node 组成的语法树转换，终结符按先序遍历的顺序(也就是 token 的顺序)分配 token 下标
+        :param tree: 语法树
+        :return: 数组表示的语法树
+        """
+        arena = cls()
+        arena.add_root(tree.root.data.id)
+        stack = [(tree.root, 0)]
+        while stack:
+            node, index = stack.pop()
+            if node.lexical is not None:
+                arena.set_lexical(index, node.lexical)
+            for name, value in node.get_attributes():
+                arena.set_attribute(index, name, list(value) if type(value) is list else value)
+            children = node.children
+            if len(children) > 0:
+                first = arena.add_children(index, [child.data.id for child in children])
+                for i in range(len(children) - 1, -1, -1):
+                    stack.append((children[i], first + i))
+        return arena
+
+    def to_tree(self):
+        """
+        转换回 Node 组成的语法树
+        :return: 语法树，空的 arena 返回 None
+        """
+        if len(self.ids) == 0:
+            return None
+        signs = registry.signs
+        ids = self.ids
+        parents = self.parents
+        first_children = self.first_children
+        next_siblings = self.next_siblings
+        tokens = self.tokens
+        lexicals = self.lexicals
+        nodes = [None] * len(ids)
+        for index in range(len(ids)):
+            parent = parents[index]
+            if parent >= 0:
+                node = Node(signs[ids[index]], nodes[parent], index - first_children[parent])
+            else:
+                node = Node(signs[ids[index]])
+            token = tokens[index]
+            if token >= 0:
+                node.lexical = lexicals[token]
+            nodes[index] = node
+        # 同一个节点的孩子编号连续，直接切出孩子列表
+        for index in range(len(ids)):
+            first = first_children[index]
+            if first >= 0:
+                last = first
+                while next_siblings[last] >= 0:
+                    last = next_siblings[last]
+                nodes[index].children = nodes[first:last + 1]
+        for name, table in self.attributes.items():
+            for index, value in table.items():
+                setattr(nodes[index], name, list(value) if type(value) is list else value)
+        return Tree(nodes[0])
+
+    def to_bytes(self):
+        """
+        编码成二进制格式(见模块说明)，属性值只能是字符串、整数、布尔值和字符串列表
+        :return: 字节串
+        """
+        strings = list()
+        string_indexes = dict()
+        items = array('i')
+
+        def get_string_index(string):
+            index = string_indexes.get(string)
+            if index is None:
+                index = string_indexes[string] = len(strings)
+                strings.append(string)
+            return index
+
+        def get_string_indexes(value):
+            # 代码列表中的字符串大多已经在字符串表中，先整体查一遍，只逐个处理新的字符串
+            indexes = list(map(string_indexes.get, value))
+            if None in indexes:
+                for i, item in enumerate(value):
+                    if indexes[i] is None:
+                        if type(item) is not str:
+                            return None
+                        indexes[i] = get_string_index(item)
+            return indexes
+
+        attribute_sections = list()
+        for name, table in self.attributes.items():
+            indexes = array('i', table.keys())
+            tags = array('B')
+            values = array('q')
+            for value in table.values():
+                value_type = type(value)
+                item_indexes = get_string_indexes(value) if value_type is list else None
+                if value_type is str:
+                    tags.append(value_str)
+                    values.append(get_string_index(value))
+                elif value_type is bool:
+                    tags.append(value_bool)
+                    values.append(1 if value else 0)
+                elif value_type is int:
+                    tags.append(value_int)
+                    values.append(value)
+                elif item_indexes is not None:
+                    tags.append(value_list)
+                    values.append(len(items))
+                    items.append(len(value))
+                    items.extend(item_indexes)
+                else:
+                    raise ValueError('无法序列化的属性值: ' + name + ' = ' + repr(value))
+            attribute_sections.extend((column_to_bytes(indexes), column_to_bytes(tags), column_to_bytes(values)))
+
+        sections = [column_to_bytes(self.ids), column_to_bytes(self.parents), column_to_bytes(self.first_children),
+                    column_to_bytes(self.next_siblings), column_to_bytes(self.tokens), strings_to_bytes(self.lexicals),
+                    strings_to_bytes(list(self.attributes.keys())), strings_to_bytes(strings)]
+        sections.extend(attribute_sections)
+        sections.append(column_to_bytes(items))
+
+        parts = [struct.pack(header_format, serialize_magic, serialize_version, len(self.ids))]
+        for section in sections:
+            parts.append(struct.pack('<I', len(section)))
+            parts.append(section)
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        从 to_bytes 的结果解码
+        :param data: 字节串
+        :return: 数组表示的语法树
+        """
+        data = memoryview(data)
+        try:
+            magic, version, count = struct.unpack_from(header_format, data)
+            if magic != serialize_magic or version != serialize_version:
+                raise ValueError('语法树序列化格式错误')
+            sections = list()
+            position = struct.calcsize(header_format)
+            while position < len(data):
+                length, = struct.unpack_from('<I', data, position)
+                position += 4
+                if position + length > len(data):
+                    raise ValueError('语法树序列化格式错误')
+                sections.append(data[position:position + length])
+                position += length
+        except struct.error:
+            raise ValueError('语法树序列化格式错误')
+        if len(sections) < 9:
+            raise ValueError('语法树序列化格式错误')
+
+        arena = cls()
+        arena.ids = column_from_bytes('i', sections[0])
+        arena.parents = column_from_bytes('i', sections[1])
+        arena.first_children = column_from_bytes('i', sections[2])
+        arena.next_siblings = column_from_bytes('i', sections[3])
+        arena.tokens = column_from_bytes('i', sections[4])
+        for column in (arena.ids, arena.parents, arena.first_children, arena.next_siblings, arena.tokens):
+            if len(column) != count:
+                raise ValueError('语法树序列化格式错误')
+        arena.lexicals = strings_from_bytes(sections[5])
+        names = strings_from_bytes(sections[6])
+        strings = strings_from_bytes(sections[7])
+        if len(sections) != 9 + 3 * len(names):
+            raise ValueError('语法树序列化格式错误')
+        items = column_from_bytes('i', sections[-1])
+
+        for i, name in enumerate(names):
+            indexes = column_from_bytes('i', sections[8 + 3 * i])
+            tags = column_from_bytes('B', sections[9 + 3 * i])
+            values = column_from_bytes('q', sections[10 + 3 * i])
+            if len(indexes) != len(tags) or len(indexes) != len(values):
+                raise ValueError('语法树序列化格式错误')
+            table = dict()
+            try:
+                for index, tag, value in zip(indexes, tags, values):
+                    if tag == value_str:
+                        table[index] = strings[value]
+                    elif tag == value_int:
+                        table[index] = value
+                    elif tag == value_bool:
+                        table[index] = value != 0
+                    elif tag == value_list:
+                        table[index] = list(map(strings.__getitem__, items[value + 1:value + 1 + items[value]]))
+                    else:
+                        raise ValueError('语法树序列化格式错误')
+            except IndexError:
+                raise ValueError('语法树序列化格式错误')
+            arena.attributes[name] = table
+        return arena
+
+
+def build(tokens, source_file=None, pa_table=None):
+    """
+    语法分析，直接生成数组表示的语法树(不执行语义规则)，出错的位置和错误信息与 recognizer.recognize 相同
+    :param tokens: 词法分析结果(TokenStream 或 Token 列表)
+    :param source_file: 源文件(可以为空，为空时错误只有行数)
+    :param pa_table: 预测分析表，为空时使用进程内共享的预测分析表
+    :return: (数组表示的语法树, 错误)，出错时语法树为 None
+    """
+    if pa_table is None:
+        pa_table = syntax_module.get_shared_table()
+        if pa_table is None:
+            return None, syntax_module.shared_table_error or SyntaxRuleError('预测分析表编译失败')
+    kinds = get_kinds(tokens)
+    get_record = pa_table.get_record
+    non_terminal_start = registry.non_terminal_start
+    pound_id = registry.pound_id
+
+    arena = TreeArena()
+    ids = arena.ids
+    token_indexes = arena.tokens
+    count = len(kinds)
+    index = 0
+    lookahead = kinds[0] if count > 0 else pound_id
+    # 栈中存放节点编号，-1 表示 #
+    stack = [-1, arena.add_root(pa_table.get_start().id)]
+    while True:
+        node = stack.pop()
+        top = ids[node] if node >= 0 else pound_id
+        if top >= non_terminal_start:
+            record = get_record(top, lookahead)
+            if record is None:
+                break
+            if record.length > 0:
+                first = arena.add_children(node, record.right_ids)
+                stack.extend(range(first + record.length - 1, first - 1, -1))
+        elif top == lookahead:
+            if top == pound_id:
+                if hasattr(tokens, 'get_str'):
+                    arena.lexicals = [tokens.get_str(i) for i in range(count)]
+                else:
+                    arena.lexicals = [token.str for token in tokens]
+                return arena, None
+            token_indexes[node] = index
+            index += 1
+            lookahead = kinds[index] if index < count else pound_id
+        else:
+            break
+    return None, get_syntax_error(tokens, index, source_file)
@@ -0,0 +1,119 @@
+"""
+压缩的预测分析表
+大文法的预测分析表中绝大多数格子是空的，按行压缩:
+1. 每一行出现最多的产生式作为这一行的默认产生式，用一个终结符位集记录它出现在哪些列(查表结果与原表完全相同，不会推迟报错)
+2. 其余的格子按行位移(comb vector)叠放到同一个一维数组中，用 check 数组标记每个位置属于哪一行
+"""
+from array import array
+import sys
+
+
+class CompressedTable:
+    """
+    压缩的预测分析表，行和列都从 0 开始编号，格子中存放产生式的下标，-1 表示空
+    """
+    def __init__(self, row_count, column_count):
+        """
+        构造(空表)
+        :param row_count: 行数
+        :param column_count: 列数
+        """
+        self.row_count = row_count
+        self.column_count = column_count
+        # 每一行在 values 中的起始位置
+        self.bases = array('i', [0]) * row_count
+        # 叠放之后的格子和它所属的行
+        self.values = array('i')
+        self.checks = array('i')
+        # 每一行的默认产生式(-1 表示没有)和它出现的列
+        self.defaults = array('i', [-1]) * row_count
+        self.default_masks = [0] * row_count
+
+    @classmethod
+    def compress(cls, table, row_count, column_count):
+        """
+        压缩一张一维存放的稠密表
+        :param table: 下标为 行 * 列数 + 列 的数组
+        :param row_count: 行数
+        :param column_count: 列数
+        :return: 压缩的表
+        """
+        compressed = cls(row_count, column_count)
+        # 每一行需要叠放的格子
+        rows = list()
+        for row in range(row_count):
+            cells = list()
+            counts = dict()
+            for column in range(column_count):
+                value = table[row * column_count + column]
+                if value >= 0:
+                    cells.append((column, value))
+                    counts[value] = counts.get(value, 0) + 1
+            if len(counts) > 0:
+                default = max(counts, key=counts.get)
+                # 只出现一次的产生式放进默认位集没有好处
+                if counts[default] > 1:
+                    compressed.defaults[row] = default
+                    for column, value in cells:
+                        if value == default:
+                            compressed.default_masks[row] |= 1 << column
+                    cells = [(column, value) for column, value in cells if value != default]
+            if len(cells) > 0:
+                rows.append((row, cells))
+
+        # 格子多的行先放，每一行放到第一个不冲突的位置(first fit)
+        rows.sort(key=lambda item: -len(item[1]))
+        used = bytearray()
+        values = list()
+        checks = list()
+        first_free = 0
+        for row, cells in rows:
+            first_column = cells[0][0]
+            base = first_free - first_column
+            while True:
+                if all(base + column >= len(used) or not used[base + column] for column, _ in cells):
+                    break
+                base += 1
+            last = base + cells[-1][0]
+            if last >= len(used):
+                grow = last + 1 - len(used)
+                used.extend(bytes(grow))
+                values.extend([-1] * grow)
+                checks.extend([-1] * grow)
+            for column, value in cells:
+                used[base + column] = 1
+                values[base + column] = value
+                checks[base + column] = row
+            compressed.bases[row] = base
+            while first_free < len(used) and used[first_free]:
+                first_free += 1
+        compressed.values = array('i', values)
+        compressed.checks = array('i', checks)
+        return compressed
+
+    def get(self, row, column):
+        """
+        查表
+        :param row: 行
+        :param column: 列
+        :return: 产生式的下标，-1 表示空
+        """
+        position = self.bases[row] + column
+        if 0 <= position < len(self.checks) and self.checks[position] == row:
+            return self.values[position]
+        if self.default_masks[row] >> column & 1:
+            return self.defaults[row]
+        return -1
+
+    def get_size(self):
+        """
+        估算占用的内存
+        :return: 字节数
+        """
+        size = sys.getsizeof(self.bases) + sys.getsizeof(self.values) + sys.getsizeof(self.checks)
+        size += sys.getsizeof(self.defaults) + sys.getsizeof(self.default_masks)
+        for mask in self.default_masks:
+            # 小整数是共享的，只统计大于 256 的位集
+            if mask > 256:
+                size += sys.getsizeof(mask)
+        return size
@@ -0,0 +1,165 @@
+"""
+first 集和 follow 集
+文法用整数表示: 符号编号小于 terminal_count 的是终结符，其余是非终结符，产生式是 (左边的编号, [右边的编号])，空产生式右边为空列表
+终结符集合用整数位集表示(第 i 位对应编号为 i 的终结符)，空字单独用 nullable 表示
+三者都用依赖关系加工作表求不动点，每个符号的集合变大时只重新处理依赖它的符号，不需要反复遍历所有产生式
+"""
+
+
+def get_bit_indexes(bits):
+    """
+    列出位集中所有为 1 的位
+    :param bits: 位集
+    :return: 从小到大的下标
+    """
+    indexes = list()
+    while bits:
+        low = bits & -bits
+        indexes.append(low.bit_length() - 1)
+        bits ^= low
+    return indexes
+
+
+def calculate_nullable(symbol_count, terminal_count, grammar):
+    """
+    求所有能推导出空字的非终结符
+    每条产生式记录右边还有几个符号不能推导出空字，计数减到 0 时左边的非终结符就能推导出空字
+    :param symbol_count: 符号数量
+    :param terminal_count: 终结符数量
+    :param grammar: 产生式列表
+    :return: 下标为符号编号的 bool 列表
+    """
+    nullable = [False] * symbol_count
+    # 非终结符 -> 右边含有它的产生式(出现几次就记几次)
+    users = [list() for _ in range(symbol_count)]
+    remains = list()
+    work = list()
+    for i, (left, right) in enumerate(grammar):
+        count = 0
+        for sign in right:
+            if sign < terminal_count:
+                # 含有终结符的产生式不可能推导出空字
+                count = -1
+                break
+            count += 1
+        remains.append(count)
+        if count == 0 and not nullable[left]:
+            nullable[left] = True
+            work.append(left)
+        elif count > 0:
+            for sign in right:
+                users[sign].append(i)
+
+    while work:
+        sign = work.pop()
+        for i in users[sign]:
+            remains[i] -= 1
+            if remains[i] == 0:
+                left = grammar[i][0]
+                if not nullable[left]:
+                    nullable[left] = True
+                    work.append(left)
+    return nullable
+
+
+def propagate(sets, edges, work):
+    """
+    沿依赖关系传播位集直到不动点: 对于 edges[a] 中的每一个 b，sets[b] 包含 sets[a]
+    :param sets: 位集列表(就地修改)
+    :param edges: 依赖关系
+    :param work: 初始的工作表
+    """
+    queued = [False] * len(sets)
+    for sign in work:
+        queued[sign] = True
+    while work:
+        sign = work.pop()
+        queued[sign] = False
+        bits = sets[sign]
+        for target in edges[sign]:
+            merged = sets[target] | bits
+            if merged != sets[target]:
+                sets[target] = merged
+                if not queued[target]:
+                    queued[target] = True
+                    work.append(target)
+
+
+def calculate_firsts(symbol_count, terminal_count, grammar, nullable):
+    """
+    求所有符号的 first 集(不含空字)
+    :param symbol_count: 符号数量
+    :param terminal_count: 终结符数量
+    :param grammar: 产生式列表
+    :param nullable: calculate_nullable 的结果
+    :return: 下标为符号编号的位集列表，终结符的 first 集就是它自己
+    """
+    firsts = [0] * symbol_count
+    for sign in range(terminal_count):
+        firsts[sign] = 1 << sign
+    # 非终结符 -> 以它(或者它前面都能推导出空字)开头的产生式的左边
+    edges = [list() for _ in range(symbol_count)]
+    for left, right in grammar:
+        for sign in right:
+            if sign < terminal_count:
+                firsts[left] |= 1 << sign
+                break
+            if sign != left:
+                edges[sign].append(left)
+            if not nullable[sign]:
+                break
+
+    propagate(firsts, edges, [sign for sign in range(terminal_count, symbol_count) if firsts[sign]])
+    return firsts
+
+
+def calculate_follows(symbol_count, terminal_count, grammar, nullable, firsts, start, pound):
+    """
+    求所有非终结符的 follow 集
+    从右往左遍历每条产生式的右边，边走边累积后缀的 first 集，不需要为每一个后缀重新计算
+    :param symbol_count: 符号数量
+    :param terminal_count: 终结符数量
+    :param grammar: 产生式列表
+    :param nullable: calculate_nullable 的结果
+    :param firsts: calculate_firsts 的结果
+    :param start: 开始符号的编号
+    :param pound: 结束符 # 的编号
+    :return: 下标为符号编号的位集列表
+    """
+    follows = [0] * symbol_count
+    follows[start] |= 1 << pound
+    # 产生式左边 -> 处于右边末尾(之后都能推导出空字)的非终结符
+    edges = [list() for _ in range(symbol_count)]
+    for left, right in grammar:
+        suffix_first = 0
+        suffix_nullable = True
+        for sign in reversed(right):
+            if sign >= terminal_count:
+                follows[sign] |= suffix_first
+                if suffix_nullable and sign != left:
+                    edges[left].append(sign)
+                if nullable[sign]:
+                    suffix_first |= firsts[sign]
+                    continue
+            suffix_first = firsts[sign]
+            suffix_nullable = False
+
+    propagate(follows, edges, [sign for sign in range(terminal_count, symbol_count) if follows[sign]])
+    return follows
+
+
+def calculate_string_first(right, terminal_count, nullable, firsts):
+    """
+    求一串符号的 first 集
+    :param right: 符号编号列表
+    :param terminal_count: 终结符数量
+    :param nullable: calculate_nullable 的结果
+    :param firsts: calculate_firsts 的结果
+    :return: (first 集的位集, 能否推导出空字)
+    """
+    bits = 0
+    for sign in right:
+        bits |= firsts[sign]
+        if sign < terminal_count or not nullable[sign]:
+            return bits, False
+    return bits, True
@@ -0,0 +1,327 @@
+"""
+递归下降语法分析器的生成
+根据产生式和编译好的预测分析表生成一个 Python 模块，每个非终结符对应一个函数:
+按向前看符号的编号选择产生式，直接构造孩子节点，在 S、C、E 处直接调用语义规则类，不再查表，也不再按名字查找语义规则
+执行顺序与表驱动的 Syntax.execute 完全相同，生成的结果也完全相同
+产生式最后一个符号是非终结符时不递归，而是交给 expand 循环处理，列表之类的右递归不会让调用栈随源代码变深
+"""
+from syntax import registry
+from semantic import rule as semantic_rule
+import hashlib
+import importlib.util
+import os
+import sys
+import threading
+import types
+
+
+# 生成的代码的格式版本，改变生成的代码时递增
+generator_version = 5
+
+# semantic/rule.py 的哈希
+semantic_rule_hash = None
+
+# 已经载入的分析器模块: 哈希 -> 模块
+loaded_parsers = dict()
+loaded_parsers_lock = threading.Lock()
+
+
+# 生成的模块的开头: 运行时只依赖语法树节点、符号编号和语义规则类
+header = '''"""
+由 syntax/generator.py 根据 syntax/rule.py 生成的递归下降语法分析器，不要手动修改
+"""
+from syntax.syntax import Node, Tree
+from syntax.registry import signs
+import sys
+%(imports)s
+
+
+class Parser:
+    """
+    分析状态
+    """
+    def __init__(self, terminals, syntax_error):
+        """
+        构造
+        :param terminals: 输入的终结符迭代器(读完之后一直产生 #)
+        :param syntax_error: 根据出错的输入符号构造语法错误的函数
+        """
+        self.terminals = terminals
+        # 当前的向前看符号
+        self.token = next(terminals)
+        self.syntax_error = syntax_error
+        self.error = None
+        # 嵌套的层数和上限: 每层占两个栈帧，留出余量给语义规则和读取 token 的生成器，
+        # 保证超过递归深度时异常总是在分析函数中抛出，不会破坏输入的生成器
+        frame = sys._getframe()
+        used = 0
+        while frame is not None:
+            used += 1
+            frame = frame.f_back
+        self.depth = 0
+        self.max_depth = (sys.getrecursionlimit() - used - 100) // 2
+
+
+def expand(parser, parse, node):
+    """
+    展开一个非终结符节点
+    产生式最后一个符号是非终结符时，分析函数返回 (它的分析函数, 它的节点, 当前节点的 E 语义规则)，在这里循环展开
+    最后按从内到外的顺序执行推迟的 E 语义规则
+    :param parser: 分析状态
+    :param parse: 分析函数
+    :param node: 节点
+    :return: 是否成功
+    """
+    parser.depth += 1
+    if parser.depth > parser.max_depth:
+        raise RecursionError('嵌套层数过深')
+    ends = list()
+    while True:
+        result = parse(parser, node)
+        if result is None:
+            return False
+        if result is True:
+            break
+        parse, node, end = result
+        if end is not None:
+            ends.append(end)
+    for end in reversed(ends):
+        end.execute()
+        if end.errors:
+            parser.error = end.errors[-1]
+            return False
+    parser.depth -= 1
+    return True
+
+
+def parse(terminals, syntax_error):
+    """
+    语法分析
+    :param terminals: 输入的终结符迭代器(读完之后一直产生 #)
+    :param syntax_error: 根据出错的输入符号构造语法错误的函数
+    :return: (语法树, 错误)，出错时语法树为 None
+    """
+    parser = Parser(terminals, syntax_error)
+    tree = Tree(Node(signs[%(start)d]))
+    if not expand(parser, %(start_function)s, tree.root):
+        return None, parser.error
+    if parser.token.id != %(pound)d:
+        return None, syntax_error(parser.token)
+    return tree, None
+'''
+
+
+def get_function_name(sign_type):
+    """
+    获取非终结符对应的分析函数名
+    :param sign_type: 非终结符类型
+    :return: 函数名
+    """
+    return 'parse_' + sign_type.replace('-', '_')
+
+
+def get_parser_hash(pa_table):
+    """
+    计算生成的分析器的哈希(文法、语义规则和生成器的版本)
+    :param pa_table: 预测分析表
+    :return: 十六进制哈希串
+    """
+    global semantic_rule_hash
+    if semantic_rule_hash is None:
+        with open(semantic_rule.__file__, 'rb') as f:
+            semantic_rule_hash = hashlib.sha1(f.read()).hexdigest()
+    text = '%d\0%s\0%s' % (generator_version, pa_table.get_productions_hash(), semantic_rule_hash)
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def generate_rule_call(lines, indent, rule_class, node):
+    """
+    生成执行语义规则并检查错误的代码
+    :param lines: 代码行列表
+    :param indent: 缩进
+    :param rule_class: 语义规则类
+    :param node: 节点的变量名
+    """
+    lines.append(indent + 'rule = %s(%s)' % (rule_class.__name__, node))
+    lines.append(indent + 'rule.execute()')
+    lines.append(indent + 'if rule.errors:')
+    lines.append(indent + '    parser.error = rule.errors[-1]')
+    lines.append(indent + '    return None')
+
+
+def generate_production(lines, record, rule_classes):
+    """
+    生成展开一条产生式的代码
+    向前看符号放在局部变量 token 中，连续匹配终结符时不再读写 parser.token，只在展开非终结符和返回之前写回
+    :param lines: 代码行列表
+    :param record: 产生式的记录(语义规则的类已经解析好，数量也已经检查过)
+    :param rule_classes: 用到的语义规则类(用来生成 import)
+    """
+    indent = ' ' * 8
+    lines.append(indent + '# ' + record.production.str)
+
+    start = record.start
+    if start is not None:
+        rule_classes.add(start)
+        generate_rule_call(lines, indent, start, 'node')
+
+    # 按顺序构造所有的孩子节点
+    children = list()
+    for i, sign in enumerate(record.right):
+        child = 'child%d' % i
+        children.append(child)
+        lines.append(indent + '%s = Node(signs[%d], node, %d)' % (child, sign.id, i))
+    if len(children) > 0:
+        lines.append(indent + 'node.children = [%s]' % ', '.join(children))
+
+    end = record.end
+    if end is not None:
+        rule_classes.add(end)
+    child_rules = dict(record.pushes)
+    # token 是否比 parser.token 新(需要写回)，parser.token 是否比 token 新(需要重新读取)
+    dirty = False
+    stale = False
+    for i, sign in enumerate(record.right):
+        child = children[i]
+        child_rule = child_rules[i]
+        if child_rule is not None:
+            rule_classes.add(child_rule)
+            generate_rule_call(lines, indent, child_rule, child)
+        if sign.is_non_terminal_sign():
+            if dirty:
+                lines.append(indent + 'parser.token = token')
+                dirty = False
+            function = get_function_name(sign.type)
+            if i == record.length - 1:
+                # 最后一个符号，交给 expand 循环展开，E 语义规则推迟到它展开之后执行
+                lines.append(indent + 'return %s, %s, %s' % (
+                    function, child, '%s(node)' % end.__name__ if end is not None else 'None'))
+                return
+            lines.append(indent + 'if not expand(parser, %s, %s):' % (function, child))
+            lines.append(indent + '    return None')
+            stale = True
+        else:
+            if stale:
+                lines.append(indent + 'token = parser.token')
+                stale = False
+            # 第一个符号是终结符时，选择这条产生式的向前看符号就是它，不需要再检查
+            if i > 0:
+                lines.append(indent + 'if token.id != %d:' % sign.id)
+                lines.append(indent + '    parser.error = parser.syntax_error(token)')
+                lines.append(indent + '    return None')
+            lines.append(indent + '%s.lexical = token.str' % child)
+            lines.append(indent + 'token = next(parser.terminals)')
+            dirty = True
+
+    if dirty:
+        lines.append(indent + 'parser.token = token')
+    if end is not None:
+        generate_rule_call(lines, indent, end, 'node')
+    lines.append(indent + 'return True')
+
+
+def generate_parser_source(pa_table):
+    """
+    生成递归下降语法分析器的源代码
+    :param pa_table: 编译好的预测分析表
+    :return: 源代码
+    """
+    rule_classes = set()
+    functions = list()
+
+    for non_terminal_id in range(registry.non_terminal_start, len(registry.symbol_types)):
+        sign_type = registry.symbol_types[non_terminal_id]
+        # 产生式的下标 -> 选择它的终结符编号
+        choices = dict()
+        records = dict()
+        for terminal_id in range(registry.terminal_count):
+            record = pa_table.get_record(non_terminal_id, terminal_id)
+            if record is not None:
+                choices.setdefault(record.index, list()).append(terminal_id)
+                records[record.index] = record
+
+        lines = ['def %s(parser, node):' % get_function_name(sign_type),
+                 '    """',
+                 '    ' + sign_type,
+                 '    """',
+                 '    token = parser.token',
+                 '    kind = token.id']
+        for index in sorted(choices):
+            terminal_ids = choices[index]
+            if len(terminal_ids) == 1:
+                lines.append('    if kind == %d:' % terminal_ids[0])
+            else:
+                lines.append('    if kind in {%s}:' % ', '.join(str(i) for i in terminal_ids))
+            generate_production(lines, records[index], rule_classes)
+        lines.append('    parser.error = parser.syntax_error(token)')
+        lines.append('    return None')
+        functions.append('\n'.join(lines))
+
+    imports = list()
+    for module in sorted(set(rule_class.__module__ for rule_class in rule_classes)):
+        names = sorted(rule_class.__name__ for rule_class in rule_classes if rule_class.__module__ == module)
+        lines = [', '.join(names[i:i + 8]) for i in range(0, len(names), 8)]
+        imports.append('from %s import (\n    %s\n)' % (module, ',\n    '.join(lines)))
+    start = pa_table.get_start()
+    source = header % {
+        'imports': '\n'.join(imports),
+        'start': start.id,
+        'start_function': get_function_name(start.type),
+        'pound': registry.pound_id
+    }
+    return source + '\n\n' + '\n\n\n'.join(functions) + '\n'
+
+
+def load_parser(pa_table, cache_dir):
+    """
+    载入生成的分析器模块，源代码保存在缓存目录中，文法或语义规则改变时重新生成
+    :param pa_table: 编译好的预测分析表
+    :param cache_dir: 缓存目录，为 None 时只在内存中生成
+    :return: 模块
+    """
+    parser_hash = get_parser_hash(pa_table)
+    module = loaded_parsers.get(parser_hash)
+    if module is not None:
+        return module
+
+    with loaded_parsers_lock:
+        module = loaded_parsers.get(parser_hash)
+        if module is not None:
+            return module
+        name = 'syntax_parser_' + parser_hash
+        path = None
+        if cache_dir is not None:
+            path = os.path.join(cache_dir, 'syntax-parser-' + parser_hash + '.py')
+            if not os.path.exists(path):
+                try:
+                    os.makedirs(cache_dir, exist_ok=True)
+                    temp = path + '.' + str(os.getpid())
+                    with open(temp, 'w', encoding='utf-8') as f:
+                        f.write(generate_parser_source(pa_table))
+                    os.replace(temp, path)
+                except OSError:
+                    path = None
+        if path is not None:
+            spec = importlib.util.spec_from_file_location(name, path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        else:
+            module = types.ModuleType(name)
+            exec(compile(generate_parser_source(pa_table), '<' + name + '>', 'exec'), module.__dict__)
+        loaded_parsers[parser_hash] = module
+        return module
+
+
+def write_parser(pa_table, path):
+    """
+    把生成的分析器写到指定的文件(用来查看生成的代码)
+    :param pa_table: 编译好的预测分析表
+    :param path: 文件路径
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(generate_parser_source(pa_table))
+
+
+if __name__ == '__main__':
+    from syntax.syntax import get_shared_table
+    write_parser(get_shared_table(), sys.argv[1] if len(sys.argv) > 1 else 'parser_generated.py')
@@ -0,0 +1,102 @@
+"""
+只检查语法的识别器
+在符号编号上运行 LL(1) 分析，栈中只有整数，不建立语法树，不执行语义规则，只给出是否合法和第一个语法错误
+也可以作为命令行工具检查源文件(例如在 pre-commit 钩子中): python -m syntax.recognizer 文件...
+"""
+from syntax import registry
+from syntax import syntax as syntax_module
+from error import SyntaxError, SyntaxRuleError, SourceError
+import sys
+
+
+def recognize(tokens, source_file=None, pa_table=None):
+    """
+    检查 token 序列是否符合文法，出错的位置和错误信息与 Syntax.execute 报告的语法错误相同(语义错误不检查)
+    :param tokens: 词法分析结果(TokenStream 或 Token 列表)
+    :param source_file: 源文件(可以为空，为空时错误只有行数)
+    :param pa_table: 预测分析表，为空时使用进程内共享的预测分析表
+    :return: 错误，合法时返回 None
+    """
+    if pa_table is None:
+        pa_table = syntax_module.get_shared_table()
+        if pa_table is None:
+            return syntax_module.shared_table_error or SyntaxRuleError('预测分析表编译失败')
+    kinds = get_kinds(tokens)
+    get_record = pa_table.get_record
+    non_terminal_start = registry.non_terminal_start
+    pound_id = registry.pound_id
+
+    count = len(kinds)
+    index = 0
+    lookahead = kinds[0] if count > 0 else pound_id
+    stack = [pound_id, pa_table.get_start().id]
+    while True:
+        top = stack.pop()
+        if top >= non_terminal_start:
+            record = get_record(top, lookahead)
+            if record is None:
+                break
+            stack.extend(record.reversed_ids)
+        elif top == lookahead:
+            if top == pound_id:
+                return None
+            index += 1
+            lookahead = kinds[index] if index < count else pound_id
+        else:
+            break
+
+    return get_syntax_error(tokens, index, source_file)
+
+
+def get_kinds(tokens):
+    """
+    获取所有 token 的类型编号(也就是终结符的编号)，与 Syntax 一样，没有类型编号的 token 按类型查找
+    :param tokens: 词法分析结果(TokenStream 或 Token 列表)
+    :return: 类型编号序列
+    """
+    if hasattr(tokens, 'kinds'):
+        return tokens.kinds
+    return [token.kind if token.kind >= 0 else registry.get_symbol_id(token.type) for token in tokens]
+
+
+def get_syntax_error(tokens, index, source_file=None):
+    """
+    与 Syntax 一样根据出错的输入符号构造错误，输入已经结束时出错的是 #
+    :param tokens: 词法分析结果
+    :param index: 出错的 token 下标
+    :param source_file: 源文件(可以为空)
+    :return: 错误
+    """
+    if index >= len(tokens):
+        return SyntaxError('语法错误 ', -1)
+    token = tokens[index]
+    if source_file is not None and token.offset >= 0:
+        return SyntaxError.at('语法错误 ' + token.str, source_file, token.offset)
+    return SyntaxError('语法错误 ' + token.str, token.line)
+
+
+def main():
+    """
+    检查命令行给出的每一个源文件，全部合法时返回 0
+    :return: 退出码
+    """
+    from lexical.lexical import Lexical
+
+    status = 0
+    for path in sys.argv[1:]:
+        lexical = Lexical()
+        # 不映射文件，检查多个文件时不会留下没有关闭的映射
+        lexical.load_file(path, use_mmap=False)
+        if lexical.execute():
+            error = recognize(lexical.get_result(), lexical.get_source())
+        else:
+            error = lexical.get_error()
+        if error is not None:
+            status = 1
+            info = error.format(lexical.get_source()) if isinstance(error, SourceError) else error.info
+            print(path + ': ' + info)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+符号编号
+为终结符、空字和非终结符分配连续的整数编号，由 syntax/rule.py 在构造产生式之前调用 build 建立一次
+终结符按 lexical/rule.py 中 token 的顺序排在最前面，所以词法分析得到的 token 类型编号就是终结符的编号
+编号顺序: 终结符 | 空字 | 非终结符
+这个模块不导入其他模块，符号类型和 Sign 类都由 build 的参数给出
+"""
+
+
+# 编号 -> 符号类型
+symbol_types = list()
+# 符号类型 -> 编号
+symbol_ids = dict()
+# 每种符号共享的 Sign 实例(只有类型，没有内容和位置)
+signs = list()
+# 终结符数量
+terminal_count = 0
+# 空字的编号，比它小的是终结符，比它大的是非终结符
+empty_id = -1
+# 第一个非终结符的编号
+non_terminal_start = -1
+# 非终结符数量
+non_terminal_count = 0
+# 结束符 # 的编号
+pound_id = -1
+# 符号类
+sign_class = None
+
+
+def build(token_types, terminal_types, non_terminal_types, sign):
+    """
+    分配编号
+    :param token_types: 词法分析的 token 类型列表(按类型编号排列)
+    :param terminal_types: 终结符类型列表
+    :param non_terminal_types: 非终结符类型列表
+    :param sign: 符号类，用来构造每种符号共享的实例
+    """
+    global terminal_count, empty_id, non_terminal_start, non_terminal_count, pound_id, sign_class
+    sign_class = sign
+
+    symbol_types.clear()
+    for t in token_types:
+        symbol_types.append(t)
+    for t in terminal_types:
+        if t not in symbol_types:
+            symbol_types.append(t)
+    terminal_count = len(symbol_types)
+    symbol_types.append('empty')
+    for t in non_terminal_types:
+        symbol_types.append(t)
+
+    symbol_ids.clear()
+    for i, t in enumerate(symbol_types):
+        symbol_ids[t] = i
+    empty_id = terminal_count
+    non_terminal_start = empty_id + 1
+    non_terminal_count = len(symbol_types) - non_terminal_start
+    pound_id = symbol_ids['pound']
+
+    signs.clear()
+    for i, t in enumerate(symbol_types):
+        signs.append(sign_class(t, sign_id=i))
+
+
+def get_symbol_id(sign_type):
+    """
+    获取符号类型的编号
+    :param sign_type: 符号类型
+    :return: 编号，未知的类型返回 -1
+    """
+    return symbol_ids.get(sign_type, -1)
+
+
+def get_sign(sign_type):
+    """
+    获取符号类型共享的 Sign 实例
+    :param sign_type: 符号类型
+    :return: Sign，未知的类型返回一个新的 Sign(编号为 -1)
+    """
+    if sign_type in symbol_ids:
+        return signs[symbol_ids[sign_type]]
+    return sign_class(sign_type)
@@ -1,47 +1,46 @@
+from lexical.rule import token_type
+from syntax import registry
+
+
 class Sign:
     """
     符号
     """
-    def __init__(self, sign_type, sign_str='', sign_line=-1):
+    def __init__(self, sign_type, sign_str='', sign_line=-1, sign_offset=-1, sign_id=None):
         """
         构造
         :param sign_type: 符号的类型
         :param sign_str: 符号的内容(可以为空)
         :param sign_line: 符号所在行数(可以为空)
+        :param sign_offset: 符号在源文件中的偏移量(可以为空)
+        :param sign_id: 符号的编号(可以为空，为空时根据类型查找，见 syntax/registry.py)
         """
         self.type = sign_type
         self.str = sign_str
         self.line = sign_line
+        self.offset = sign_offset
+        self.id = registry.get_symbol_id(sign_type) if sign_id is None else sign_id
 
     def is_terminal_sign(self):
         """
         是不是终结符
         :return: True/False
         """
-        if self.type == 'empty':
-            return True
-        else:
-            for i in terminal_sign_type:
-                if i == self.type:
-                    return True
-            return False
+        return 0 <= self.id <= registry.empty_id
 
     def is_non_terminal_sign(self):
         """
         是不是非终结符
         :return: True/False
         """
-        for i in non_terminal_sign_type:
-            if i == self.type:
-                return True
-        return False
+        return self.id > registry.empty_id
 
     def is_empty_sign(self):
         """
         是不是空字
         :return: True/False
         """
-        return self.type == 'empty'
+        return self.id == registry.empty_id
 
 
 class Production:
@@ -57,10 +56,10 @@ class Production:
         :param semantic_children: 语义操作关键字 - 孩子
         :param semantic_end: 语义操作关键字 - 结束
         """
-        self.left = Sign(left_type)
+        self.left = registry.get_sign(left_type)
         self.right = list()
         for i in right_types:
-            self.right.append(Sign(i))
+            self.right.append(registry.get_sign(i))
 
         # 调试用的
         self.str = self.left.type + ' ->'
@@ -240,6 +239,9 @@ non_terminal_sign_type = [
     'arg-list-follow'
 ]
 
+# 根据上面的符号类型分配编号，必须在构造产生式之前完成
+registry.build(token_type, terminal_sign_type, non_terminal_sign_type, Sign)
+
 # 文法产生式
 productions = [
     # 0
@@ -454,4 +456,4 @@ productions = [
 ]
 
 # 文法开始符号
-grammar_start = Sign('program')
\ No newline at end of file
+grammar_start = registry.get_sign('program')
\ No newline at end of file
@@ -1,42 +1,117 @@
 """
 语法分析
 """
-from syntax.rule import Sign, Production, terminal_sign_type, non_terminal_sign_type, productions, grammar_start
+from syntax.rule import Sign, non_terminal_sign_type, productions, grammar_start
+from syntax import registry
+from syntax.compress import CompressedTable
+from syntax.generator import load_parser
+from syntax.first_follow import get_bit_indexes, calculate_nullable, calculate_firsts, calculate_follows, \
+    calculate_string_first
 from error import SyntaxRuleError, SyntaxError, SemanticRuleError
-from semantic.rule import SemanticRule, SemanticError, SemanticRuleFactory
+from semantic.rule import SemanticRule, SemanticRuleFactory
+from semantic import code as semantic_code
+from array import array
+import builtins
+import hashlib
+import importlib.util
+import itertools
+import os
+import py_compile
+import sys
+import threading
+
+
+# 编译好的预测分析表和生成的语法分析器的缓存目录
+default_cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '__pycache__')
+
+# 预测分析表缓存模块的格式版本，改变缓存的内容时递增，使旧缓存失效
+table_cache_version = 1
+
+# 预测分析表缓存模块的内容: 只有常量，导入时 Python 直接使用编译好的 .pyc
+table_cache_template = '''"""
+由 syntax/syntax.py 根据 syntax/rule.py 编译的预测分析表，不要手动修改
+"""
+productions_hash = %(productions_hash)r
+itemsize = %(itemsize)d
+table = %(table)r
+firsts = %(firsts)r
+follows = %(follows)r
+'''
+
+
+class ProductionRecord:
+    """
+    预测分析表中一条产生式的记录(只读)，载入文法时建好，分析时直接使用
+    其中的执行计划: 语义规则的类已经按关键字解析好，孩子节点和语义规则的入栈顺序也已经排好
+    """
+    __slots__ = ('index', 'production', 'left', 'right', 'right_ids', 'reversed_ids', 'length', 'valid', 'start', 'end',
+                 'pushes')
+
+    def __init__(self, index, production):
+        """
+        构造
+        :param index: 产生式的下标
+        :param production: 产生式
+        """
+        self.index = index
+        self.production = production
+        # 左边的编号
+        self.left = production.left.id
+        # 右边的符号和编号
+        self.right = tuple(production.right)
+        self.right_ids = tuple(sign.id for sign in production.right)
+        # 按入栈顺序(反序)排列的右边的编号，只检查语法时使用
+        self.reversed_ids = self.right_ids[::-1]
+        self.length = len(self.right)
+        # 语义规则数量与产生式右边数量是否一致
+        self.valid = self.length == len(production.semantic_children)
+        # S、E 语义规则的类(没有时为 None)
+        self.start = SemanticRuleFactory.get_class(production.semantic_start)
+        self.end = SemanticRuleFactory.get_class(production.semantic_end)
+        # 按入栈顺序(反序)排列的 (孩子的下标, C 语义规则的类)
+        pushes = list()
+        if self.valid:
+            for i in range(self.length - 1, -1, -1):
+                pushes.append((i, SemanticRuleFactory.get_class(production.semantic_children[i])))
+        self.pushes = tuple(pushes)
 
 
 class PredictingAnalysisTable:
     """
     预测分析表
     """
-    def __init__(self):
+    def __init__(self, grammar_productions=None, start=None, compressed=False):
         """
         构造
+        :param grammar_productions: 产生式列表，为空时使用 syntax/rule.py 中的文法
+        :param start: 文法开始符号，为空时使用 syntax/rule.py 中的开始符号
+        :param compressed: 编译之后是否压缩预测分析表(见 syntax/compress.py)，适用于很大的文法
         """
         # 错误
         self.__error = None
 
-        # 预测分析表
-        self.__table = list()
+        # 文法
+        self.__productions = productions if grammar_productions is None else grammar_productions
+        self.__start = grammar_start if start is None else start
+        self.__productions_hash = None
+
+        # 预测分析表: 下标为 非终结符的编号 * 终结符数量 + 终结符的编号 - 偏移量 的一维数组，存放产生式的下标，-1 表示空
+        self.__terminal_count = registry.terminal_count
+        self.__offset = registry.non_terminal_start * registry.terminal_count
+        self.__table = array('i', [-1]) * (registry.non_terminal_count * registry.terminal_count)
+        # 每条产生式的记录，最后多放一个 None，让 -1 直接取到 None
+        self.__records = [ProductionRecord(i, production) for i, production in enumerate(self.__productions)]
+        self.__records.append(None)
+        # 压缩的预测分析表，压缩之后不再保留一维数组
+        self.__compressed = compressed
+        self.__compressed_table = None
 
         # 所有的非终结符
         self.__non_terminal_signs = list()
-        # 所有的终结符
-        self.__terminal_signs = list()
 
         # 载入所有的符号
         for i in non_terminal_sign_type:
-            self.__non_terminal_signs.append(Sign(i))
-        for i in terminal_sign_type:
-            self.__terminal_signs.append(Sign(i))
-
-        # 根据非终结符和终结符的数量为预测分析表分配空间，并且为每一个格子预先填上 None
-        for i in non_terminal_sign_type:
-            self.__table.append(list())
-        for i in range(0, len(non_terminal_sign_type)):
-            for j in terminal_sign_type:
-                self.__table[i].append(None)
+            self.__non_terminal_signs.append(registry.get_sign(i))
 
         # 为每一个非终结符建立 first 集和 follow 集
         self.__firsts = list()
@@ -47,18 +122,175 @@ class PredictingAnalysisTable:
             self.__firsts.append(list())
             self.__follows.append(list())
 
+        # 整数表示的文法，以及按符号编号排列的 nullable、first 集和 follow 集的位集(见 syntax/first_follow.py)
+        self.__grammar = list()
+        self.__nullable = list()
+        self.__first_bits = list()
+        self.__follow_bits = list()
+        # 错误恢复使用的同步符号集合(第一次使用时由 follow 集生成)
+        self.__sync_sets = None
+
     def compile(self):
         """
         编译预测分析表
         """
+        # 检查语义规则
+        if not self.__check_semantic_rules():
+            return False
+        # 把产生式转换成整数表示的文法
+        if not self.__build_grammar():
+            return False
         # 对每一个文法元素求其 first 集
         self.__calculate_firsts()
         # 对每一个文法元素求其 follow 集
         self.__calculate_follows()
         # 根据 first 集和 follow 集生成预测分析表
         success = self.__generate_table()
+        if success and self.__compressed:
+            self.__compress()
         return success
 
+    def __compress(self):
+        """
+        压缩预测分析表
+        """
+        self.__compressed_table = CompressedTable.compress(self.__table, registry.non_terminal_count,
+                                                           self.__terminal_count)
+        self.__table = None
+
+    def get_table_size(self):
+        """
+        估算预测分析表占用的内存(不含产生式本身)
+        :return: 字节数
+        """
+        if self.__compressed_table is not None:
+            return self.__compressed_table.get_size()
+        return sys.getsizeof(self.__table)
+
+    def get_productions_hash(self):
+        """
+        计算文法的哈希(符号编号、开始符号和所有产生式，syntax/rule.py 改变时随之改变)
+        :return: 十六进制哈希串
+        """
+        if self.__productions_hash is not None:
+            return self.__productions_hash
+        grammar = [registry.symbol_types, self.__start.type]
+        for production in self.__productions:
+            grammar.append([production.left.type, [sign.type for sign in production.right],
+                            production.semantic_start, production.semantic_children, production.semantic_end])
+        self.__productions_hash = hashlib.sha1(repr(grammar).encode()).hexdigest()
+        return self.__productions_hash
+
+    def load(self, cache_dir=default_cache_dir):
+        """
+        载入预测分析表，优先导入缓存目录中编译好的表(一个只含常量的 Python 模块)，
+        缓存不存在或已过期时重新编译并写回；文法(syntax/rule.py)改变时哈希随之改变，旧缓存自动失效
+        :param cache_dir: 缓存目录，为 None 时不使用缓存
+        :return: 是否成功
+        """
+        if not self.__check_semantic_rules():
+            return False
+        path = None
+        if cache_dir is not None:
+            name = 'syntax-table-%d-%s' % (table_cache_version, self.get_productions_hash())
+            path = os.path.join(cache_dir, name + '.py')
+            try:
+                spec = importlib.util.spec_from_file_location(name.replace('-', '_'), path)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                if self.__restore(module):
+                    # 设置了 PYTHONDONTWRITEBYTECODE 时导入不会写 .pyc，补上之后不必每次重新编译模块
+                    if not os.path.exists(spec.cached):
+                        py_compile.compile(path)
+                    return True
+            # 本模块的 SyntaxError 是语法分析错误，缓存模块损坏时抛出的是内置的 SyntaxError
+            except (OSError, builtins.SyntaxError, ValueError, AttributeError):
+                pass
+
+        if not self.compile():
+            return False
+
+        if path is not None:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                temp = path + '.' + str(os.getpid())
+                with open(temp, 'w', encoding='utf-8') as f:
+                    f.write(self.__dump())
+                os.replace(temp, path)
+                py_compile.compile(path)
+            except OSError:
+                pass
+        return True
+
+    def __dump(self):
+        """
+        导出编译结果: 一维数组的字节、first 集和 follow 集中的符号编号
+        :return: 缓存模块的源代码
+        """
+        table = self.__table
+        if table is None:
+            table = array('i', (self.__compressed_table.get(x, y) for x in range(0, registry.non_terminal_count)
+                                for y in range(0, self.__terminal_count)))
+        return table_cache_template % {
+            'productions_hash': self.get_productions_hash(),
+            'itemsize': table.itemsize,
+            'table': table.tobytes(),
+            'firsts': [[sign.id for sign in first] for first in self.__firsts],
+            'follows': [[sign.id for sign in follow] for follow in self.__follows]
+        }
+
+    def __restore(self, module):
+        """
+        从缓存模块恢复编译结果
+        :param module: 缓存模块
+        :return: 内容是否与当前的文法一致
+        """
+        if module.productions_hash != self.get_productions_hash() or module.itemsize != self.__table.itemsize:
+            return False
+        table = array('i')
+        table.frombytes(module.table)
+        if len(table) != len(self.__table) or min(table) < -1 or max(table) >= len(self.__productions):
+            return False
+        if len(module.firsts) != len(self.__firsts) or len(module.follows) != len(self.__follows):
+            return False
+        signs = registry.signs
+        self.__table = table
+        self.__firsts = [[signs[i] for i in first] for first in module.firsts]
+        self.__follows = [[signs[i] for i in follow] for follow in module.follows]
+        if self.__compressed:
+            self.__compress()
+        return True
+
+    def get_error(self):
+        """
+        获取错误
+        :return: 错误
+        """
+        return self.__error
+
+    def get_sync_set(self, non_terminal_id):
+        """
+        获取错误恢复时非终结符的同步符号集合(它的 follow 集)
+        :param non_terminal_id: 非终结符的编号
+        :return: 终结符编号的位集
+        """
+        if self.__sync_sets is None:
+            sync_sets = list()
+            for follow in self.__follows:
+                bits = 0
+                for sign in follow:
+                    bits |= 1 << sign.id
+                sync_sets.append(bits)
+            self.__sync_sets = sync_sets
+        return self.__sync_sets[non_terminal_id - registry.non_terminal_start]
+
+    def get_start(self):
+        """
+        获取文法开始符号
+        :return: 开始符号
+        """
+        return self.__start
+
     def get_production(self, non_terminal_sign, terminal_sign):
         """
         从预测分析表中获取产生式
@@ -68,23 +300,27 @@ class PredictingAnalysisTable:
         """
         x = self.__get_non_terminal_sign_index(non_terminal_sign)
         y = self.__get_terminal_sign_index(terminal_sign)
-        return self.__table[x][y]
+        if x < 0 or y < 0:
+            return None
+        if self.__compressed_table is not None:
+            index = self.__compressed_table.get(x, y)
+        else:
+            index = self.__table[x * self.__terminal_count + y]
+        return self.__productions[index] if index >= 0 else None
 
-    @classmethod
-    def __set_add(cls, container, sign):
+    def get_record(self, non_terminal_id, terminal_id):
         """
-        将 sign 添加到 container 中并返回 True，如果其中已经有该元素了则返回 False
-        :param container: 要添加到的集合
-        :param sign: 符号
-        :return: 添加是否成功
+        从预测分析表中获取产生式的记录，分析时使用，只做一次下标计算
+        :param non_terminal_id: 非终结符的编号(必须是非终结符)
+        :param terminal_id: 终结符的编号
+        :return: 产生式的记录，表中为空或者终结符的编号不合法时返回 None
         """
-        exist = False
-        for elem in container:
-            if elem.type == sign.type:
-                exist = True
-        if not exist:
-            container.append(sign)
-        return not exist
+        if 0 <= terminal_id < self.__terminal_count:
+            if self.__compressed_table is not None:
+                row = non_terminal_id - registry.non_terminal_start
+                return self.__records[self.__compressed_table.get(row, terminal_id)]
+            return self.__records[self.__table[non_terminal_id * self.__terminal_count + terminal_id - self.__offset]]
+        return None
 
     def __get_terminal_sign_index(self, terminal_sign):
         """
@@ -92,9 +328,8 @@ class PredictingAnalysisTable:
         :param terminal_sign: 终结符
         :return: 索引(寻找失败返回 -1)
         """
-        for i in range(0, len(self.__terminal_signs)):
-            if terminal_sign.type == self.__terminal_signs[i].type:
-                return i
+        if 0 <= terminal_sign.id < registry.terminal_count:
+            return terminal_sign.id
         return -1
 
     def __get_non_terminal_sign_index(self, non_terminal_sign):
@@ -103,377 +338,129 @@ class PredictingAnalysisTable:
         :param non_terminal_sign: 非终结符
         :return: 索引(寻找失败返回 -1)
         """
-        for i in range(0, len(self.__non_terminal_signs)):
-            if non_terminal_sign.type == self.__non_terminal_signs[i].type:
-                return i
+        if non_terminal_sign.id >= registry.non_terminal_start:
+            return non_terminal_sign.id - registry.non_terminal_start
         return -1
 
-    def __get_non_terminal_sign_first(self, non_terminal_sign):
-        """
-        获取目标非终结符的 first 集的引用
-        :param non_terminal_sign: 目标非终结符
-        :return: 其 first 集的引用
+    def __check_semantic_rules(self):
         """
-        return self.__firsts[self.__get_non_terminal_sign_index(non_terminal_sign)]
-
-    def __get_non_terminal_sign_first_no_empty(self, non_terminal_sign):
+        检查每条产生式的语义规则数量是否与产生式右边数量一致
+        :return: 是否一致
         """
-        获取目标非终结符的 first 集的非空拷贝
-        :param non_terminal_sign: 目标非终结符
-        :return: 其 first 集的非空拷贝
-        """
-        result = list()
-        for i in self.__get_non_terminal_sign_first(non_terminal_sign):
-            if not i.is_empty_sign():
-                result.append(i)
-        return result
+        for record in self.__records[:-1]:
+            if not record.valid:
+                self.__error = SemanticRuleError('语义规则数量与产生式右边数量不一致 ' + record.production.str)
+                return False
+        return True
 
-    def __is_empty_in_non_terminal_sign_first(self, non_terminal_sign):
+    def __build_grammar(self):
         """
-        目标非终结符的 first 集中是否有空字
-        :param non_terminal_sign: 目标非终结符
-        :return: True/False
+        把产生式转换成整数表示的文法
+        :return: 所有符号的类型是否正确
         """
-        for i in self.__get_non_terminal_sign_first(non_terminal_sign):
-            if i.is_empty_sign():
-                return True
-        return False
+        self.__grammar = list()
+        symbol_count = len(registry.symbol_types)
+        for production in self.__productions:
+            if not registry.non_terminal_start <= production.left.id < symbol_count:
+                self.__error = SyntaxRuleError('终结符或非终结符类型错误')
+                return False
+            right = list()
+            for sign in production.right:
+                if not 0 <= sign.id < symbol_count or sign.is_empty_sign():
+                    self.__error = SyntaxRuleError('终结符或非终结符类型错误')
+                    return False
+                right.append(sign.id)
+            self.__grammar.append((production.left.id, right))
+        return True
 
-    def __get_non_terminal_sign_follow(self, non_terminal_sign):
+    @classmethod
+    def __get_signs(cls, bits, empty=False):
         """
-        获取非终结符的 follow 集
-        :param non_terminal_sign: 非终结符
-        :return: 其 follow 集
+        把终结符的位集转换成符号列表
+        :param bits: 位集
+        :param empty: 是否加上空字
+        :return: 按编号排列的符号列表
         """
-        return self.__follows[self.__get_non_terminal_sign_index(non_terminal_sign)]
+        signs = [registry.signs[i] for i in get_bit_indexes(bits)]
+        if empty:
+            signs.append(registry.signs[registry.empty_id])
+        return signs
 
     def __calculate_firsts(self):
         """
         求所有的 first 集
         """
-        # 立一个 flag，用来标志 firsts 集是否增大
-        flag = True
-        # 开始循环
-        while flag:
-            flag = False
-            # 在每一次循环之中遍历所有产生式
-            for production in productions:
-                # 如果产生式右边为空
-                if len(production.right) == 0:
-                    # 将空字加入其 first 集
-                    if self.__set_add(self.__get_non_terminal_sign_first(production.left), Sign('empty')):
-                        flag = True
-                # 如果产生式右边不为空
-                else:
-                    # 如果是以终结符开头，将终结符添加到其 first 集
-                    if production.right[0].is_terminal_sign():
-                        if self.__set_add(self.__get_non_terminal_sign_first(production.left), production.right[0]):
-                            flag = True
-                    # 如果是以非终结符开头
-                    elif production.right[0].is_non_terminal_sign():
-                        # (1) 将开头非终结符的 first 集中的所有非空元素添加到产生式左边非终结符的 first 集中
-                        bigger = False
-                        for i in self.__get_non_terminal_sign_first_no_empty(production.right[0]):
-                            if self.__set_add(self.__get_non_terminal_sign_first(production.left), i):
-                                bigger = True
-                        if bigger:
-                            flag = True
-
-                        # (2) 从第一个非终结符开始循环，如果其 first 集中包含空字，那么将它下一个符号的 first
-                        # 集添加到产生式左边非终结符的 first 集中去
-                        for i in range(0, len(production.right)):
-                            if production.right[i].is_non_terminal_sign():
-                                # 如果包含空字
-                                if self.__is_empty_in_non_terminal_sign_first(production.right[i]):
-                                    # 如果它是最后一个，将空字填入
-                                    if i == len(production.right) - 1:
-                                        if self.__set_add(self.__get_non_terminal_sign_first(production.left),
-                                                          Sign('empty')):
-                                            flag = True
-                                    # 如果不是最后一个
-                                    else:
-                                        # 如果它之后是终结符
-                                        if production.right[i + 1].is_terminal_sign():
-                                            if self.__set_add(self.__get_non_terminal_sign_first(production.left),
-                                                              production.right[i + 1]):
-                                                flag = True
-                                        # 如果它之后是非终结符
-                                        elif production.right[i + 1].is_non_terminal_sign():
-                                            bigger = False
-                                            for j in self.__get_non_terminal_sign_first_no_empty(
-                                                    production.right[i + 1]):
-                                                if self.__set_add(
-                                                        self.__get_non_terminal_sign_first(production.left), j):
-                                                    bigger = True
-                                            if bigger:
-                                                flag = True
-                                        else:
-                                            self.__error = SyntaxRuleError('终结符或非终结符类型错误')
-                                            return False
-                                # 如果不包含空字
-                                else:
-                                    break
-                            else:
-                                break
-                    # 否则报错
-                    else:
-                        self.__error = SyntaxRuleError('终结符或非终结符类型错误')
-                        return False
+        symbol_count = len(registry.symbol_types)
+        self.__nullable = calculate_nullable(symbol_count, registry.terminal_count, self.__grammar)
+        self.__first_bits = calculate_firsts(symbol_count, registry.terminal_count, self.__grammar, self.__nullable)
+        for i, sign in enumerate(self.__non_terminal_signs):
+            self.__firsts[i] = self.__get_signs(self.__first_bits[sign.id], self.__nullable[sign.id])
 
     def __calculate_follows(self):
         """
         求所有的 follow 集
         """
-        first = list()
-        flag = True
-        while flag:
-            flag = False
-            # 遍历所有产生式
-            for production in productions:
-                # 如果产生式左边是开始符号
-                if production.left.type == grammar_start.type:
-                    if self.__set_add(self.__get_non_terminal_sign_follow(production.left), Sign('pound')):
-                        flag = True
-
-                # 遍历产生式右边
-                for i in range(0, len(production.right)):
-                    # 如果是非终结符
-                    if production.right[i].is_non_terminal_sign():
-                        # 如果它是产生式最后一个符号
-                        if i == len(production.right) - 1:
-                            # 将产生式左边非终结符的 follow 集添加到这个符号的 follow 集中
-                            bigger = False
-                            for j in self.__get_non_terminal_sign_follow(production.left):
-                                if self.__set_add(self.__get_non_terminal_sign_follow(production.right[i]), j):
-                                    bigger = True
-                            if bigger:
-                                flag = True
-                        # 否则观察其之后的元素
-                        else:
-                            # 求他之后所有符号集合的 first 集
-                            first.clear()
-                            first += self.__calculate_set_first(production.right[i + 1:])
-                            # (1) 将 first 中所有非空元素填入 follow
-                            empty_find = False
-                            for f in first:
-                                if not f.is_empty_sign():
-                                    self.__set_add(self.__get_non_terminal_sign_follow(production.right[i]), f)
-                                else:
-                                    empty_find = True
-
-                            # (2) 如果 first 中含有空
-                            if empty_find:
-                                # 将产生式左边非终结符的 follow 集添加到这个符号的 follow 集中
-                                bigger = False
-                                for j in self.__get_non_terminal_sign_follow(production.left):
-                                    if self.__set_add(self.__get_non_terminal_sign_follow(production.right[i]), j):
-                                        bigger = True
-                                if bigger:
-                                    flag = True
-
-                            # # 如果他后面是一个终结符
-                            # if production.right[i + 1].is_terminal_sign():
-                            #     if self.__set_add(self.__get_non_terminal_sign_follow(production.right[i]),
-                            #                       production.right[i + 1]):
-                            #         flag = True
-                            # # 如果他后面是一个非终结符
-                            # elif production.right[i + 1].is_non_terminal_sign():
-                            #     # (1) 将后面非终结符的 first 集中的所有非空元素填入
-                            #     bigger = False
-                            #     for j in self.__get_non_terminal_sign_first_no_empty(production.right[i + 1]):
-                            #         if self.__set_add(self.__get_non_terminal_sign_follow(production.right[i]), j):
-                            #             bigger = True
-                            #     if bigger:
-                            #         flag = True
-                            #
-                            #     # (2) 如果后面所有的非终结符 first 集都包含空
-                            #     # 那么，则将产生式左边的 follow 集添加到该非终结符的 follow 集中去
-                            #     all_empty_in_first = True
-                            #     for j in range(i + 1, len(production.right)):
-                            #         if not self.__is_empty_in_non_terminal_sign_first(production.right[j]):
-                            #             all_empty_in_first = False
-                            #             break
-                            #     if all_empty_in_first:
-                            #         bigger = False
-                            #         for j in self.__get_non_terminal_sign_follow(production.left):
-                            #             if self.__set_add(self.__get_non_terminal_sign_follow(production.right[i]), j):
-                            #                 bigger = True
-                            #         if bigger:
-                            #             flag = True
-                            # # 否则报错
-                            # else:
-                            #     self.__error = SyntaxRuleError('终结符或非终结符类型错误')
-                            #     return False
-                    # 如果是终结符
-                    elif production.right[i].is_terminal_sign():
-                        continue
-                    # 否则报错
-                    else:
-                        self.__error = SyntaxRuleError('终结符或非终结符类型错误')
-                        return False
+        self.__follow_bits = calculate_follows(len(registry.symbol_types), registry.terminal_count, self.__grammar,
+                                               self.__nullable, self.__first_bits, self.__start.id, registry.pound_id)
+        for i, sign in enumerate(self.__non_terminal_signs):
+            self.__follows[i] = self.__get_signs(self.__follow_bits[sign.id])
 
-    def __calculate_set_first(self, container):
+    def __calculate_set_first(self, right):
         """
         计算一系列符号的 first 集
-        :param container: 符号集合
-        :return: first 集
+        :param right: 符号编号列表
+        :return: (first 集的位集, 能否推导出空字)
         """
-        first = list()
-
-        # 开始求 first 集
-        # 如果集合为空
-        first = list()
-
-        # 开始求 first 集
-        # 如果产生式右边为空
-        if len(container) == 0:
-            # 将空字加入其 first 集
-            self.__set_add(first, Sign('empty'))
-        # 如果产生式右边补位空
-        else:
-            # 如果是以终结符开头，将终结符添加到 first 集
-            if container[0].is_terminal_sign():
-                self.__set_add(first, container[0])
-            # 如果是以非终结符开头
-            elif container[0].is_non_terminal_sign():
-                # (1) 将开头非终结符的 first 集中的所有非空元素添加到 first 中
-                for i in self.__get_non_terminal_sign_first_no_empty(container[0]):
-                    self.__set_add(first, i)
-
-                # (2) 从第一个非终结符开始循环，如果其 first 集中包含空字，那么将它的下一个符号的 first
-                # 集添加到 first 中
-                for i in range(0, len(container)):
-                    if container[i].is_non_terminal_sign():
-                        # 如果包含空字
-                        if self.__is_empty_in_non_terminal_sign_first(container[i]):
-                            # 如果它是最后一个，将空字填入
-                            if i == len(container) - 1:
-                                self.__set_add(first, Sign('empty'))
-                            # 如果不是最后一个
-                            else:
-                                # 如果它之后是终结符
-                                if container[i + 1].is_terminal_sign():
-                                    self.__set_add(first, container[i + 1])
-                                # 如果它之后是非终结符
-                                elif container[i + 1].is_non_terminal_sign():
-                                    for j in self.__get_non_terminal_sign_first_no_empty(container[i + 1]):
-                                        self.__set_add(first, j)
-                                # 否则报错
-                                else:
-                                    self.__error = SyntaxRuleError('终结符或非终结符类型错误')
-                                    return False
-                        # 如果不含空字
-                        else:
-                            break
-                    else:
-                        break
-            # 否则报错
-            else:
-                self.__error = SyntaxRuleError('终结符或非终结符类型错误')
-                return False
+        return calculate_string_first(right, registry.terminal_count, self.__nullable, self.__first_bits)
 
-        return first
-
-    def __insert_to_table(self, production, terminal):
+    def __insert_to_table(self, index, terminal_id):
         """
         将产生式插入预测分析表对应位置
-        :param production: 产生式
-        :param terminal: 终结符
+        :param index: 产生式的下标
+        :param terminal_id: 终结符的编号
         :return: 是否插入成功
         """
+        production = self.__productions[index]
         # 先判断应该插入到的位置
-        x = self.__get_non_terminal_sign_index(production.left)
-        y = self.__get_terminal_sign_index(terminal)
-
-        # 如果那个位置已经有产生式了
-        if self.__table[x][y]:
-            # 判断这个产生式是不是与要插入的产生式一样
-            same_left = production.left.type == self.__table[x][y].left.type
-            if same_left:
-                same_right = True
-                if len(production.right) != len(self.__table[x][y].right):
-                    self.__error = SyntaxRuleError("文法非LL(1)" + production.str)
-                    return False
-                else:
-                    for i in range(0, len(production.right)):
-                        if production.right[i].type != self.__table[x][y].right[i].type:
-                            same_right = False
-                    if same_right:
-                        # 执行插入
-                        del self.__table[x][y]
-                        self.__table[x].insert(y, production)
-                        return True
-                    else:
-                        self.__error = SyntaxRuleError("文法非LL(1)" + production.str)
-                        return False
-            else:
+        position = production.left.id * self.__terminal_count + terminal_id - self.__offset
+
+        # 如果那个位置已经有产生式了，判断这个产生式是不是与要插入的产生式一样
+        if self.__table[position] >= 0:
+            other = self.__productions[self.__table[position]]
+            if production.left.type != other.left.type or \
+                    [sign.type for sign in production.right] != [sign.type for sign in other.right]:
                 self.__error = SyntaxRuleError("文法非LL(1)" + production.str)
                 return False
-        # 如果那个位置为空，说明可以填入
-        else:
-            # 执行插入
-            del self.__table[x][y]
-            self.__table[x].insert(y, production)
-            return True
 
-    @classmethod
-    def __set_have_repeat(cls, set1, set2):
-        """
-        判断两个集合是否有交集
-        :param set1: 集合1
-        :param set2: 集合2
-        :return: 是否有交集
-        """
-        for i in set1:
-            for j in set2:
-                if i.type == j.type:
-                    return True
-        return False
+        # 执行插入
+        self.__table[position] = index
+        return True
 
     def __grammar_rule_debug(self):
         """
         调试使用，求一个非终结符对应的所有产生式右边的 first 集中是否有相交元素
+        :return: 错误列表
         """
-        # 一个非终结符对应的所有产生式
-        his_productions = list()
-        # 那些产生式对应的 first 集
-        firsts = list()
-        # 错误
-        errors = list()
+        # 非终结符 -> 它对应的所有产生式右边的 first 集
+        firsts = dict()
+        for left, right in self.__grammar:
+            firsts.setdefault(left, list()).append(self.__calculate_set_first(right)[0])
 
-        # 对于所有的非终结符
+        errors = list()
         for non_terminal_sign in self.__non_terminal_signs:
-            # 寻找他对应的所有产生式
-            his_productions.clear()
-            firsts.clear()
-            for production in productions:
-                if non_terminal_sign.type == production.left.type:
-                    his_productions.append(production)
-
-            # 对于那些产生式，分别求 first 集
-            for production in his_productions:
-                firsts.append(self.__calculate_set_first(production.right))
-
-            # 是否有交集
-            have_repeat = False
-            # 查看这些产生式的 first 集两两之间是否有交集
-            for i in range(0, len(his_productions) - 1):
-                for j in range(i + 1, len(his_productions)):
-                    if self.__set_have_repeat(firsts[i], firsts[j]):
-                        have_repeat = True
-                        break
-
-            # 如果有交集
-            if have_repeat:
-                errors.append('产生式 First 集重叠 ' + '非终结符: ' + non_terminal_sign.type)
-
-            # 如果非终结符的 First 集中包含空字
-            if self.__is_empty_in_non_terminal_sign_first(non_terminal_sign):
-                # 如果他的 First 集和 Follow 集有交集
-                if self.__set_have_repeat(self.__get_non_terminal_sign_first(non_terminal_sign),
-                                          self.__get_non_terminal_sign_follow(non_terminal_sign)):
-                    errors.append('产生式 First 集和 Follow 集重叠 ' + '非终结符: ' + non_terminal_sign.type)
-        return
+            # 这些 first 集两两之间是否有交集
+            seen = 0
+            for bits in firsts.get(non_terminal_sign.id, ()):
+                if seen & bits:
+                    errors.append('产生式 First 集重叠 ' + '非终结符: ' + non_terminal_sign.type)
+                    break
+                seen |= bits
+
+            # 如果非终结符的 First 集中包含空字，他的 First 集和 Follow 集是否有交集
+            if self.__nullable[non_terminal_sign.id] and \
+                    self.__first_bits[non_terminal_sign.id] & self.__follow_bits[non_terminal_sign.id]:
+                errors.append('产生式 First 集和 Follow 集重叠 ' + '非终结符: ' + non_terminal_sign.type)
+        return errors
 
     def __generate_table(self):
         """
@@ -484,55 +471,165 @@ class PredictingAnalysisTable:
         self.__grammar_rule_debug()
 
         # 对每一条产生式应用规则
-        for production in productions:
+        for index, (left, right) in enumerate(self.__grammar):
             # 先求出该产生式右边部分的 first 集
-            first = self.__calculate_set_first(production.right)
-
-            # 对每一个 first 集中的每一个终结符执行操作
-            empty_find = False
-            for i in list(first):
-                if i.type == 'empty':
-                    empty_find = True
-                else:
-                    if not self.__insert_to_table(production, i):
-                        return False
+            bits, empty_find = self.__calculate_set_first(right)
 
-            # 如果其 first 集中有空字，则对 follow 集中的每一个终结符执行操作
+            # 如果其 first 集中有空字，则 follow 集中的每一个终结符也要填入
             if empty_find:
-                for i in self.__get_non_terminal_sign_follow(production.left):
-                    if not self.__insert_to_table(production, i):
-                        return False
+                bits |= self.__follow_bits[left]
+
+            for i in get_bit_indexes(bits):
+                if not self.__insert_to_table(index, i):
+                    return False
 
         return True
 
 
+# 进程内共享的预测分析表，第一次使用时才载入，载入之后只读，可以被多个线程中的 Syntax 同时使用
+shared_table = None
+shared_table_lock = threading.Lock()
+# 共享的预测分析表载入失败的原因
+shared_table_error = None
+
+
+def get_shared_table():
+    """
+    获取进程内共享的预测分析表，多个线程同时第一次调用时只载入一次
+    :return: 预测分析表，载入失败时返回 None
+    """
+    global shared_table, shared_table_error
+    table = shared_table
+    if table is None:
+        with shared_table_lock:
+            if shared_table is None:
+                table = PredictingAnalysisTable()
+                if not table.load():
+                    shared_table_error = table.get_error()
+                    return None
+                shared_table = table
+            table = shared_table
+    return table
+
+
+def prewarm_shared_table():
+    """
+    预先载入共享的预测分析表(例如在服务启动时)，避免第一次请求承担编译的开销
+    :return: 是否成功
+    """
+    return get_shared_table() is not None
+
+
+def swap_shared_table(grammar_productions=None, start=None, compressed=False):
+    """
+    换用另一套文法的预测分析表，新表在锁外编译，成功之后才替换
+    已经建立的 Syntax 继续使用原来的表，之后建立的 Syntax 使用新表
+    符号编号在载入 syntax/rule.py 时就已经确定(见 syntax/registry.py)，新文法只能使用已有的终结符和非终结符，
+    含有其他符号时返回错误
+    :param grammar_productions: 产生式列表，为空时使用 syntax/rule.py 中的文法
+    :param start: 文法开始符号，为空时使用 syntax/rule.py 中的开始符号
+    :param compressed: 是否压缩预测分析表
+    :return: 错误，成功时返回 None
+    """
+    global shared_table
+    if grammar_productions is not None:
+        for production in grammar_productions:
+            for sign in [production.left] + list(production.right):
+                if sign.id < 0 or registry.get_symbol_id(sign.type) != sign.id:
+                    return SyntaxRuleError('文法中的符号没有编号 ' + sign.type)
+    if start is not None and (start.id < 0 or registry.get_symbol_id(start.type) != start.id):
+        return SyntaxRuleError('文法中的符号没有编号 ' + start.type)
+    table = PredictingAnalysisTable(grammar_productions, start, compressed)
+    if not table.load():
+        return table.get_error() or SyntaxRuleError('预测分析表编译失败')
+    with shared_table_lock:
+        shared_table = table
+    return None
+
+
 class Node:
     """
     树节点
+    使用 __slots__，没有 __dict__；叶子节点的 children 是共享的空元组，展开时才换成列表
+    code 和 names 在第一次使用时才建立列表，标点、空字之类的节点不再各自带着两个空列表
     """
-    def __init__(self, data):
+    __slots__ = ('data', 'parent', 'index', 'children', 'lexical', '__code', 'type', 'id', 'length', 'fun', 'num',
+                 '__names', 'bool', 'op', 'add', 'mul', 'name')
+
+    def __init__(self, data, parent=None, index=0):
         """
         树节点
         :param data: 节点数据
+        :param parent: 父节点
+        :param index: 在父节点的孩子中的下标
         """
         self.data = data
-        self.str = data.type
-        self.children = list()
-        self.parent = None
+        self.parent = parent
+        self.index = index
+        self.children = ()
 
         # 属性
         self.lexical = None
-        self.code = list()
+        self.__code = None
         self.type = None
         self.id = None
         self.length = None
         self.fun = None
         self.num = None
-        self.names = list()
+        self.__names = None
         self.bool = None
         self.op = None
         self.add = None
         self.mul = None
+        self.name = None
+
+    @property
+    def str(self):
+        """
+        节点的类型
+        :return: 符号类型
+        """
+        return self.data.type
+
+    @property
+    def code(self):
+        """
+        生成的代码
+        :return: 代码列表(第一次使用时建立)
+        """
+        code = self.__code
+        if code is None:
+            code = self.__code = list()
+        return code
+
+    @code.setter
+    def code(self, code):
+        self.__code = code
+
+    @property
+    def names(self):
+        """
+        名字列表
+        :return: 名字列表(第一次使用时建立)
+        """
+        names = self.__names
+        if names is None:
+            names = self.__names = list()
+        return names
+
+    @names.setter
+    def names(self, names):
+        self.__names = names
+
+    def get_attributes(self):
+        """
+        列出已经设置的语义属性(lexical 除外)，不会为 code、names 建立列表
+        :return: [(属性名, 值)]，值为 None 或空列表的属性不列出
+        """
+        values = (('code', self.__code), ('type', self.type), ('id', self.id), ('length', self.length),
+                  ('fun', self.fun), ('num', self.num), ('names', self.__names), ('bool', self.bool), ('op', self.op),
+                  ('add', self.add), ('mul', self.mul), ('name', self.name))
+        return [(name, value) for name, value in values if value is not None and not (type(value) is list and not value)]
 
     def get_pre_brother(self, index):
         """
@@ -540,11 +637,7 @@ class Node:
         :param index: ..
         :return: 兄弟
         """
-        self_index = 0
-        for i in range(0, len(self.parent.children)):
-            if self.parent.children[i] is self:
-                self_index = i
-        return self.parent.children[self_index - index]
+        return self.parent.children[self.index - index]
 
 
 class Tree:
@@ -558,6 +651,24 @@ class Tree:
         """
         self.root = root
 
+    def to_bytes(self):
+        """
+        编码成紧凑的二进制格式(见 syntax/arena.py)，比 pickle 小，载入也快得多，也不受递归深度的限制
+        :return: 字节串
+        """
+        from syntax.arena import TreeArena
+        return TreeArena.from_tree(self).to_bytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        从 to_bytes 的结果恢复语法树
+        :param data: 字节串
+        :return: 语法树
+        """
+        from syntax.arena import TreeArena
+        return TreeArena.from_bytes(data).to_tree()
+
 
 class Stack:
     """
@@ -599,44 +710,62 @@ class Stack:
         """
         return len(self.__container) == 0
 
+    def get_elements(self):
+        """
+        获取栈中所有元素(从栈底到栈顶)
+        :return: 元素列表
+        """
+        return self.__container
+
 
 class Syntax:
     """
     语法分析器
     """
-    def __init__(self):
+    def __init__(self, engine='table'):
         """
         构造
+        :param engine: 分析方式，'table' 为表驱动，'generated' 为生成的递归下降分析器(见 syntax/generator.py)，
+                       嵌套超出递归深度时自动改用表驱动分析；读取只能读一次的输入时会记下全部终结符，以便改用表驱动分析
         """
+        self.__engine = engine
         # 语法树的构建
         self.__grammar_tree = None
         # 准备存放错误
         self.__error = list()
-        # 预测分析表的构建
-        self.__pa_table = PredictingAnalysisTable()
-        # 编译预测分析表
-        if self.__pa_table.compile():
-            self.__error.append(SyntaxRuleError('预测分析表编译失败'))
-        # 准备存放词法分析的结果
+        # 使用进程内共享的预测分析表(第一次使用时载入)
+        self.__pa_table = get_shared_table()
+        if self.__pa_table is None:
+            self.__error.append(shared_table_error or SyntaxRuleError('预测分析表编译失败'))
+        # 词法分析的结果(任何可以迭代的 token 序列，分析时逐个读取，不做拷贝)
         self.__source = list()
-        # 将词法分析产生的 token 转换成的终结符
-        self.__terminals = list()
+        # 源文件，用来计算错误所在的列数
+        self.__source_file = None
+        # 最近一次分析的统计
+        self.__statistics = dict()
+        # 最近一次分析报告的所有语法错误
+        self.__errors = list()
+
+    def put_source(self, source, source_file=None):
+        """
+        装填词法分析结果，分析时每次只读取一个向前看的 token，不保存整个 token 序列
+        传入 Lexical.iter_tokens 的结果时，词法分析和语法分析就在同一条流水线上进行(词法错误要另外通过 Lexical.get_error 检查)
+        :param source: 词法分析结果(TokenStream、Token 列表或者 token 迭代器，迭代器只能分析一次)
+        :param source_file: 源文件(可以为空)
+        """
+        self.__source_file = source_file
+        self.__source = source
 
-    def put_source(self, source):
+    def __read_terminals(self):
         """
-        装填词法分析结果
-        :param source: 词法分析结果
+        逐个把 token 转换成终结符(token 的类型编号就是终结符的编号，不需要再按类型查找)，读完之后一直产生 #
+        :return: 终结符生成器
         """
-        self.__source.clear()
-        self.__terminals.clear()
-        # 装填词法分析结果
-        for s in source:
-            self.__source.append(s)
-        # 将 tokens 转换成终结符
         for s in self.__source:
-            self.__terminals.append(Sign(s.type, s.str, s.line))
-        # 在所有 tokens 的最后填入一个 #
-        self.__terminals.append(Sign('pound'))
+            yield Sign(s.type, s.str, s.line, s.offset, s.kind if s.kind >= 0 else None)
+        pound = registry.signs[registry.pound_id]
+        while True:
+            yield pound
 
     def get_result(self):
         """
@@ -652,9 +781,27 @@ class Syntax:
         """
         return self.__error
 
-    def execute(self):
+    def execute(self, max_errors=1):
         """
         执行操作
+        :param max_errors: 最多报告的语法错误数量，大于 1 时使用表驱动的分析并在出错后恢复(panic mode)，继续寻找之后的错误；
+                           之后只跳过损坏的子树上的语义规则，其他部分照常执行，其中的语义错误也一并报告
+        :return: 语法分析是否成功
+        """
+        self.__errors = list()
+        # 预测分析表载入失败时无法分析
+        if self.__pa_table is None:
+            self.__error = shared_table_error or SyntaxRuleError('预测分析表编译失败')
+            return False
+        if self.__engine == 'generated' and max_errors <= 1:
+            return self.__execute_generated()
+        return self.__execute_table(self.__read_terminals(), max_errors)
+
+    def __execute_table(self, terminals, max_errors):
+        """
+        表驱动的语法分析
+        :param terminals: 输入的终结符迭代器(读完之后一直产生 #)
+        :param max_errors: 最多报告的语法错误数量
         :return: 语法分析是否成功
         """
         # 新建栈
@@ -662,27 +809,45 @@ class Syntax:
         # 清空错误
         self.__error = None
         # 新建临时语法树
-        grammar_tree = Tree(Node(Sign(grammar_start.type)))
+        grammar_tree = Tree(Node(self.__pa_table.get_start()))
 
         # 将 # 入栈
-        stack.push(Node(Sign('pound')))
+        stack.push(Node(registry.signs[registry.pound_id]))
         # 将语法树根节点入栈
         stack.push(grammar_tree.root)
 
-        # 拷贝转换之后的终结符到输入串
-        inputs = list()
-        for sign in self.__terminals:
-            inputs.append(sign)
-        # 设置当前输入符号索引
+        # 逐个读取输入符号，lookahead 是当前的输入符号，input_index 是已经读过的输入符号数量
+        lookahead = next(terminals)
         input_index = 0
 
+        # 统计: 展开的产生式、匹配的终结符、执行的语义规则
+        expansions = 0
+        rules = 0
+
+        # 出现语法错误之后损坏的节点: 缺少的终结符、放弃或跳过了输入的非终结符，以及它们的子树和受影响的祖先
+        # 只跳过损坏的节点上的语义规则，其他部分(例如出错的语句之后的语句)照常执行
+        damaged = set()
+        # 上一次报告语法错误(或者恢复时跳过输入)之后的输入位置，恢复之后还没有匹配新的输入就再次出错时不重复报告
+        error_index = -1
+
         # 立下 flag
         flag = True
         while flag:
             # 如果栈顶是语义动作
             if isinstance(stack.top(), SemanticRule):
+                if damaged and self.__is_damaged(type(stack.top()), stack.top().node, damaged):
+                    damaged.add(stack.pop().node)
+                    continue
+                rules += 1
                 stack.top().execute()
                 if len(stack.top().errors) > 0:
+                    # 出现语法错误之后，未损坏的部分中的语义错误也一并报告，继续分析
+                    if damaged:
+                        self.__errors.append(stack.top().errors[-1])
+                        if len(self.__errors) >= max_errors:
+                            break
+                        damaged.add(stack.pop().node)
+                        continue
                     self.__error = stack.top().errors[-1]
                     break
                 else:
@@ -692,68 +857,190 @@ class Syntax:
                 # 如果 top 是非终结符
                 if stack.top().data.is_non_terminal_sign():
                     # 查看分析表
-                    production = self.__pa_table.get_production(stack.top().data, inputs[input_index])
+                    record = self.__pa_table.get_record(stack.top().data.id, lookahead.id)
                     # 如果分析表对应位置存有产生式
-                    if production:
-                        # 判断语义规则是否合法
-                        if len(production.right) != len(production.semantic_children):
-                            self.__error = SemanticRuleError('语义规则数量与产生式右边数量不一致 ' + production.str)
-                            break
-
-                        # 执行 start 语义
-                        semantic_start = SemanticRuleFactory.get_instance(production.semantic_start, stack.top())
-                        if semantic_start:
-                            semantic_start.execute()
-                            if len(semantic_start.errors) > 0:
-                                self.__error = semantic_start.errors[-1]
-                                break
-
-                        # 将语法树按照产生式进行生长
-                        for i in range(0, len(production.right)):
-                            stack.top().children.append(Node(Sign(production.right[i].type)))
-                            stack.top().children[i].parent = stack.top()
+                    if record:
+                        expansions += 1
+                        # 执行 start 语义(语义规则的数量已经在载入文法时检查过，类也已经解析好)
+                        if record.start is not None:
+                            if damaged and self.__is_damaged(record.start, stack.top(), damaged):
+                                damaged.add(stack.top())
+                            else:
+                                rules += 1
+                                semantic_start = record.start(stack.top())
+                                semantic_start.execute()
+                                if len(semantic_start.errors) > 0:
+                                    if not damaged:
+                                        self.__error = semantic_start.errors[-1]
+                                        break
+                                    self.__errors.append(semantic_start.errors[-1])
+                                    if len(self.__errors) >= max_errors:
+                                        break
+                                    damaged.add(stack.top())
 
                         # 将 top 出栈
                         top = stack.pop()
 
+                        # 将语法树按照产生式进行生长
+                        children = [Node(sign, top, i) for i, sign in enumerate(record.right)]
+                        top.children = children
+                        # 损坏的节点的子树也是损坏的
+                        if damaged and top in damaged:
+                            damaged.update(children)
+
                         # 将 end 语义规则入栈
-                        semantic_end = SemanticRuleFactory.get_instance(production.semantic_end, top)
-                        if semantic_end:
-                            stack.push(semantic_end)
-
-                        # 将 top 的孩子节点反序入栈
-                        for i in range(len(production.right) - 1, -1, -1):
-                            # for child in top.children[::-1]:
-                            stack.push(top.children[i])
-                            semantic_child = SemanticRuleFactory.get_instance(production.semantic_children[i],
-                                                                              top.children[i])
-                            if semantic_child:
-                                stack.push(semantic_child)
+                        if record.end is not None:
+                            stack.push(record.end(top))
+
+                        # 按执行计划将 top 的孩子节点和 C 语义规则反序入栈
+                        for i, semantic_child in record.pushes:
+                            stack.push(children[i])
+                            if semantic_child is not None:
+                                stack.push(semantic_child(children[i]))
                     # 如果分析表中存放着错误信息
                     else:
-                        self.__error = SyntaxError('语法错误 ' + inputs[input_index].str, inputs[input_index].line)
-                        break
+                        if input_index > error_index:
+                            error_index = input_index
+                            self.__errors.append(self.__syntax_error(lookahead))
+                        if len(self.__errors) >= max_errors:
+                            break
+                        damaged.add(stack.top())
+                        # 跳过输入，直到可以用当前非终结符展开，或者遇到同步符号: 它的 follow 集和栈中的终结符
+                        top_id = stack.top().data.id
+                        sync = self.__pa_table.get_sync_set(top_id)
+                        for elem in stack.get_elements():
+                            if isinstance(elem, Node) and elem.data.is_terminal_sign():
+                                sync |= 1 << elem.data.id
+                        while lookahead.id != registry.pound_id and \
+                                not sync >> lookahead.id & 1 and \
+                                self.__pa_table.get_record(top_id, lookahead.id) is None:
+                            lookahead = next(terminals)
+                            input_index += 1
+                        # 跳过的输入属于同一个错误: 同步符号只是出现在 follow 集中，未必能在这里匹配(例如缺少分号时同步到
+                        # 下一条语句中的右括号)，在匹配新的输入之前接着出现的错误不再报告
+                        error_index = input_index
+                        # 遇到同步符号时放弃这个非终结符(之后不能匹配的符号继续出栈，直到同步)
+                        if self.__pa_table.get_record(top_id, lookahead.id) is None:
+                            stack.pop()
                 # 如果 top 是终结符
                 else:
                     # 如果 top = input
-                    if stack.top().data.type == inputs[input_index].type:
+                    if stack.top().data.id == lookahead.id:
                         # 如果 top = #，宣布分析成功
-                        if stack.top().data.type == 'pound':
+                        if stack.top().data.id == registry.pound_id:
                             flag = False
                         # 如果 top != #
                         else:
                             # 计算 top 的 lexical 属性
-                            stack.top().lexical = inputs[input_index].str
-                            # 将 top 出栈，让 input_index 自增
+                            stack.top().lexical = lookahead.str
+                            # 将 top 出栈，读入下一个输入符号
                             stack.pop()
+                            lookahead = next(terminals)
                             input_index += 1
                     # 如果 top != input
                     else:
-                        self.__error = SyntaxError('语法错误 ' + inputs[input_index].str, inputs[input_index].line)
-                        break
+                        if input_index > error_index:
+                            error_index = input_index
+                            self.__errors.append(self.__syntax_error(lookahead))
+                        if len(self.__errors) >= max_errors or stack.top().data.id == registry.pound_id:
+                            break
+                        # 当作缺少了这个终结符，将它出栈
+                        damaged.add(stack.pop())
 
+        self.__statistics = {'expansions': expansions, 'matches': input_index, 'semantic_rules': rules}
+        if self.__errors and self.__error is None:
+            self.__error = self.__errors[0]
         if self.__error:
             return False
         else:
             self.__grammar_tree = grammar_tree
             return True
+
+    @staticmethod
+    def __is_damaged(rule_class, node, damaged):
+        """
+        判断语义规则用到的节点是否损坏: 节点本身、它的孩子(E 语义规则使用孩子的属性)，
+        以及规则读取前面的兄弟节点时这些兄弟节点
+        :param rule_class: 语义规则类
+        :param node: 语义规则所在的节点
+        :param damaged: 损坏的节点的集合
+        :return: 是否损坏
+        """
+        if node in damaged:
+            return True
+        for child in node.children:
+            if child in damaged:
+                return True
+        if rule_class.depends_on_brothers:
+            brothers = node.parent.children
+            for i in range(0, node.index):
+                if brothers[i] in damaged:
+                    return True
+        return False
+
+    def get_errors(self):
+        """
+        获取最近一次分析报告的所有错误: 语法错误，以及出现语法错误之后未损坏的部分中的语义错误
+        :return: 错误列表
+        """
+        return self.__errors
+
+    def get_statistics(self):
+        """
+        获取最近一次表驱动分析的统计: 展开的产生式、匹配的终结符、执行的语义规则的数量
+        :return: dict
+        """
+        return self.__statistics
+
+    def __execute_generated(self):
+        """
+        使用生成的递归下降分析器执行语法分析，结果与表驱动的分析完全相同
+        :return: 语法分析是否成功
+        """
+        parser = load_parser(self.__pa_table, default_cache_dir)
+        terminals = self.__read_terminals()
+        # 只能读一次的输入(例如 Lexical.iter_tokens 的结果)记下已经读过的终结符，改用表驱动的分析时重放
+        consumed = None
+        inputs = terminals
+        if iter(self.__source) is self.__source:
+            consumed = list()
+            inputs = self.__record_terminals(terminals, consumed)
+        var_num, block_num = semantic_code.current_var_num, semantic_code.current_block_num
+        try:
+            grammar_tree, self.__error = parser.parse(inputs, self.__syntax_error)
+        except RecursionError:
+            # 非尾部的嵌套太深，超出了递归深度: 恢复语义规则使用的全局编号，改用不受嵌套深度限制的表驱动分析重新执行
+            semantic_code.current_var_num, semantic_code.current_block_num = var_num, block_num
+            if consumed is None:
+                terminals = self.__read_terminals()
+            else:
+                terminals = itertools.chain(consumed, terminals)
+            return self.__execute_table(terminals, 1)
+        if isinstance(self.__error, SyntaxError):
+            self.__errors.append(self.__error)
+        if self.__error:
+            return False
+        self.__grammar_tree = grammar_tree
+        return True
+
+    @staticmethod
+    def __record_terminals(terminals, consumed):
+        """
+        读取终结符的同时把它们记下来
+        :param terminals: 终结符迭代器
+        :param consumed: 记录读过的终结符的列表
+        :return: 终结符生成器
+        """
+        for sign in terminals:
+            consumed.append(sign)
+            yield sign
+
+    def __syntax_error(self, sign):
+        """
+        根据出错的输入符号构造语法错误
+        :param sign: 出错的输入符号
+        :return: 语法错误
+        """
+        if self.__source_file is not None and sign.offset >= 0:
+            return SyntaxError.at('语法错误 ' + sign.str, self.__source_file, sign.offset)
+        return SyntaxError('语法错误 ' + sign.str, sign.line)